@@ -18,6 +18,7 @@ from ralph.admin.helpers import (
 )
 from ralph.admin.sites import ralph_site
 from ralph.lib.permissions.models import PermissionsForObjectMixin
+from ralph.lib.search.query import filter_queryset, is_searchable, split_query
 
 AUTOCOMPLETE_EMPTY_VALUE = '0'
 AUTOCOMPLETE_EMPTY_LABEL = '<i class="empty">empty</i>'
@@ -210,6 +211,19 @@ class AutocompleteList(SuggestView):
                 )
         return queryset
 
+    def filter_queryset(self, queryset, model, query, search_fields):
+        """
+        Filter queryset (of `model`) by query - using search index (ordered
+        by rank), when model is indexed.
+        """
+        if not is_searchable(model):
+            return self.get_query_filters(queryset, query, search_fields)
+        if getattr(self.model, 'autocomplete_words_split', False):
+            terms = split_query(query, QUERY_REGEX)
+        else:
+            terms = [query]
+        return filter_queryset(queryset, terms, ranked=True)
+
     def get_base_ids(self, model, value):
         """
         Return IDs for related models.
@@ -228,7 +242,7 @@ class AutocompleteList(SuggestView):
             queryset = model._get_objects_for_user(
                 self.request.user, queryset
             )
-        queryset = self.get_query_filters(queryset, value, search_fields)
+        queryset = self.filter_queryset(queryset, model, value, search_fields)
         return queryset[:self.limit].values_list('pk', flat=True)
 
     def get_results(self, user, can_edit):
@@ -264,8 +278,8 @@ class AutocompleteList(SuggestView):
             queryset = queryset.filter(pk__in=id_list)
         else:
             if self.query:
-                queryset = self.get_query_filters(
-                    queryset, self.query, search_fields
+                queryset = self.filter_queryset(
+                    queryset, self.model, self.query, search_fields
                 )
             if issubclass(self.model, PermissionsForObjectMixin):
                 queryset = self.model._get_objects_for_user(
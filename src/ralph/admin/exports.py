@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Asynchronous exports of admin changelists.
+
+When `ADMIN_EXPORT_ASYNC` is enabled, export (to CSV or XLSX) requested in the
+admin is run in the background (as a `Job` of `ADMIN_EXPORT` internal service)
+instead of building the whole dataset in the web process. Objects are fetched
+in chunks of `ADMIN_EXPORT_CHUNK_SIZE` and their rows are written (streamed)
+directly to the file (XLSX using write-only workbook), so memory usage doesn't
+depend on the number of exported objects. Exported file is saved as an
+attachment, the user is notified (by email) with a link to download it, and
+progress of the export is visible on the exports page in the admin.
+"""
+import csv
+import logging
+import os
+import tempfile
+from urllib.parse import urljoin
+
+from django.apps import apps
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.test import RequestFactory
+from django.urls import reverse
+from openpyxl import Workbook
+
+from ralph.admin.sites import ralph_site
+from ralph.attachments.models import Attachment
+from ralph.lib.external_services.models import Job
+from ralph.lib.queryset import iter_chunks
+
+logger = logging.getLogger(__name__)
+
+EXPORT_SERVICE_NAME = 'ADMIN_EXPORT'
+
+
+class CSVExportWriter(object):
+    mime_type = 'text/csv'
+
+    def __init__(self, path):
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+
+    def writerow(self, row):
+        self._writer.writerow(row)
+
+    def close(self):
+        self._file.close()
+
+
+class XLSXExportWriter(object):
+    """
+    Write rows to XLSX file using write-only workbook (rows are flushed to
+    temporary file instead of being kept in memory).
+    """
+    mime_type = (
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+
+    def __init__(self, path):
+        self._path = path
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet()
+
+    def writerow(self, row):
+        self._sheet.append(row)
+
+    def close(self):
+        self._workbook.save(self._path)
+
+
+EXPORT_WRITERS = {
+    'csv': CSVExportWriter,
+    'xlsx': XLSXExportWriter,
+}
+ASYNC_EXPORT_FORMATS = tuple(EXPORT_WRITERS)
+
+
+def write_export(resource, queryset, writer, chunk_size, callback=None):
+    """
+    Write headers and rows of exported `queryset` (in chunks) using `writer`.
+    `callback` is called with the number of already exported objects after
+    every chunk.
+
+    Returns the number of exported objects.
+    """
+    writer.writerow(resource.get_export_headers())
+    exported = 0
+    for chunk in iter_chunks(queryset, chunk_size):
+        for obj in chunk:
+            writer.writerow(resource.export_resource(obj))
+        exported += len(chunk)
+        if callback:
+            callback(exported)
+    return exported
+
+
+def schedule_export(model_admin, request, file_format):
+    """
+    Schedule export of (filtered) changelist of `model_admin` in the
+    background.
+    """
+    opts = model_admin.model._meta
+    _, job = Job.run(
+        EXPORT_SERVICE_NAME,
+        requester=request.user,
+        app_label=opts.app_label,
+        model_name=opts.model_name,
+        query_string=request.GET.urlencode(),
+        file_format=file_format.get_extension(),
+        filename=model_admin.get_export_filename(file_format),
+    )
+    return job
+
+
+def get_export_progress(job):
+    """
+    Return (without restoring params of the job) the number of exported and
+    all objects, and URL to download exported file (if it's ready).
+    """
+    params = job._dumped_params
+    return {
+        'filename': params.get('filename'),
+        'exported': params.get('exported', 0),
+        'total': params.get('total'),
+        'download_url': params.get('download_url'),
+    }
+
+
+def _get_model_admin(app_label, model_name):
+    return ralph_site._registry[apps.get_model(app_label, model_name)]
+
+
+def _get_export_request(job):
+    """
+    Rebuild request (of the user who requested the export) with changelist
+    filters.
+    """
+    params = job.params
+    request = RequestFactory().get('{}?{}'.format(
+        reverse('admin:{}_{}_changelist'.format(
+            params['app_label'], params['model_name']
+        )),
+        params['query_string']
+    ))
+    request.user = job.user
+    return request
+
+
+def _notify_user(user, filename, download_url):
+    if not user or not user.email:
+        return
+    try:
+        EmailMessage(
+            subject='Ralph export {} is ready'.format(filename),
+            body='Your export is ready to download: {}'.format(download_url),
+            from_email=settings.EMAIL_FROM,
+            to=[user.email],
+        ).send()
+    except Exception:
+        logger.exception('Could not notify %s about export', user)
+
+
+def _export(job):
+    params = job.params
+    model_admin = _get_model_admin(params['app_label'], params['model_name'])
+    request = _get_export_request(job)
+    queryset = model_admin.get_lazy_export_queryset(request)
+    resource = model_admin.get_export_resource_class()(
+        **model_admin.get_export_resource_kwargs(request)
+    )
+    params['total'] = queryset.count()
+    job._update_dumped_params()
+
+    def _update_progress(exported):
+        params['exported'] = exported
+        job._update_dumped_params()
+
+    writer_class = EXPORT_WRITERS[params['file_format']]
+    fd, path = tempfile.mkstemp(suffix='.' + params['file_format'])
+    os.close(fd)
+    try:
+        writer = writer_class(path)
+        try:
+            write_export(
+                resource, queryset, writer, settings.ADMIN_EXPORT_CHUNK_SIZE,
+                callback=_update_progress
+            )
+        finally:
+            writer.close()
+        attachment = Attachment.objects.create_from_file_path(
+            path, job.user, filename=params['filename'],
+            mime_type=writer_class.mime_type,
+        )
+    finally:
+        os.remove(path)
+    params['download_url'] = reverse(
+        'serve_attachment', args=(attachment.id, attachment.original_filename)
+    )
+    return attachment
+
+
+def run_export(job_id):
+    """
+    Export objects (run by RQ worker).
+    """
+    job = Job.objects.get(pk=job_id)
+    job.start()
+    try:
+        _export(job)
+    except Exception as e:
+        logger.exception('Export %s failed', job)
+        job.fail(str(e))
+        return
+    job.success()
+    _notify_user(
+        job.user, job.params['filename'],
+        urljoin(
+            settings.RALPH_HOST_URL or settings.RALPH_INSTANCE,
+            job.params['download_url']
+        )
+    )
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+from django.conf.urls import url
+from django.contrib.auth.decorators import login_required
+
+from ralph.admin.views.exports import AdminExportsView
+
+urlpatterns = [
+    url(
+        r'^exports/?$',
+        login_required(AdminExportsView.as_view()),
+        name='admin_exports'
+    ),
+]
@@ -25,6 +25,7 @@ from taggit.managers import TaggableManager
 from ralph.admin.autocomplete import AUTOCOMPLETE_EMPTY_VALUE, get_results
 from ralph.admin.helpers import get_field_by_relation_path
 from ralph.lib.mixins.fields import MACAddressField
+from ralph.lib.search.query import filter_queryset, is_searchable
 
 SEARCH_OR_SEPARATORS_REGEX = re.compile(r'[;|]')
 SEARCH_AND_SEPARATORS_REGEX = re.compile(r'[&]')
@@ -615,9 +616,15 @@ class BaseObjectHostnameFilter(SimpleListFilter):
     parameter_name = 'hostname'
     template = 'admin/filters/text_filter.html'
 
+    search_index_fields = ['hostname', 'ethernet_set__ipaddress__hostname']
+
     def queryset(self, request, queryset):
         if not self.value():
             return queryset
+        if is_searchable(queryset.model, self.search_index_fields):
+            return filter_queryset(
+                queryset, [self.value()], fields=self.search_index_fields
+            )
         queries = [
             Q(hostname__icontains=self.value()) |
             Q(ethernet_set__ipaddress__hostname__icontains=self.value())
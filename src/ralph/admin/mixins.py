@@ -12,19 +12,22 @@ from django.contrib.admin.views.main import ORDER_VAR
 from django.contrib.auth import get_permission_codename
 from django.contrib.contenttypes.admin import GenericTabularInline
 from django.core import checks
-from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import FieldDoesNotExist, PermissionDenied
 from django.db import models
+from django.db.transaction import non_atomic_requests
 from django.http import HttpResponseRedirect
 from django.urls import reverse
 from django.utils.translation import ugettext_lazy as _
 from django.views.generic import TemplateView
 from import_export.admin import ImportExportModelAdmin
+from import_export.forms import ExportForm
 from import_export.widgets import ForeignKeyWidget
 from mptt.admin import MPTTAdminForm, MPTTModelAdmin
 from reversion.admin import VersionAdmin
 
 from ralph.admin import widgets
 from ralph.admin.autocomplete import AjaxAutocompleteMixin
+from ralph.admin.exports import ASYNC_EXPORT_FORMATS, schedule_export
 from ralph.admin.helpers import get_field_by_relation_path
 from ralph.admin.sites import ralph_site
 from ralph.admin.views.main import BULK_EDIT_VAR, BULK_EDIT_VAR_IDS
@@ -38,6 +41,7 @@ from ralph.lib.permissions.admin import (
 )
 from ralph.lib.permissions.models import PermByFieldMixin
 from ralph.lib.permissions.views import PermissionViewMetaClass
+from ralph.lib.search.query import filter_queryset, is_searchable, split_query
 
 logger = logging.getLogger(__name__)
 
@@ -393,11 +397,53 @@ class RalphAdminMixin(DashboardChangelistMixin, RalphAutocompleteMixin):
             return getattr(self.model, self._queryset_manager).all()
         return super().get_queryset(*args, **kwargs)
 
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Use search index (when model is indexed) instead of `icontains`
+        filters on (joined) `search_fields`.
+        """
+        terms = split_query(search_term)
+        if terms and is_searchable(self.model):
+            return filter_queryset(queryset, terms), False
+        return super().get_search_results(request, queryset, search_term)
+
 
 class RalphAdminImportExportMixin(ImportExportModelAdmin):
     _export_queryset_manager = None
 
+    @non_atomic_requests
+    def export_action(self, request, *args, **kwargs):
+        """
+        Schedule export (to CSV or XLSX) in the background, when
+        `ADMIN_EXPORT_ASYNC` is enabled.
+
+        Request is not run atomically - job has to be commited before it is
+        scheduled to worker (to allow worker to fetch it from database).
+        """
+        if settings.ADMIN_EXPORT_ASYNC and request.method == 'POST':
+            if not self.has_export_permission(request):
+                raise PermissionDenied
+            formats = self.get_export_formats()
+            form = ExportForm(formats, request.POST)
+            if form.is_valid():
+                file_format = formats[int(form.cleaned_data['file_format'])]()
+                if file_format.get_extension() in ASYNC_EXPORT_FORMATS:
+                    schedule_export(self, request, file_format)
+                    messages.info(request, _(
+                        'Export has been scheduled. You will be notified '
+                        'when it is ready to download.'
+                    ))
+                    return HttpResponseRedirect(reverse('admin_exports'))
+        return super().export_action(request, *args, **kwargs)
+
     def get_export_queryset(self, request):
+        return list(self.get_lazy_export_queryset(request))
+
+    def get_lazy_export_queryset(self, request):
+        """
+        Return (not evaluated) queryset of exported objects, with related
+        objects used by export resource selected (or prefetched).
+        """
         # mark request as "exporter" request
         request._is_export = True
         queryset = super().get_export_queryset(request)
@@ -421,7 +467,7 @@ class RalphAdminImportExportMixin(ImportExportModelAdmin):
         )
         if resource_prefetch_related:
             queryset = queryset.prefetch_related(*resource_prefetch_related)
-        return list(queryset)
+        return queryset
 
     def get_export_resource_class(self):
         """
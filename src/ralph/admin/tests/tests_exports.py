@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+import csv
+import os
+import tempfile
+
+from django.core import mail
+from django.test import override_settings, TransactionTestCase
+from django.urls import reverse
+from openpyxl import load_workbook
+
+from ralph.admin.exports import (
+    CSVExportWriter,
+    EXPORT_SERVICE_NAME,
+    write_export,
+    XLSXExportWriter
+)
+from ralph.admin.sites import ralph_site
+from ralph.attachments.models import Attachment
+from ralph.data_center.models import DataCenterAsset
+from ralph.data_center.tests.factories import DataCenterAssetFactory
+from ralph.lib.external_services.models import Job, JobStatus
+from ralph.tests import RalphTestCase
+from ralph.tests.mixins import ClientMixin
+
+
+class WriteExportTestCase(RalphTestCase):
+    def setUp(self):
+        self.assets = DataCenterAssetFactory.create_batch(5)
+        self.model_admin = ralph_site._registry[DataCenterAsset]
+        self.resource = self.model_admin.get_export_resource_class()()
+        # openpyxl loads workbooks only with known extension
+        fd, self.path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def _write(self, writer_class, chunk_size=2):
+        writer = writer_class(self.path)
+        progress = []
+        exported = write_export(
+            self.resource, DataCenterAsset.objects.all(), writer, chunk_size,
+            callback=progress.append
+        )
+        writer.close()
+        return exported, progress
+
+    def test_write_csv_in_chunks(self):
+        exported, progress = self._write(CSVExportWriter)
+        self.assertEqual(exported, 5)
+        self.assertEqual(progress, [2, 4, 5])
+        with open(self.path, newline='') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], self.resource.get_export_headers())
+        self.assertEqual(
+            [int(row[rows[0].index('id')]) for row in rows[1:]],
+            sorted(asset.id for asset in self.assets)
+        )
+
+    def test_write_xlsx(self):
+        exported, _ = self._write(XLSXExportWriter)
+        rows = list(load_workbook(self.path, read_only=True).active.rows)
+        self.assertEqual(len(rows), exported + 1)
+
+
+@override_settings(ADMIN_EXPORT_ASYNC=True)
+class AsyncExportTestCase(ClientMixin, TransactionTestCase):
+    def setUp(self):
+        self.login_as_user(email='user@ralph.local')
+        self.assets = DataCenterAssetFactory.create_batch(3)
+        self.model_admin = ralph_site._registry[DataCenterAsset]
+
+    def _export(self, extension, **filters):
+        extensions = [
+            file_format().get_extension()
+            for file_format in self.model_admin.get_export_formats()
+        ]
+        return self.client.post(
+            '{}?{}'.format(
+                reverse('admin:data_center_datacenterasset_export'),
+                '&'.join('{}={}'.format(*item) for item in filters.items())
+            ),
+            {'file_format': extensions.index(extension)}
+        )
+
+    def test_export_is_run_in_background(self):
+        response = self._export('csv', id=self.assets[0].id)
+        self.assertRedirects(response, reverse('admin_exports'))
+        job = Job.objects.get(service_name=EXPORT_SERVICE_NAME)
+        self.assertEqual(job.status, JobStatus.FINISHED.id)
+        self.assertEqual(job.params['exported'], 1)
+        self.assertEqual(job.params['total'], 1)
+        attachment = Attachment.objects.get()
+        self.assertEqual(attachment.uploaded_by, self.user)
+        self.assertEqual(attachment.mime_type, 'text/csv')
+        with attachment.file as f:
+            self.assertEqual(len(f.read().decode().splitlines()), 2)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn(job.params['download_url'], mail.outbox[0].body)
+
+    def test_exports_view_shows_download_link(self):
+        self._export('xlsx')
+        job = Job.objects.get(service_name=EXPORT_SERVICE_NAME)
+        response = self.client.get(reverse('admin_exports'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, job.params['download_url'])
+
+    def test_other_formats_are_exported_synchronously(self):
+        response = self._export('json')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            Job.objects.filter(service_name=EXPORT_SERVICE_NAME).exists()
+        )
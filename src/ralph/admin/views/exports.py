@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from ralph.admin.exports import EXPORT_SERVICE_NAME, get_export_progress
+from ralph.admin.mixins import RalphBaseTemplateView
+from ralph.lib.external_services.models import Job
+
+# number of the latest exports of the user displayed on exports page
+EXPORTS_LIMIT = 20
+
+
+class AdminExportsView(RalphBaseTemplateView):
+    """
+    List of the latest (asynchronous) exports of the user with their progress
+    and links to download exported files.
+    """
+    template_name = 'admin/exports/exports.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        jobs = Job.objects.filter(
+            service_name=EXPORT_SERVICE_NAME,
+            username=self.request.user.username,
+        ).order_by('-created')[:EXPORTS_LIMIT]
+        context['exports'] = [
+            dict(get_export_progress(job), job=job) for job in jobs
+        ]
+        context['are_jobs_running'] = any(job.is_running for job in jobs)
+        return context
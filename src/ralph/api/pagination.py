@@ -0,0 +1,59 @@
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination by primary key.
+
+    Every page is fetched using `pk > <last pk from previous page>` filter, so
+    neither `COUNT(*)` nor `OFFSET` scan is done - walking through all pages
+    costs the same no matter how far you are.
+    """
+    ordering = ('pk',)
+    page_size_query_param = 'limit'
+
+    def get_ordering(self, request, queryset, view):
+        # ordering has to be unique and unchanging - user-defined ordering
+        # (`?ordering=`) is not supported here
+        return self.ordering
+
+
+class RalphPagination(LimitOffsetPagination):
+    """
+    Limit-offset pagination with opt-in keyset pagination.
+
+    Keyset pagination is used when `cursor` query param is present (pass
+    empty `?cursor=` to get the first page, then follow `next` links).
+    """
+    keyset_pagination_class = KeysetPagination
+
+    def __init__(self):
+        self._keyset_paginator = None
+
+    def _use_keyset(self, request):
+        return (
+            self.keyset_pagination_class.cursor_query_param in
+            request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self._use_keyset(request):
+            self._keyset_paginator = self.keyset_pagination_class()
+            page = self._keyset_paginator.paginate_queryset(
+                queryset, request, view
+            )
+            self.display_page_controls = (
+                self._keyset_paginator.display_page_controls
+            )
+            return page
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self._keyset_paginator is not None:
+            return self._keyset_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self._keyset_paginator is not None:
+            return self._keyset_paginator.to_html()
+        return super().to_html()
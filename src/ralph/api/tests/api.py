@@ -33,9 +33,10 @@ class ManufacturerSerializer(RalphAPISerializer):
         # include view namespace for hyperlinked field
         extra_kwargs = {
             'url': {
-                'view_name': 'test-ralph-api:manufacturer-detail'
+                'view_name': 'test-ralph-api:testmanufacturer-detail'
             }
         }
+        fields = "__all__"
 
 
 class ManufacturerSerializer2(ManufacturerSerializer):
@@ -10,6 +10,7 @@ from rest_framework.test import APIClient, APITestCase
 
 from ralph.admin.tests.tests_views import FACTORY_MAP
 from ralph.api.tests._base import APIPermissionsTestMixin
+from ralph.lib.metrics.profiling import query_budget
 from ralph.tests.factories import UserFactory
 
 
@@ -156,16 +157,12 @@ class RalphAPIRenderingTests(APIPermissionsTestMixin, APITestCase):
             else (ALL_API_ENDPOINTS[model_name], DEFAULT_MAX_QUERIES)
         self.client.force_authenticate(self.user)
         while True:
-            with CaptureQueriesContext(connections['default']) as cqc:
+            # on failure report of repeated queries (with their locations)
+            # is shown
+            with query_budget(max_queries, endpoint):
                 response = self.client.get(endpoint, HTTP_ACCEPT='application/json')
             self.assertEqual(response.status_code, status.HTTP_200_OK)
             self.assertGreater(len(response.json()['results']), 0)
-            self.assertLessEqual(
-                len(cqc.captured_queries), max_queries,
-                msg=f"Too many queries when getting {endpoint}."
-                f"\nQueries count: {len(cqc.captured_queries)}."
-                "\nQueries:\n" + "\n".join(query['sql'] for query in cqc.captured_queries)
-            )
             endpoint = response.json()['next']
             if not BROWSE_ALL_API_ITEMS or endpoint is None:
                 break
@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
+import json
 from datetime import date
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
 from rest_framework import relations
 from rest_framework.test import APIClient, APIRequestFactory
 
@@ -85,6 +88,39 @@ class TestRalphViewset(RalphTestCase):
             response.data['filtering'], ['name', 'manufacturer_kind'],
         )
 
+    def test_keyset_pagination(self):
+        url = reverse('test-ralph-api:testmanufacturer-list')
+        response = self.client.get(url, {'cursor': '', 'limit': 1})
+        self.assertNotIn('count', response.data)
+        self.assertEqual(
+            [m['name'] for m in response.data['results']], ['test']
+        )
+        response = self.client.get(response.data['next'])
+        self.assertEqual(
+            [m['name'] for m in response.data['results']], ['test2']
+        )
+        self.assertIsNone(response.data['next'])
+
+    def test_limit_offset_pagination_by_default(self):
+        url = reverse('test-ralph-api:testmanufacturer-list')
+        response = self.client.get(url, {'limit': 1, 'offset': 1})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(
+            [m['name'] for m in response.data['results']], ['test2']
+        )
+
+    @override_settings(API_STREAMING_CHUNK_SIZE=1)
+    def test_ndjson_streaming(self):
+        TestManufacturerFactory(name='test3', country='Poland')
+        url = reverse('test-ralph-api:testmanufacturer-list')
+        response = self.client.get(url, {'format': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)['name'] for line in lines],
+            ['test', 'test2', 'test3']
+        )
+
 
 class TestAdminSearchFieldsMixin(RalphTestCase):
     def test_get_filter_fields_from_admin(self):
@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 import inspect
 
+from django.conf import settings
 from django.contrib.admin import SimpleListFilter
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, relations, viewsets
 
@@ -14,13 +16,16 @@ from ralph.api.filters import (
     PolymorphicDescendantsFilterBackend,
     TagsFilterBackend
 )
+from ralph.api.pagination import RalphPagination
 from ralph.api.serializers import RalphAPISaveSerializer, ReversedChoiceField
 from ralph.api.utils import QuerysetRelatedMixin
+from ralph.lib.api.utils import NDJSONRenderer
 from ralph.lib.custom_fields.api import CustomFieldsFilterBackend
 from ralph.lib.permissions.api import (
     PermissionsForObjectFilter,
     RalphPermission
 )
+from ralph.lib.queryset import iter_chunks
 
 
 class AdminSearchFieldsMixin(object):
@@ -73,6 +78,7 @@ class RalphAPIViewSetMixin(QuerysetRelatedMixin, AdminSearchFieldsMixin):
         CustomFieldsFilterBackend
     ]
     permission_classes = [RalphPermission]
+    pagination_class = RalphPagination
     save_serializer_class = None
     # define dict of extended filters by single field name (usefull for
     # polymorphic models)
@@ -96,6 +102,33 @@ class RalphAPIViewSetMixin(QuerysetRelatedMixin, AdminSearchFieldsMixin):
                 'PermissionsForObjectFilter missing in filter_backends'
             )
 
+    def list(self, request, *args, **kwargs):
+        if isinstance(request.accepted_renderer, NDJSONRenderer):
+            return self._streaming_list(request)
+        return super().list(request, *args, **kwargs)
+
+    def _streaming_list(self, request):
+        """
+        Stream whole (filtered) queryset (without pagination) serialized in
+        chunks.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        renderer = request.accepted_renderer
+        renderer_context = self.get_renderer_context()
+
+        def _stream():
+            for chunk in iter_chunks(
+                queryset, settings.API_STREAMING_CHUNK_SIZE
+            ):
+                serializer = self.get_serializer(chunk, many=True)
+                yield from renderer.render_lines(
+                    serializer.data, renderer_context
+                )
+
+        return StreamingHttpResponse(
+            _stream(), content_type=renderer.media_type
+        )
+
     def get_serializer_class(self):
         """
         If it's not safe request (ex. POST) and there is `save_serializer_class`
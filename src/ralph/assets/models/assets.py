@@ -6,7 +6,7 @@ from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, RegexValidator
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import ugettext_lazy as _
 from mptt.models import MPTTModel, TreeForeignKey
 
@@ -298,50 +298,107 @@ class AssetLastHostname(models.Model):
     counter = models.PositiveIntegerField(default=1)
     postfix = models.CharField(max_length=30, db_index=True)
 
+    # number of candidates checked at once when looking for free hostnames
+    lookup_batch_size = 100
+
     class Meta:
         unique_together = ('prefix', 'postfix')
 
-    def formatted_hostname(self, fill=5):
+    def formatted_hostname(self, fill=5, counter=None):
         return '{prefix}{counter:0{fill}}{postfix}'.format(
             prefix=self.prefix,
-            counter=int(self.counter),
+            counter=int(self.counter if counter is None else counter),
             fill=fill,
             postfix=self.postfix,
         )
 
     @classmethod
-    # TODO: select_for_update
-    def increment_hostname(cls, prefix, postfix=''):
-        obj, created = cls.objects.get_or_create(
+    def _get_for_update(cls, prefix, postfix):
+        """
+        Return counter of hostnames (created if necessary) locked until the
+        end of current transaction.
+        """
+        obj, _ = cls.objects.select_for_update().get_or_create(
             prefix=prefix,
             postfix=postfix,
+            defaults={'counter': 0},
         )
-        if not created:
-            # F() avoid race condition problem
-            obj.counter = models.F('counter') + 1
-            obj.save()
-            return cls.objects.get(pk=obj.pk)
-        else:
-            return obj
+        return obj
+
+    @classmethod
+    def increment_hostname(cls, prefix, postfix=''):
+        with transaction.atomic():
+            obj = cls._get_for_update(prefix, postfix)
+            obj.counter += 1
+            obj.save(update_fields=['counter'])
+        return obj
+
+    def _find_free_hostnames(self, count, fill, taken_hostnames_getter):
+        """
+        Find `count` free hostnames following current counter and move
+        counter to the last of them.
+
+        Candidates are checked in batches - `taken_hostnames_getter` is called
+        with list of candidates and should return these of them which are
+        already taken.
+        """
+        hostnames = []
+        while len(hostnames) < count:
+            candidates = [
+                (counter, self.formatted_hostname(fill, counter))
+                for counter in range(
+                    self.counter + 1,
+                    self.counter + 1 + max(
+                        count - len(hostnames), self.lookup_batch_size
+                    )
+                )
+            ]
+            if taken_hostnames_getter is None:
+                taken = set()
+            else:
+                taken = taken_hostnames_getter(
+                    [hostname for _, hostname in candidates]
+                )
+            for counter, hostname in candidates:
+                self.counter = counter
+                if hostname not in taken:
+                    hostnames.append(hostname)
+                    if len(hostnames) == count:
+                        break
+        return hostnames
+
+    @classmethod
+    def reserve_hostnames(
+        cls, prefix, postfix, count, fill=5, taken_hostnames_getter=None
+    ):
+        """
+        Reserve block of `count` free hostnames (already taken are skipped).
+
+        Counter is locked for the time of reservation, so concurrent
+        reservations never return the same hostnames.
+        """
+        with transaction.atomic():
+            obj = cls._get_for_update(prefix, postfix)
+            hostnames = obj._find_free_hostnames(
+                count, fill, taken_hostnames_getter
+            )
+            obj.save(update_fields=['counter'])
+        return hostnames
 
     @classmethod
     def get_next_free_hostname(
-        cls, prefix, postfix, fill=5, availability_checker=None, _counter=1
+        cls, prefix, postfix, fill=5, taken_hostnames_getter=None
     ):
+        """
+        Return next free hostname (without reserving it).
+        """
         try:
             last_hostname = cls.objects.get(prefix=prefix, postfix=postfix)
         except cls.DoesNotExist:
             last_hostname = cls(prefix=prefix, postfix=postfix, counter=0)
-
-        last_hostname.counter += _counter
-        hostname = last_hostname.formatted_hostname(fill=fill)
-
-        if availability_checker is None or availability_checker(hostname):
-            return hostname
-        else:
-            return cls.get_next_free_hostname(
-                prefix, postfix, fill, availability_checker, _counter + 1
-            )
+        return last_hostname._find_free_hostnames(
+            1, fill, taken_hostnames_getter
+        )[0]
 
     def __str__(self):
         return self.formatted_hostname()
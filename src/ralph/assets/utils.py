@@ -6,7 +6,18 @@ from django.db import transaction
 
 class DNSaaSPublisherMixin:
     """Generate data formatted for DNSaaS auto txt update"""
-    def get_auto_txt_data(self):
+    def get_auto_txt_data(self, ipaddresses=None):
+        """
+        Args:
+            ipaddresses: (non-management) IP addresses of the object - pass
+                them when they are already fetched (ex. for many objects at
+                once)
+        """
+        if ipaddresses is None:
+            ipaddresses = [
+                ip.address for ip in self.ipaddresses if not ip.is_management
+            ]
+        service = self.service
         data = []
         for purpose_name, content in (
             ('class_name', self.configuration_path.class_name if self.configuration_path else ''),  # noqa
@@ -22,14 +33,10 @@ class DNSaaSPublisherMixin:
             if not purpose or not content:
                 continue
             update_def = {
-                'ips': [
-                    ip.address for ip in self.ipaddresses if
-                    not ip.is_management
-                ],
+                'ips': list(ipaddresses),
                 'purpose': purpose,
                 'content': content,
             }
-            service = self.service
             if service:
                 update_def['service_uid'] = service.uid
             data.append(update_def)
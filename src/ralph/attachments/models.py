@@ -5,7 +5,7 @@ import string
 from django.conf import settings
 from django.contrib.contenttypes import fields
 from django.contrib.contenttypes.models import ContentType
-from django.core.files.base import ContentFile
+from django.core.files.base import File
 from django.db import models, transaction
 from unidecode import unidecode
 
@@ -30,14 +30,19 @@ class AttachmentManager(models.Manager):
             items__object_id=obj.id,
         )
 
-    def create_from_file_path(self, file_path, uploaded_by):
+    def create_from_file_path(
+        self, file_path, uploaded_by, filename=None, mime_type=None
+    ):
         attachment = self.model()
         attachment.uploaded_by = uploaded_by
-        filename = os.path.basename(file_path)
+        filename = filename or os.path.basename(file_path)
         attachment.original_filename = filename
+        if mime_type:
+            attachment.mime_type = mime_type
         with open(file_path, 'rb') as f:
-            content = ContentFile(f.read())
-            attachment.file.save(filename, content, save=True)
+            # file is copied to the storage in chunks (without reading it
+            # into memory)
+            attachment.file.save(filename, File(f), save=True)
         return attachment
 
 
@@ -129,10 +134,12 @@ class Attachment(TimeStampMixin, models.Model):
         """
         Return md5 checksum of a file.
         """
+        md5 = hashlib.md5()
         file.seek(0)
-        md5 = hashlib.md5(file.read()).hexdigest()
+        for chunk in file.chunks():
+            md5.update(chunk)
         file.seek(0)
-        return md5
+        return md5.hexdigest()
 
     def save(self, *args, **kwargs):
         """
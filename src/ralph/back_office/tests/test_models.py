@@ -586,10 +586,10 @@ class TestBackOfficeAssetTransitions(TransitionTestCase, RalphTestCase):
                 requester=self.user_pl
             )
 
-    @patch.object(ExternalService, "run")
+    @patch.object(ExternalService, "run_many")
     def test_a_report_is_generated(self, mock_method):
         GENERATED_FILE_CONTENT = REPORT_TEMPLATE = b'some-content'
-        mock_method.return_value = GENERATED_FILE_CONTENT
+        mock_method.return_value = [GENERATED_FILE_CONTENT]
         report_template = ReportTemplateFactory(template__data=REPORT_TEMPLATE)
         user = UserFactory()
         instances = [
@@ -13,9 +13,12 @@ class GraphSerializerDetail(RalphAPISerializer):
         model = Graph
 
     def to_representation(self, instance):
+        data = self.context.get('graph_data')
+        if data is None:
+            data = instance.get_cached_data()
         return {
             'name': instance.name,
             'description': instance.description,
             'params': instance.params,
-            'data': instance.get_data(),
+            'data': data,
         }
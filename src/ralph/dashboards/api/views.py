@@ -1,8 +1,14 @@
+import hashlib
+
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
 from ralph.dashboards.api.serializers import (
     GraphSerializer,
     GraphSerializerDetail
 )
+from ralph.dashboards.cache import get_graph_data_entry
 from ralph.dashboards.models import Graph
 
 
@@ -15,3 +21,27 @@ class GraphViewSet(ReadOnlyModelViewSet):
         if self.action == 'retrieve':
             return self.detail_serializer_class
         return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['graph_data'] = getattr(self, 'graph_data', None)
+        return context
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Return graph with (cached) data. ETag is calculated from data and
+        time of last modification of the graph, so unchanged graph is not
+        sent again (304 is returned instead).
+        """
+        instance = self.get_object()
+        entry = get_graph_data_entry(instance)
+        etag = '"{}"'.format(hashlib.md5('{}:{}'.format(
+            entry['etag'], instance.modified.isoformat()
+        ).encode()).hexdigest())
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            self.graph_data = entry['data']
+            response = Response(self.get_serializer(instance).data)
+        response['ETag'] = etag
+        return response
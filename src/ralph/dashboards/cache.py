@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Cache of graphs data.
+
+Data of the graph is cached (when `USE_CACHE` is enabled) by graph id and hash
+of graph definition (model, aggregation type and params), so it's invalidated
+when the graph is edited. Cached data is fresh for the (shortest) interval of
+active dashboards containing the graph - after that, stale data is still
+returned, but it's refreshed in the background (by RQ worker), so rendering
+dashboard doesn't wait for aggregation (except the very first time).
+"""
+import hashlib
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min
+
+from ralph.lib.external_services.base import InternalService
+
+logger = logging.getLogger(__name__)
+
+GRAPH_DATA_CACHE_KEY_TMPL = 'ralph_dashboards_graph_{}_{}'
+GRAPH_REFRESH_LOCK_KEY_TMPL = 'ralph_dashboards_graph_refresh_{}_{}'
+REFRESH_SERVICE_NAME = 'DASHBOARD_GRAPHS'
+
+
+def _md5(value):
+    return hashlib.md5(
+        json.dumps(value, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def get_definition_hash(graph):
+    return _md5({
+        'model': graph.model_id,
+        'aggregate_type': graph.aggregate_type,
+        'params': graph.params,
+    })
+
+
+def get_cache_key(graph):
+    return GRAPH_DATA_CACHE_KEY_TMPL.format(
+        graph.pk, get_definition_hash(graph)
+    )
+
+
+def _get_refresh_lock_key(graph):
+    return GRAPH_REFRESH_LOCK_KEY_TMPL.format(
+        graph.pk, get_definition_hash(graph)
+    )
+
+
+def get_ttl(graph):
+    """
+    Return time (in seconds) for which graph data is fresh - the shortest
+    interval of active dashboards containing the graph.
+    """
+    from ralph.dashboards.models import Dashboard
+    interval = Dashboard.objects.filter(
+        graphs=graph, active=True
+    ).aggregate(interval=Min('interval'))['interval']
+    return interval or settings.DASHBOARD_GRAPH_DEFAULT_TTL
+
+
+def build_entry(graph, data=None):
+    if data is None:
+        data = graph.get_data()
+    return {
+        'data': data,
+        'etag': _md5(data),
+        'computed_at': time.time(),
+        'ttl': get_ttl(graph),
+    }
+
+
+def refresh(graph, data=None):
+    """
+    Calculate data of the graph (unless it's already calculated) and store it
+    in cache.
+    """
+    entry = build_entry(graph, data)
+    cache.set(
+        get_cache_key(graph), entry, settings.DASHBOARD_GRAPH_CACHE_MAX_AGE
+    )
+    return entry
+
+
+def schedule_refresh(graph):
+    """
+    Refresh data of the graph in the background (at most one refresh of the
+    graph is scheduled at once).
+    """
+    lock_key = _get_refresh_lock_key(graph)
+    if not cache.add(lock_key, 1, settings.DASHBOARD_GRAPH_REFRESH_TIMEOUT):
+        return
+    try:
+        InternalService(REFRESH_SERVICE_NAME).run_async(graph_id=graph.pk)
+    except Exception:
+        logger.exception('Could not schedule refresh of graph %s', graph.pk)
+        cache.delete(lock_key)
+
+
+def refresh_graph_data(graph_id):
+    """
+    Refresh data of the graph (run by RQ worker).
+    """
+    from ralph.dashboards.models import Graph
+    try:
+        graph = Graph.objects.get(pk=graph_id)
+    except Graph.DoesNotExist:
+        return
+    try:
+        refresh(graph)
+    finally:
+        cache.delete(_get_refresh_lock_key(graph))
+
+
+def get_graph_data_entry(graph):
+    """
+    Return cached data of the graph (dict with data, its ETag, time of
+    calculation and TTL).
+    """
+    if not settings.USE_CACHE:
+        return build_entry(graph)
+    entry = cache.get(get_cache_key(graph))
+    if entry is None:
+        return refresh(graph)
+    if time.time() - entry['computed_at'] >= entry['ttl']:
+        schedule_refresh(graph)
+    return entry
+
+
+def invalidate(graph):
+    cache.delete(get_cache_key(graph))
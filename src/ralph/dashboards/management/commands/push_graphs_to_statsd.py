@@ -1,12 +1,17 @@
 # -*- coding: utf-8 -*-
 import logging
 import textwrap
+import time
+from collections import OrderedDict
+from concurrent.futures import as_completed, ThreadPoolExecutor
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import connection
 from django.utils.text import slugify
 
-from ralph.dashboards.models import Graph
+from ralph.dashboards import cache as graph_cache
+from ralph.dashboards.models import get_graphs_data, Graph
 from ralph.lib.metrics import build_statsd_client
 
 logger = logging.getLogger(__name__)
@@ -17,16 +22,117 @@ def normalize(s):
     return s.replace('-', '_')
 
 
+def group_graphs(graphs):
+    """
+    Group graphs which could be calculated using single query.
+    """
+    groups = OrderedDict()
+    for graph in graphs:
+        key = graph.get_shared_query_key()
+        if key is None:
+            # dedicated query
+            key = ('graph', graph.pk)
+        groups.setdefault(key, []).append(graph)
+    return list(groups.values())
+
+
+def calculate_graphs_data(graphs):
+    """
+    Calculate data of group of graphs. When shared query fails, data of every
+    graph is calculated separately, so single broken graph doesn't affect
+    others.
+
+    Returns:
+        list of (graph, data, time (in seconds)) tuples; data is None if
+        graph could not be calculated
+    """
+    start = time.monotonic()
+    if len(graphs) > 1:
+        try:
+            graphs_data = get_graphs_data(graphs)
+        except Exception:
+            logger.exception(
+                'Shared query of graphs %s failed',
+                ', '.join(str(graph.pk) for graph in graphs)
+            )
+        else:
+            duration = time.monotonic() - start
+            return [
+                (graph, graphs_data[graph.pk], duration) for graph in graphs
+            ]
+    result = []
+    for graph in graphs:
+        start = time.monotonic()
+        try:
+            data = graph.get_data()
+        except Exception:
+            logger.exception('Calculation of graph %s failed', graph.pk)
+            data = None
+        result.append((graph, data, time.monotonic() - start))
+    return result
+
+
+def _calculate_graphs_data_in_thread(graphs):
+    try:
+        return calculate_graphs_data(graphs)
+    finally:
+        # every worker thread uses its own DB connection
+        connection.close()
+
+
 class Command(BaseCommand):
     """Push to statsd data generated by graphs."""
     help = textwrap.dedent(__doc__).strip()
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int,
+            default=settings.STATSD_GRAPHS_PUSH_WORKERS,
+            help='Max number of graphs (queries) calculated in parallel',
+        )
+
+    def _calculate(self, groups, workers):
+        if workers <= 1:
+            for graphs in groups:
+                yield from calculate_graphs_data(graphs)
+            return
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_calculate_graphs_data_in_thread, graphs)
+                for graphs in groups
+            ]
+            # push data of graphs as soon as they are calculated, so slow
+            # graph doesn't delay others
+            for future in as_completed(futures):
+                yield from future.result()
+
+    def _push(self, statsd, graph, data):
+        graph_name = normalize(graph.name)
+        with statsd.pipeline() as pipe:
+            for label, value in zip(data['labels'], data['series']):
+                path = '.'.join((graph_name, normalize(label)))
+                pipe.gauge(path, value)
+
+    def handle(self, *args, **options):
         statsd = build_statsd_client(prefix=settings.STATSD_GRAPHS_PREFIX)
         graphs = Graph.objects.filter(push_to_statsd=True)
-        for graph in graphs:
-            graph_data = graph.get_data()
-            graph_name = normalize(graph.name)
-            for label, value in zip(graph_data['labels'], graph_data['series']):
-                path = '.'.join((graph_name, normalize(label)))
-                statsd.gauge(path, value)
+        groups = group_graphs(graphs)
+        failed = 0
+        for graph, data, duration in self._calculate(
+            groups, options['workers']
+        ):
+            logger.info(
+                'Graph %s calculated in %.3f s', graph.pk, duration,
+                extra={'graph': graph.pk, 'duration': duration}
+            )
+            if data is None:
+                failed += 1
+                continue
+            self._push(statsd, graph, data)
+            if settings.USE_CACHE:
+                graph_cache.refresh(graph, data)
+        if failed:
+            logger.warning(
+                '%s of %s graphs could not be calculated',
+                failed, sum(len(graphs) for graphs in groups)
+            )
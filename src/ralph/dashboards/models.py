@@ -1,3 +1,4 @@
+import json
 from functools import partial
 
 from dj.choices import Choices
@@ -5,8 +6,11 @@ from django.contrib.contenttypes.models import ContentType
 from django.db import connection, models
 from django.db.models import Case, Count, IntegerField, Max, Q, Sum, Value, When
 from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 from django_extensions.db.fields.json import JSONField
 
+from ralph.dashboards import cache as graph_cache
 from ralph.dashboards.filter_parser import FilterParser
 from ralph.dashboards.renderers import HorizontalBar, PieChart, VerticalBar
 from ralph.lib.mixins.models import (
@@ -333,6 +337,41 @@ class Graph(AdminAbsoluteUrlMixin, NamedMixin, TimeStampMixin, models.Model):
             'series': [int(q['series']) for q in queryset],
         }
 
+    def get_shared_query_key(self):
+        """
+        Return key of the query used by this graph - data of graphs with the
+        same key could be calculated using single query (see
+        `get_graphs_data`). None is returned when graph requires dedicated
+        query.
+        """
+        params = self.params
+        if params.get('sort') or params.get('limit'):
+            return None
+        if self.pop_annotate_filters(dict(params.get('filters') or {})):
+            return None
+        series = params.get('series', '')
+        fields = [
+            field.split('|')[0]
+            for field in (series if isinstance(series, list) else [series])
+        ]
+        fields.append(params.get('aggregate_expression') or '')
+        # aggregation through relation could add joins multiplying rows for
+        # other aggregations
+        if any('__' in field for field in fields):
+            return None
+        return (
+            self.model_id,
+            params.get('labels'),
+            json.dumps(params.get('filters'), sort_keys=True),
+            json.dumps(params.get('excludes'), sort_keys=True),
+        )
+
+    def get_cached_data(self):
+        """
+        Return data of the graph from cache (see `ralph.dashboards.cache`).
+        """
+        return graph_cache.get_graph_data_entry(self)['data']
+
     def render(self, **context):
         chart_type = ChartType.from_id(self.chart_type)
         renderer = getattr(chart_type, 'renderer', None)
@@ -361,3 +400,60 @@ class Graph(AdminAbsoluteUrlMixin, NamedMixin, TimeStampMixin, models.Model):
             if filters:
                 queryset = queryset.filter(**filters)
         return queryset
+
+
+def get_graphs_data(graphs):
+    """
+    Calculate data of graphs (with the same shared query key) using single
+    query.
+
+    Returns:
+        dict with data of every graph (by graph id)
+    """
+    graph = graphs[0]
+    grouping_label = GroupingLabel(connection, graph.params['labels'])
+    label = grouping_label.label
+    queryset = grouping_label.apply_grouping(
+        graph.build_queryset(annotated=False)
+    ).values(label).annotate(**{
+        'series_{}'.format(g.pk): g.get_aggregation() for g in graphs
+    })
+    rows = list(queryset)
+    labels = [grouping_label.format_label(row[label]) for row in rows]
+    return {
+        g.pk: {
+            'labels': list(labels),
+            'series': [int(row['series_{}'.format(g.pk)]) for row in rows],
+        }
+        for g in graphs
+    }
+
+
+@receiver(post_save, sender=Graph)
+@receiver(post_delete, sender=Graph)
+def invalidate_graph_data(sender, instance, **kwargs):
+    graph_cache.invalidate(instance)
+
+
+@receiver(post_save, sender=Dashboard)
+def invalidate_dashboard_graphs_data(sender, instance, **kwargs):
+    # TTL of graph data depends on the interval of the dashboard
+    for graph in instance.graphs.all():
+        graph_cache.invalidate(graph)
+
+
+@receiver(m2m_changed, sender=Dashboard.graphs.through)
+def invalidate_dashboard_graphs_data_on_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if reverse:
+        # dashboards of the graph changed
+        graphs = [instance]
+    elif action in ('post_add', 'post_remove'):
+        graphs = Graph.objects.filter(pk__in=pk_set)
+    elif action == 'pre_clear':
+        graphs = instance.graphs.all()
+    else:
+        return
+    for graph in graphs:
+        graph_cache.invalidate(graph)
@@ -132,7 +132,7 @@ class ChartistGraphRenderer(object):
         error = None
         data = {}
         try:
-            data = self.obj.get_data()
+            data = self.obj.get_cached_data()
             data = self.post_data_hook(data)
         except Exception as e:
             error = str(e)
@@ -0,0 +1,98 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import override_settings, TestCase
+from django.urls import reverse
+
+from ralph.api.tests._base import RalphAPITestCase
+from ralph.dashboards import cache as graph_cache
+from ralph.dashboards.models import AggregateType, Graph
+from ralph.dashboards.tests.factories import DashboardFactory, GraphFactory
+from ralph.data_center.tests.factories import DataCenterAssetFactory
+from ralph.lib.external_services.base import InternalService
+
+
+@override_settings(USE_CACHE=True)
+class GraphDataCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        DataCenterAssetFactory.create_batch(2, hostname='abc')
+        self.graph = GraphFactory(
+            aggregate_type=AggregateType.aggregate_count.id,
+            params={
+                'series': 'id',
+                'labels': 'hostname',
+            }
+        )
+
+    def test_data_is_cached(self):
+        with patch.object(
+            Graph, 'get_data', autospec=True, side_effect=Graph.get_data
+        ) as get_data_mock:
+            data = self.graph.get_cached_data()
+            self.assertEqual(self.graph.get_cached_data(), data)
+        self.assertEqual(data, {'labels': ['abc'], 'series': [2]})
+        self.assertEqual(get_data_mock.call_count, 1)
+
+    def test_data_is_recalculated_when_graph_is_changed(self):
+        self.graph.get_cached_data()
+        self.graph.params['labels'] = 'barcode'
+        self.graph.save()
+        with patch.object(
+            Graph, 'get_data', autospec=True, side_effect=Graph.get_data
+        ) as get_data_mock:
+            self.graph.get_cached_data()
+        self.assertEqual(get_data_mock.call_count, 1)
+
+    def test_ttl_is_taken_from_dashboard_interval(self):
+        dashboard = DashboardFactory(interval=30)
+        dashboard.graphs.add(self.graph)
+        DashboardFactory(interval=10, active=False).graphs.add(self.graph)
+        self.assertEqual(graph_cache.get_ttl(self.graph), 30)
+
+    def test_stale_data_is_returned_and_refreshed_in_background(self):
+        entry = graph_cache.refresh(self.graph)
+        entry['computed_at'] -= entry['ttl']
+        entry['data'] = {'labels': [], 'series': []}
+        cache.set(graph_cache.get_cache_key(self.graph), entry)
+        with patch.object(InternalService, 'run_async') as run_async_mock:
+            self.assertEqual(
+                self.graph.get_cached_data(), {'labels': [], 'series': []}
+            )
+            # refresh is scheduled only once
+            self.graph.get_cached_data()
+        run_async_mock.assert_called_once_with(graph_id=self.graph.pk)
+
+        graph_cache.refresh_graph_data(self.graph.pk)
+        self.assertEqual(
+            self.graph.get_cached_data(), {'labels': ['abc'], 'series': [2]}
+        )
+        # refresh lock is released
+        self.assertTrue(cache.add(
+            graph_cache._get_refresh_lock_key(self.graph), 1
+        ))
+
+
+@override_settings(USE_CACHE=True)
+class GraphDataETagTestCase(RalphAPITestCase):
+    def test_not_modified_graph_is_not_sent_again(self):
+        cache.clear()
+        graph = GraphFactory(
+            aggregate_type=AggregateType.aggregate_count.id,
+            params={
+                'series': 'id',
+                'labels': 'hostname',
+            }
+        )
+        url = reverse('graph-detail', args=(graph.id,))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        graph.description = 'changed'
+        graph.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['description'], 'changed')
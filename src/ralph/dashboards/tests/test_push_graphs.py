@@ -0,0 +1,80 @@
+from unittest.mock import MagicMock, patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ralph.dashboards.management.commands import push_graphs_to_statsd
+from ralph.dashboards.models import AggregateType, Graph
+from ralph.dashboards.tests.factories import GraphFactory
+from ralph.data_center.tests.factories import DataCenterAssetFactory
+
+
+class PushGraphsToStatsdTestCase(TestCase):
+    def setUp(self):
+        DataCenterAssetFactory.create_batch(2, hostname='abc')
+        self.count_graph = GraphFactory(
+            name='count',
+            aggregate_type=AggregateType.aggregate_count.id,
+            params={'series': 'id', 'labels': 'hostname'},
+            push_to_statsd=True,
+        )
+        self.max_graph = GraphFactory(
+            name='max',
+            aggregate_type=AggregateType.aggregate_max.id,
+            params={'series': 'id', 'labels': 'hostname'},
+            push_to_statsd=True,
+        )
+        self.statsd = MagicMock()
+        self.pipe = self.statsd.pipeline.return_value.__enter__.return_value
+        patcher = patch.object(
+            push_graphs_to_statsd, 'build_statsd_client',
+            return_value=self.statsd
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get_pushed(self):
+        return {
+            call[0][0]: call[0][1] for call in self.pipe.gauge.call_args_list
+        }
+
+    def test_graphs_with_the_same_query_are_grouped(self):
+        sorted_graph = GraphFactory(
+            aggregate_type=AggregateType.aggregate_count.id,
+            params={'series': 'id', 'labels': 'hostname', 'sort': 'series'},
+        )
+        groups = push_graphs_to_statsd.group_graphs([
+            self.count_graph, self.max_graph, sorted_graph
+        ])
+        self.assertEqual(
+            groups, [[self.count_graph, self.max_graph], [sorted_graph]]
+        )
+
+    def test_grouped_graphs_are_calculated_using_single_query(self):
+        with patch.object(
+            Graph, 'get_data', autospec=True, side_effect=Graph.get_data
+        ) as get_data_mock:
+            call_command('push_graphs_to_statsd')
+        get_data_mock.assert_not_called()
+        self.assertEqual(self._get_pushed(), {
+            'count.abc': 2,
+            'max.abc': self.max_graph.get_data()['series'][0],
+        })
+
+    def test_shared_query_data_is_the_same_as_graph_data(self):
+        data = push_graphs_to_statsd.calculate_graphs_data([
+            self.count_graph, self.max_graph
+        ])
+        self.assertEqual(
+            [(graph, graph_data) for graph, graph_data, _ in data],
+            [
+                (self.count_graph, self.count_graph.get_data()),
+                (self.max_graph, self.max_graph.get_data()),
+            ]
+        )
+
+    def test_broken_graph_does_not_stop_others(self):
+        self.max_graph.params['series'] = 'not_existing_field'
+        self.max_graph.save()
+        call_command('push_graphs_to_statsd')
+        self.assertEqual(self._get_pushed(), {'count.abc': 2})
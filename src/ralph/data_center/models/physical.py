@@ -870,10 +870,11 @@ class DataCenterAsset(
         network = Network.objects.get(pk=network_pk)
         env = network.network_environment
         with transaction.atomic():
-            for instance in instances:
+            hostnames = env.issue_next_free_hostnames(len(instances))
+            for instance, hostname in zip(instances, hostnames):
                 ethernet = Ethernet.objects.create(base_object=instance)
                 ethernet.ipaddress = network.issue_next_free_ip()
-                ethernet.ipaddress.hostname = env.issue_next_free_hostname()
+                ethernet.ipaddress.hostname = hostname
                 ethernet.ipaddress.save()
                 ethernet.save()
 
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 import csv
 import glob
+import itertools
+import json
 import logging
+import multiprocessing
 import os
 import tempfile
 import zipfile
@@ -11,14 +14,18 @@ import tablib
 from django.apps import apps
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
 from import_export import resources
 
 from ralph.data_importer import resources as ralph_resources
 from ralph.data_importer.models import ImportedObjects
 from ralph.data_importer.resources import RalphModelResource
+from ralph.data_importer.widgets import cached_lookups, clear_lookups
 
 APP_MODELS = {model._meta.model_name: model for model in apps.get_models()}
 logger = logging.getLogger(__name__)
+# max number of imported objects and users cached during chunked import
+LOOKUP_CACHE_SIZE = 100000
 
 
 def get_resource(model_name):
@@ -34,6 +41,150 @@ def get_resource(model_name):
     return resource()
 
 
+def iter_chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def delete_objs(data, model):
+    counter = 0
+    for old_id in data:
+        revision_manager = reversion.default_revision_manager
+        if not old_id:
+            continue
+        obj = ImportedObjects.get_object_from_old_pk(
+            model, int(old_id)
+        )
+        revision_manager.save_revision(
+            (obj,), comment='Imported from old Ralph'
+        )
+        with reversion.create_revision():
+            obj.delete()
+        counter += 1
+    return counter
+
+
+def get_objs_to_delete(dataset):
+    return [
+        obj.get('id', None) for obj in dataset.dict
+        if int(obj.get('deleted', 0)) == 1
+    ]
+
+
+def format_errors(result, dataset, headers, first_line=1):
+    errors = []
+    for idx, row in enumerate(result.rows):
+        for error in row.errors:
+            errors.append('\n'.join([
+                'line_number: {}'.format(idx + first_line),
+                'error message: {}'.format(error.error),
+                'row data: {}'.format(
+                    list(zip(headers, dataset[idx]))
+                ),
+                '',
+            ]))
+        if row.errors:
+            break
+    return errors
+
+
+def prefetch_lookups(model_resource, dataset):
+    """
+    Fetch objects looked up by widgets for all rows of `dataset` at once
+    (for widgets supporting it).
+    """
+    for field in model_resource.get_fields():
+        prefetch = getattr(field.widget, 'prefetch', None)
+        if prefetch and field.column_name in dataset.headers:
+            prefetch(dataset[field.column_name])
+
+
+def import_chunk(model_name, headers, number, rows, chunk_size):
+    """
+    Import single chunk of rows (including deletions) in a transaction (the
+    whole chunk is rolled back when any of its rows could not be imported).
+
+    Returns:
+        tuple (chunk number, list of errors, number of deleted objects)
+    """
+    model_resource = get_resource(model_name)
+    dataset = tablib.Dataset(*rows, headers=headers)
+    errors = []
+    deleted = 0
+    try:
+        with transaction.atomic():
+            prefetch_lookups(model_resource, dataset)
+            result = model_resource.import_data(
+                dataset, dry_run=False, use_transactions=True
+            )
+            if result.has_errors():
+                transaction.set_rollback(True)
+                errors = format_errors(
+                    result, dataset, headers,
+                    first_line=number * chunk_size + 1
+                )
+            else:
+                deleted = delete_objs(
+                    get_objs_to_delete(dataset), model_resource._meta.model
+                )
+    except Exception:
+        clear_lookups()
+        raise
+    if errors:
+        # objects (and users) created in rolled back chunk don't exist
+        clear_lookups()
+    return number, errors, deleted
+
+
+def _import_chunk_star(args):
+    return import_chunk(*args)
+
+
+class ImportCheckpoint(object):
+
+    """
+    Chunks of file already imported (saved in JSON file after every chunk)
+    - used to resume interrupted import.
+    """
+
+    def __init__(self, path, source, model_name, chunk_size):
+        self.path = path
+        self.params = {
+            'source': os.path.abspath(source),
+            'model_name': model_name,
+            'chunk_size': chunk_size,
+        }
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            params = {key: data.get(key) for key in self.params}
+            if params != self.params:
+                raise CommandError(
+                    'Checkpoint {} was saved for different import ({})'.format(
+                        path, params
+                    )
+                )
+            self.done = set(data['done'])
+
+    def add(self, number):
+        self.done.add(number)
+        if not self.path:
+            return
+        tmp_path = '{}.tmp'.format(self.path)
+        with open(tmp_path, 'w') as f:
+            json.dump(dict(self.params, done=sorted(self.done)), f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
 class Command(BaseCommand):
 
     help = "Imports data for specified model from specified file"
@@ -78,6 +229,32 @@ class Command(BaseCommand):
             action='store_true',
             help="Use it when importing data from Ralph 2.",
         )
+        parser.add_argument(
+            '--chunk-size',
+            dest='chunk_size',
+            type=int,
+            default=0,
+            help=(
+                'Stream file and import it in chunks of this number of rows '
+                '(each chunk in a single transaction)'
+            ),
+        )
+        parser.add_argument(
+            '--checkpoint',
+            dest='checkpoint',
+            default=None,
+            help=(
+                'Path of file with already imported chunks - used to resume '
+                'interrupted (chunked) import'
+            ),
+        )
+        parser.add_argument(
+            '--workers',
+            dest='workers',
+            type=int,
+            default=1,
+            help='Number of processes importing chunks in parallel',
+        )
 
     def from_zip(self, options):
         with open(options.get('source'), 'rb') as f:
@@ -106,21 +283,7 @@ class Command(BaseCommand):
             self.from_file(options)
 
     def delete_objs(self, data, model):
-        counter = 0
-        for old_id in data:
-            revision_manager = reversion.default_revision_manager
-            if not old_id:
-                continue
-            obj = ImportedObjects.get_object_from_old_pk(
-                model, int(old_id)
-            )
-            revision_manager.save_revision(
-                (obj,), comment='Imported from old Ralph'
-            )
-            with reversion.create_revision():
-                obj.delete()
-            counter += 1
-        return counter
+        return delete_objs(data, model)
 
     def from_file(self, options):
         if not options.get('model_name'):
@@ -134,6 +297,9 @@ class Command(BaseCommand):
             options.get('model_name'),
             options.get('source')
         ))
+        if options.get('chunk_size'):
+            self.from_file_in_chunks(options)
+            return
         with open(options.get('source')) as csv_file:
             reader_kwargs = {}
             reader = csv.reader(
@@ -146,25 +312,11 @@ class Command(BaseCommand):
             model_resource = get_resource(options.get('model_name'))
             before_import = model_resource._meta.model.objects.count()
             dataset = tablib.Dataset(*csv_body, headers=headers)
-            objs_delete = [
-                obj.get('id', None) for obj in dataset.dict
-                if int(obj.get('deleted', 0)) == 1
-            ]
+            objs_delete = get_objs_to_delete(dataset)
             result = model_resource.import_data(dataset, dry_run=False)
             if result.has_errors():
-                for idx, row in enumerate(result.rows):
-                    for error in row.errors:
-                        error_msg = '\n'.join([
-                            'line_number: {}'.format(idx + 1),
-                            'error message: {}'.format(error.error),
-                            'row data: {}'.format(
-                                list(zip(headers, dataset[idx]))
-                            ),
-                            '',
-                        ])
-                        self.stderr.write(error_msg)
-                    if row.errors:
-                        break
+                for error_msg in format_errors(result, dataset, headers):
+                    self.stderr.write(error_msg)
             after_import_count = model_resource._meta.model.objects.count()
 
             self.stderr.write(
@@ -183,6 +335,64 @@ class Command(BaseCommand):
             self.stdout.write('{} deleted\n'.format(deleted))
             self.stdout.write('Done\n')
 
+    def _import_chunks_in_processes(self, chunks, workers):
+        # database connections could not be shared with forked processes
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(workers) as pool:
+            # limit number of chunks read into memory at once
+            for wave in iter_chunks(chunks, workers):
+                yield from pool.imap(_import_chunk_star, wave)
+
+    def from_file_in_chunks(self, options):
+        model_name = options.get('model_name')
+        chunk_size = options['chunk_size']
+        workers = options.get('workers') or 1
+        model = get_resource(model_name)._meta.model
+        checkpoint = ImportCheckpoint(
+            options.get('checkpoint'), options.get('source'), model_name,
+            chunk_size
+        )
+        before_import = model.objects.count()
+        deleted = 0
+        failed_chunks = 0
+        with open(options.get('source')) as csv_file, cached_lookups(
+            LOOKUP_CACHE_SIZE
+        ):
+            reader = csv.reader(csv_file, dialect='RalphImporter')
+            headers = next(reader)
+            chunks = (
+                (model_name, headers, number, rows, chunk_size)
+                for number, rows in enumerate(iter_chunks(reader, chunk_size))
+                if number not in checkpoint.done
+            )
+            if workers > 1:
+                results = self._import_chunks_in_processes(chunks, workers)
+            else:
+                results = map(_import_chunk_star, chunks)
+            for number, errors, chunk_deleted in results:
+                if errors:
+                    failed_chunks += 1
+                    for error_msg in errors:
+                        self.stderr.write(error_msg)
+                    continue
+                deleted += chunk_deleted
+                checkpoint.add(number)
+                logger.info('Chunk %s of %s imported', number, model_name)
+        if not failed_chunks:
+            checkpoint.remove()
+        self.stderr.write('Imported records: {}'.format(
+            model.objects.count() - before_import
+        ))
+        if failed_chunks:
+            self.stderr.write(
+                'Chunks rolled back because of errors: {}'.format(
+                    failed_chunks
+                )
+            )
+        self.stdout.write('{} deleted\n'.format(deleted))
+        self.stdout.write('Done\n')
+
     def handle(self, *args, **options):
         if options.get('map_imported_id_to_new_id'):
             settings.MAP_IMPORTED_ID_TO_NEW_ID = True
@@ -7,6 +7,7 @@ from import_export import fields, widgets
 
 from ralph.data_importer.models import ImportedObjects
 from ralph.data_importer.widgets import (
+    cache_imported_obj,
     ExportForeignKeyStrWidget,
     ExportManyToManyStrTroughWidget,
     ExportManyToManyStrWidget,
@@ -99,11 +100,12 @@ class ImportForeignKeyMixin(object):
     ):
         if not dry_run and self.old_object_pk:
             content_type = ContentType.objects.get_for_model(self._meta.model)
-            ImportedObjects.objects.update_or_create(
+            imported_obj, _ = ImportedObjects.objects.update_or_create(
                 content_type=content_type,
                 old_object_pk=self.old_object_pk,
                 defaults={'object_pk': instance.pk}
             )
+            cache_imported_obj(imported_obj)
 
     def import_field(self, field, obj, data, is_m2m=False):
         """
@@ -1,5 +1,8 @@
 import ipaddress
+import json
 import os
+import tempfile
+from unittest.mock import Mock, patch
 
 from ddt import data, ddt, unpack
 from django.contrib.auth import get_user_model
@@ -30,6 +33,7 @@ from ralph.data_importer.management.commands.create_server_model import (
 )
 from ralph.data_importer.models import ImportedObjects
 from ralph.data_importer.resources import AssetModelResource
+from ralph.data_importer.widgets import cached_lookups
 from ralph.deployment.models import (
     Preboot,
     PrebootConfiguration,
@@ -149,6 +153,72 @@ class DataImporterTestCase(TestCase):
             "service_1"
         )
 
+    def test_importer_command_back_office_asset_in_chunks(self):
+        back_office_csv = os.path.join(
+            self.base_dir,
+            'tests/samples/back_office_assets.csv'
+        )
+        management.call_command(
+            'importer',
+            back_office_csv,
+            type='file',
+            model_name='BackOfficeAsset',
+            map_imported_id_to_new_id=True,
+            chunk_size=1,
+        )
+        for sn in ('bo_asset_sn', 'bo_asset_sn2'):
+            back_office_asset = BackOfficeAsset.objects.get(sn=sn)
+            self.assertEqual(back_office_asset.warehouse.name, 'warehouse_1')
+            self.assertEqual(back_office_asset.model.name, 'asset_model_1')
+
+    def test_importer_command_in_chunks_resumes_from_checkpoint(self):
+        back_office_csv = os.path.join(
+            self.base_dir,
+            'tests/samples/back_office_assets.csv'
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            checkpoint_path = os.path.join(tmp_dir, 'checkpoint.json')
+            with open(checkpoint_path, 'w') as f:
+                json.dump({
+                    'source': os.path.abspath(back_office_csv),
+                    'model_name': 'BackOfficeAsset',
+                    'chunk_size': 1,
+                    'done': [0],
+                }, f)
+            management.call_command(
+                'importer',
+                back_office_csv,
+                type='file',
+                model_name='BackOfficeAsset',
+                map_imported_id_to_new_id=True,
+                chunk_size=1,
+                checkpoint=checkpoint_path,
+            )
+            self.assertFalse(os.path.exists(checkpoint_path))
+        self.assertFalse(BackOfficeAsset.objects.filter(
+            sn='bo_asset_sn'
+        ).exists())
+        self.assertTrue(BackOfficeAsset.objects.filter(
+            sn='bo_asset_sn2'
+        ).exists())
+
+    def test_import_chunk_with_errors_clears_lookups_cache(self):
+        resource = Mock()
+        resource.get_fields.return_value = []
+        result = resource.import_data.return_value
+        result.has_errors.return_value = True
+        result.rows = [Mock(errors=[Mock(error='error')])]
+        with cached_lookups(maxsize=10) as lookup_cache:
+            lookup_cache.set(('user', 'iron.man'), Mock())
+            with patch.object(
+                importer, 'get_resource', return_value=resource
+            ):
+                number, errors, deleted = importer.import_chunk(
+                    'Region', ['id', 'name'], 0, [['1', 'USA']], 1
+                )
+            self.assertEqual(len(errors), 1)
+            self.assertEqual(len(lookup_cache), 0)
+
     def test_importer_command_regions(self):
         """Test importer management command with BackOfficeAsset model."""
         old_regions_count = Region.objects.count()
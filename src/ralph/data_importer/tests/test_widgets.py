@@ -1,9 +1,13 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
 from ralph.assets.models import BaseObject
 from ralph.data_importer.widgets import (
+    cached_lookups,
     ExportManyToManyStrTroughWidget,
-    ManyToManyThroughWidget
+    LookupCache,
+    ManyToManyThroughWidget,
+    UserWidget
 )
 from ralph.licences.models import BaseObjectLicence
 from ralph.licences.tests.factories import (
@@ -64,3 +68,38 @@ class ExportManyToManyStrThroughWidgetTestCase(TestCase):
                 pk__in=self.base_objects_ids
             )
         ])
+
+
+class LookupCacheTestCase(TestCase):
+    def test_least_recently_used_is_removed(self):
+        cache = LookupCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+
+
+class UserWidgetTestCase(TestCase):
+    def setUp(self):
+        for username in ('iron.man', 'superman'):
+            get_user_model().objects.create(username=username)
+        self.widget = UserWidget(model=get_user_model())
+
+    def test_clean_prefetched_users(self):
+        with cached_lookups(maxsize=10):
+            with self.assertNumQueries(1):
+                self.widget.prefetch(['iron.man', 'superman', ''])
+            with self.assertNumQueries(0):
+                self.assertEqual(
+                    self.widget.clean('iron.man').username, 'iron.man'
+                )
+                self.assertEqual(
+                    self.widget.clean('superman').username, 'superman'
+                )
+
+    def test_prefetch_without_cache(self):
+        with self.assertNumQueries(0):
+            self.widget.prefetch(['iron.man'])
@@ -1,4 +1,6 @@
 import logging
+from collections import OrderedDict
+from contextlib import contextmanager
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -12,6 +14,98 @@ from ralph.data_importer.models import ImportedObjects
 
 logger = logging.getLogger(__name__)
 
+# cache of lookups done by widgets (active only in `cached_lookups` block)
+_lookup_cache = None
+
+
+class LookupCache(object):
+
+    """LRU cache of objects found by widgets during import."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        try:
+            value = self._data.pop(key)
+        except KeyError:
+            return None
+        self._data[key] = value
+        return value
+
+    def set(self, key, value):
+        self._data.pop(key, None)
+        self._data[key] = value
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+
+@contextmanager
+def cached_lookups(maxsize):
+    """
+    Cache (up to `maxsize`) imported objects and users found by widgets
+    within this block. Only existing objects are cached, so objects created
+    during import are found as well.
+    """
+    global _lookup_cache
+    _lookup_cache = LookupCache(maxsize)
+    try:
+        yield _lookup_cache
+    finally:
+        _lookup_cache = None
+
+
+def clear_lookups():
+    """
+    Clear lookups cache (ex. when transaction, in which cached objects were
+    found or created, is rolled back).
+    """
+    if _lookup_cache is not None:
+        _lookup_cache.clear()
+
+
+def _get_imported_obj_cache_key(content_type, old_pk):
+    return ('imported_obj', content_type.pk, str(old_pk))
+
+
+def cache_imported_obj(imported_obj):
+    if _lookup_cache is not None:
+        _lookup_cache.set(
+            _get_imported_obj_cache_key(
+                imported_obj.content_type, imported_obj.old_object_pk
+            ),
+            imported_obj
+        )
+
+
+def prefetch_imported_objs(model, old_pks):
+    """
+    Fetch (using single query) imported objects of `model` with `old_pks`
+    into lookups cache.
+    """
+    if _lookup_cache is None:
+        return
+    content_type = ContentType.objects.get_for_model(model)
+    missing = [
+        old_pk for old_pk in set(map(str, old_pks))
+        if old_pk and _lookup_cache.get(
+            _get_imported_obj_cache_key(content_type, old_pk)
+        ) is None
+    ]
+    if missing:
+        for imported_obj in ImportedObjects.objects.filter(
+            content_type=content_type,
+            old_object_pk__in=missing
+        ):
+            cache_imported_obj(imported_obj)
+
 
 def get_imported_obj(model, old_pk):
     """Get imported object from old primary key.
@@ -23,10 +117,18 @@ def get_imported_obj(model, old_pk):
     :rtype: tuple
     """
     content_type = ContentType.objects.get_for_model(model)
-    imported_obj = ImportedObjects.objects.filter(
-        content_type=content_type,
-        old_object_pk=str(old_pk)
-    ).first()
+    imported_obj = None
+    if _lookup_cache is not None:
+        imported_obj = _lookup_cache.get(
+            _get_imported_obj_cache_key(content_type, old_pk)
+        )
+    if not imported_obj:
+        imported_obj = ImportedObjects.objects.filter(
+            content_type=content_type,
+            old_object_pk=str(old_pk)
+        ).first()
+        if imported_obj:
+            cache_imported_obj(imported_obj)
     if not imported_obj:
         msg = (
             "Record with pk %s not found for model %s of '%s'"
@@ -47,6 +149,10 @@ class UserWidget(widgets.ForeignKeyWidget):
     def clean(self, value, *args, **kwargs):
         result = None
         if value:
+            if _lookup_cache is not None:
+                result = _lookup_cache.get(('user', value))
+                if result:
+                    return result
             result, created = get_user_model().objects.get_or_create(
                 username=value,
             )
@@ -54,8 +160,24 @@ class UserWidget(widgets.ForeignKeyWidget):
                 logger.warning(
                     'User not found: %s create a new.', value
                 )
+            if _lookup_cache is not None:
+                _lookup_cache.set(('user', value), result)
         return result
 
+    def prefetch(self, values):
+        """Fetch users with `values` usernames into lookups cache."""
+        if _lookup_cache is None:
+            return
+        missing = [
+            value for value in set(values)
+            if value and _lookup_cache.get(('user', value)) is None
+        ]
+        if missing:
+            for user in get_user_model().objects.filter(
+                username__in=missing
+            ):
+                _lookup_cache.set(('user', user.username), user)
+
     def render(self, value, obj=None):
         if value:
             return value.username
@@ -187,6 +309,15 @@ class BaseObjectWidget(widgets.ForeignKeyWidget):
             return result.baseobject_ptr
         return None
 
+    def prefetch(self, values):
+        old_pks = {'bo': [], 'dc': []}
+        for value in values:
+            if value and '|' in value:
+                asset_type, asset_id = value.split('|', 1)
+                old_pks.get(asset_type.lower(), []).append(asset_id)
+        prefetch_imported_objs(BackOfficeAsset, old_pks['bo'])
+        prefetch_imported_objs(DataCenterAsset, old_pks['dc'])
+
 
 class ImportedForeignKeyWidget(widgets.ForeignKeyWidget):
 
@@ -202,6 +333,10 @@ class ImportedForeignKeyWidget(widgets.ForeignKeyWidget):
                     value = imported_obj.object_pk
         return super().clean(value)
 
+    def prefetch(self, values):
+        if settings.MAP_IMPORTED_ID_TO_NEW_ID:
+            prefetch_imported_objs(self.model, values)
+
 
 class NullStringWidget(widgets.CharWidget):
     def clean(self, value, *args, **kwargs):
@@ -35,7 +35,7 @@ from ralph.assets.models import ConfigurationClass, Ethernet
 from ralph.data_center.models import DataCenterAsset
 from ralph.deployment.models import Preboot
 from ralph.dhcp.models import DHCPEntry, DHCPServer
-from ralph.dns.dnsaas import DNSaaS
+from ralph.dns.dnsaas import get_dnsaas_client
 from ralph.dns.forms import RecordType
 from ralph.dns.views import DNSaaSIntegrationNotEnabledError
 from ralph.lib.mixins.forms import ChoiceFieldWithOtherOption, OTHER
@@ -306,7 +306,7 @@ def clean_dns(cls, instances, **kwargs):
     """
     if not settings.ENABLE_DNSAAS_INTEGRATION:
         raise DNSaaSIntegrationNotEnabledError()
-    dnsaas = DNSaaS()
+    dnsaas = get_dnsaas_client()
     # TODO: transaction?
     for instance in instances:
         ips = list(instance.ipaddresses.exclude(
@@ -432,8 +432,8 @@ def assign_new_hostname(cls, instances, network_environment, **kwargs):
         net_env = NetworkEnvironment.objects.get(
             pk=network_environment['value']
         )
-        for instance in instances:
-            new_hostname = net_env.issue_next_free_hostname()
+        hostnames = net_env.issue_next_free_hostnames(len(instances))
+        for instance, new_hostname in zip(instances, hostnames):
             _assign_hostname(instance, new_hostname, net_env)
 
 
@@ -709,7 +709,7 @@ def wait_for_dhcp_servers(cls, instances, **kwargs):
 def create_dns_entries(cls, instances, **kwargs):
     if not settings.ENABLE_DNSAAS_INTEGRATION:
         raise DNSaaSIntegrationNotEnabledError()
-    dnsaas = DNSaaS()
+    dnsaas = get_dnsaas_client()
     # TODO: transaction?
     for instance in instances:
         # TODO: use dedicated param instead of history_kwargs
@@ -49,9 +49,9 @@ class _BaseTestDeploymentActionsTestCase(object):
         # self.assertIsNone(self.instance.hostname)
 
     @override_settings(ENABLE_DNSAAS_INTEGRATION=True)
-    @mock.patch('ralph.deployment.deployment.DNSaaS._get_oauth_token')
-    @mock.patch('ralph.deployment.deployment.DNSaaS.get_dns_records')
-    @mock.patch('ralph.deployment.deployment.DNSaaS.delete_dns_record')
+    @mock.patch('ralph.dns.dnsaas.DNSaaS._get_oauth_token')
+    @mock.patch('ralph.dns.dnsaas.DNSaaS.get_dns_records')
+    @mock.patch('ralph.dns.dnsaas.DNSaaS.delete_dns_record')
     def test_clean_dns(self, delete_dns_record_mock, get_dns_records_mock, _get_oauth_token_mock):
         IPAddressFactory(address='10.20.30.41')
         IPAddressFactory(
@@ -75,8 +75,8 @@ class _BaseTestDeploymentActionsTestCase(object):
         delete_dns_record_mock.assert_called_with(10)
 
     @override_settings(ENABLE_DNSAAS_INTEGRATION=True)
-    @mock.patch('ralph.deployment.deployment.DNSaaS._get_oauth_token')
-    @mock.patch('ralph.deployment.deployment.DNSaaS.delete_dns_record')
+    @mock.patch('ralph.dns.dnsaas.DNSaaS._get_oauth_token')
+    @mock.patch('ralph.dns.dnsaas.DNSaaS.delete_dns_record')
     def test_clean_dns_with_no_ips(self, delete_dns_record_mock, _get_oauth_token_mock):
         IPAddressFactory(
             ethernet__base_object=self.instance, is_management=True
@@ -89,8 +89,8 @@ class _BaseTestDeploymentActionsTestCase(object):
         self.assertEqual(delete_dns_record_mock.call_count, 0)
 
     @override_settings(ENABLE_DNSAAS_INTEGRATION=True)
-    @mock.patch('ralph.deployment.deployment.DNSaaS._get_oauth_token')
-    @mock.patch('ralph.deployment.deployment.DNSaaS.get_dns_records')
+    @mock.patch('ralph.dns.dnsaas.DNSaaS._get_oauth_token')
+    @mock.patch('ralph.dns.dnsaas.DNSaaS.get_dns_records')
     def test_clean_dns_with_too_much_ips(self, get_dns_records_mock, _get_oauth_token_mock):
         IPAddressFactory(
             ethernet__base_object=self.instance,
@@ -235,7 +235,7 @@ class _BaseTestDeploymentActionsTestCase(object):
 
     @override_settings(ENABLE_DNSAAS_INTEGRATION=True)
     @override_settings(DNSAAS_URL='https://dnsaas.mydc.net')
-    @mock.patch('ralph.deployment.deployment.DNSaaS._get_oauth_token')
+    @mock.patch('ralph.dns.dnsaas.DNSaaS._get_oauth_token')
     @mock.patch('ralph.dns.dnsaas.DNSaaS._post')
     def test_create_dns_records(self, _post, _get_oauth_token_mock):
         _get_oauth_token_mock.return_value = 'token'
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Generation counter of data used in DHCP configuration.
+
+Counter is kept in Django cache (shared between processes) and bumped every
+time any of models used to generate DHCP config is changed. It's much cheaper
+way to check if DHCP config has changed (single cache lookup) than querying
+`modified` field of every model.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from ralph.lib.cache import bump_cache_generation, get_cache_generation
+from ralph.networks.signals import ips_network_changed, networks_parent_changed
+
+GENERATION_CACHE_KEY = 'ralph_dhcp_config_generation'
+
+DHCP_CONFIG_MODELS = [
+    'assets.Ethernet',
+    'data_center.DataCenter',
+    'deployment.Deployment',
+    'dhcp.DHCPEntry',
+    'dhcp.DNSServer',
+    'dhcp.DNSServerGroup',
+    'dhcp.DNSServerGroupOrder',
+    'networks.IPAddress',
+    'networks.Network',
+    'networks.NetworkEnvironment',
+]
+
+
+def get_generation():
+    """
+    Return current generation of DHCP config data.
+    """
+    return get_cache_generation(GENERATION_CACHE_KEY)
+
+
+def _bump_generation():
+    bump_cache_generation(GENERATION_CACHE_KEY)
+
+
+def bump_generation(*args, **kwargs):
+    """
+    Bump generation of DHCP config data.
+
+    Generation is bumped immediately (for current process) and once again
+    after commit of current transaction - otherwise other process could cache
+    config generated before the transaction was committed under the new
+    generation.
+    """
+    _bump_generation()
+    transaction.on_commit(_bump_generation)
+
+
+def connect_signals():
+    for model in DHCP_CONFIG_MODELS:
+        for signal_name, signal in [
+            ('post_save', post_save), ('post_delete', post_delete)
+        ]:
+            signal.connect(
+                bump_generation, sender=model, weak=False,
+                dispatch_uid='dhcp_generation_{}_{}'.format(model, signal_name)
+            )
+    for signal in (ips_network_changed, networks_parent_changed):
+        signal.connect(bump_generation, dispatch_uid='dhcp_generation')
@@ -2,6 +2,7 @@ from django.db import models
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
+from ralph.dhcp.generation import connect_signals
 from ralph.lib.mixins.models import AdminAbsoluteUrlMixin, NamedMixin
 from ralph.networks.models.networks import IPAddress, NetworkEnvironment
 
@@ -100,3 +101,6 @@ class DNSServer(AdminAbsoluteUrlMixin, models.Model):
 
     def __str__(self):
         return self.ip_address
+
+
+connect_signals()
@@ -1,8 +1,10 @@
 import re
+from unittest.mock import patch
 
 from ddt import data, ddt, unpack
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import override_settings, TestCase
 from django.urls import reverse
 from django.utils.http import http_date
 
@@ -14,6 +16,10 @@ from ralph.networks.models.networks import Network
 from ralph.networks.tests.factories import IPAddressFactory, NetworkFactory
 
 
+def _get_content(response):
+    return response.content.decode()
+
+
 @ddt
 class DHCPConfigTest(TestCase):
     def test_config_endpoint_should_return_200(self):
@@ -37,6 +43,10 @@ class DHCPConfigTest(TestCase):
         self.assertEqual(response.status_code, 401)
 
     def test_config_endpoint_should_return_304(self):
+        get_user_model().objects.create_superuser(
+            'test', 'test@test.test', 'test'
+        )
+        self.client.login(username='test', password='test')
         network = NetworkFactory(address='192.168.1.0/24')
         url = '{}?env={}'.format(
             reverse('dhcp_config_entries'), network.network_environment
@@ -74,7 +84,7 @@ class DHCPEntriesViewTest(TestCase):
             reverse('dhcp_config_entries'), network.network_environment
         )
         response = self.client.get(url)
-        lines = response.content.decode().strip().split('\n')
+        lines = _get_content(response).strip().split('\n')
         self.assertTrue(lines[0].startswith('# DHCP config generated by Ralph last modified at'))
         self.assertTrue(
             re.match(
@@ -171,3 +181,99 @@ class DHCPEntriesViewTest(TestCase):
         self.assertEqual(DHCPEntry.objects.count(), 3)
         self.assertEqual(len(entries), 1)
         self.assertEqual(entries[0].pk, ip.pk)
+
+
+@override_settings(USE_CACHE=True)
+class DHCPConfigCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        # config is cached only in cache shared between processes
+        patcher = patch(
+            'ralph.dhcp.views.is_shared_cache', return_value=True
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        get_user_model().objects.create_superuser(
+            'test', 'test@test.test', 'test'
+        )
+        self.client.login(username='test', password='test')
+        self.network = NetworkFactory(address='192.168.1.0/24')
+        self.url = '{}?env={}'.format(
+            reverse('dhcp_config_entries'), self.network.network_environment
+        )
+
+    def test_response_contains_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+
+    def test_matching_etag_should_return_304_without_rendering(self):
+        etag = self.client.get(self.url)['ETag']
+        with patch.object(
+            DHCPEntriesView, 'get_context_data'
+        ) as get_context_data_mock, patch.object(
+            DHCPEntriesView, 'get_last_modified'
+        ) as get_last_modified_mock:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(get_context_data_mock.called)
+        self.assertFalse(get_last_modified_mock.called)
+
+    def test_matching_etag_should_return_304_without_fetching_environments(
+        self
+    ):
+        etag = self.client.get(self.url)['ETag']
+        with patch.object(
+            DHCPEntriesView, 'check_objects_existence_by_names'
+        ) as check_objects_existence_mock:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(check_objects_existence_mock.called)
+
+    def test_matching_etag_should_not_bypass_authentication(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.logout()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 401)
+
+    def test_etag_is_not_used_without_shared_cache(self):
+        with patch(
+            'ralph.dhcp.views.is_shared_cache', return_value=False
+        ):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+    def test_etag_changes_when_dhcp_data_changes(self):
+        etag = self.client.get(self.url)['ETag']
+        IPAddressFactory(address='192.168.1.2', dhcp_expose=True)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_requested_environments(self):
+        etag = self.client.get(self.url)['ETag']
+        other_network = NetworkFactory(address='192.168.2.0/24')
+        response = self.client.get(
+            '{}&env={}'.format(self.url, other_network.network_environment),
+            HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_cached_config_is_served(self):
+        ip = IPAddressFactory(address='192.168.1.2', dhcp_expose=True)
+        content = _get_content(self.client.get(self.url))
+        self.assertIn(ip.hostname, content)
+        with self.assertNumQueries(0):
+            view = DHCPEntriesView()
+            view.config_cache_key = view.get_config_cache_key(
+                [], [str(self.network.network_environment)]
+            )
+            self.assertEqual(view.get_cached_config()['content'], content)
+
+    def test_cached_config_is_refreshed_after_change(self):
+        self.client.get(self.url)
+        ip = IPAddressFactory(address='192.168.1.2', dhcp_expose=True)
+        content = _get_content(self.client.get(self.url))
+        self.assertIn(ip.hostname, content)
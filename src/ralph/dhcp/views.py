@@ -1,5 +1,8 @@
+import hashlib
 import logging
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Count, Prefetch
 from django.http import (
     HttpResponse,
@@ -7,7 +10,7 @@ from django.http import (
     HttpResponseNotFound,
     HttpResponseNotModified
 )
-from django.utils.http import http_date, parse_http_date_safe
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
 from django.views.generic.base import TemplateView
 from rest_framework.views import APIView
 
@@ -15,7 +18,9 @@ from ralph.admin.helpers import get_client_ip
 from ralph.assets.models.components import Ethernet
 from ralph.data_center.models import DataCenter
 from ralph.deployment.models import Deployment
+from ralph.dhcp.generation import get_generation
 from ralph.dhcp.models import DHCPEntry, DHCPServer, DNSServer
+from ralph.lib.cache import is_shared_cache
 from ralph.networks.models.networks import (
     IPAddress,
     Network,
@@ -51,6 +56,8 @@ class LastModifiedMixin(object):
 
     def dispatch(self, request, *args, **kwargs):
         response = super().dispatch(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
         if not self.is_modified(request):
             return HttpResponseNotModified()
         response['Last-Modified'] = http_date(self.last_timestamp)
@@ -58,6 +65,15 @@ class LastModifiedMixin(object):
 
 
 class DHCPConfigMixin(object):
+    """
+    Rendered config is cached (when `USE_CACHE` is enabled and cache is shared
+    between processes) by generation of DHCP data (see
+    `ralph.dhcp.generation`) and requested DCs/environments. The same key is
+    used as ETag, so when config has not changed, 304 is returned without
+    touching DHCP data in the database (ETag is checked in `get`, after the
+    request is authenticated, but before requested DCs/environments are
+    fetched).
+    """
     content_type = 'text/plain'
 
     @staticmethod
@@ -66,21 +82,35 @@ class DHCPConfigMixin(object):
         not_found = set(names) - set([obj.name for obj in found])
         return found, not_found
 
-    def dispatch(self, request, *args, **kwargs):
-        dc_names = request.GET.getlist('dc', None)
-        env_names = request.GET.getlist('env', None)
-        if dc_names and env_names:
-            return HttpResponseBadRequest(
-                'Only DC or ENV mode available.',
-                content_type=self.content_type
-            )
+    @staticmethod
+    def use_cache():
+        # generation of DHCP data is bumped in every process (ex. RQ worker)
+        # changing it, so it has to be kept in cache shared by all of them
+        return settings.USE_CACHE and is_shared_cache()
 
-        if not (dc_names or env_names):
-            return HttpResponseBadRequest(
-                'Please specify DC or ENV.',
-                content_type=self.content_type
-            )
+    def get_config_cache_key(self, dc_names, env_names):
+        return 'ralph_dhcp_config:{}:{}:{}:{}'.format(
+            self.__class__.__name__,
+            get_generation(),
+            ','.join(sorted(dc_names)),
+            ','.join(sorted(env_names)),
+        )
+
+    def get_etag(self):
+        return '"{}"'.format(
+            hashlib.md5(self.config_cache_key.encode()).hexdigest()
+        )
+
+    def get_cached_config(self):
+        if not self.use_cache():
+            return None
+        return cache.get(self.config_cache_key)
 
+    def get_networks(self, dc_names, env_names):
+        """
+        Return networks of requested DCs/environments or `HttpResponse` with
+        error when any of them doesn't exist.
+        """
         if dc_names:
             found, not_found = self.check_objects_existence_by_names(
                 DataCenter, dc_names
@@ -104,13 +134,61 @@ class DHCPConfigMixin(object):
                     content_type='text/plain'
                 )
             environments = found
-        self.networks = Network.objects.select_related(
+        return Network.objects.select_related(
             'network_environment'
         ).filter(
             network_environment__in=environments,
             dhcp_broadcast=True,
         )
-        self.last_modified = self.get_last_modified(self.networks)
+
+    def get(self, request, *args, **kwargs):
+        etag = None
+        self.cached_config = None
+        if self.use_cache():
+            self.config_cache_key = self.get_config_cache_key(
+                self.dc_names, self.env_names
+            )
+            etag = self.get_etag()
+            if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+                response = HttpResponseNotModified()
+                response['ETag'] = etag
+                return response
+        networks = self.get_networks(self.dc_names, self.env_names)
+        if isinstance(networks, HttpResponse):
+            return networks
+        self.networks = networks
+        if self.use_cache():
+            self.cached_config = self.get_cached_config()
+        if self.cached_config is not None:
+            self.last_modified = self.cached_config['last_modified']
+            content = self.cached_config['content']
+        else:
+            self.last_modified = self.get_last_modified(self.networks)
+            content = super().get(request, *args, **kwargs).rendered_content
+            if self.use_cache():
+                cache.set(self.config_cache_key, {
+                    'content': content,
+                    'last_modified': self.last_modified,
+                }, settings.DHCP_CONFIG_CACHE_TIMEOUT)
+        response = HttpResponse(content, content_type=self.content_type)
+        if etag:
+            response['ETag'] = etag
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        self.dc_names = request.GET.getlist('dc', None)
+        self.env_names = request.GET.getlist('env', None)
+        if self.dc_names and self.env_names:
+            return HttpResponseBadRequest(
+                'Only DC or ENV mode available.',
+                content_type=self.content_type
+            )
+
+        if not (self.dc_names or self.env_names):
+            return HttpResponseBadRequest(
+                'Please specify DC or ENV.',
+                content_type=self.content_type
+            )
         return super().dispatch(request, *args, **kwargs)
 
 
@@ -1,22 +1,37 @@
 # -*- coding: utf-8 -*-
 import json
 import logging
-from datetime import datetime, timedelta
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from functools import wraps
-from typing import List, Optional, Tuple, Union
+from typing import Iterator, List, Optional, Tuple, Union
 from urllib.parse import parse_qs, urlencode, urljoin,  urlsplit
 import requests
 from dj.choices import Choices
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.translation import ugettext_lazy as _
 from oauthlib.oauth2 import BackendApplicationClient
 from oauthlib.oauth2.rfc6749.errors import CustomOAuth2Error
+from requests.adapters import HTTPAdapter
 from requests_oauthlib import OAuth2Session
 
 logger = logging.getLogger(__name__)
 
 QueryParams = List[Tuple[str, str]]
 
+OAUTH_TOKEN_CACHE_KEY = 'ralph_dnsaas_oauth_token'
+# token is renewed this number of seconds before it expires
+OAUTH_TOKEN_EXPIRATION_MARGIN = 60
+
+_session = None
+_client = None
+# separate locks - client creation (under `_client_lock`) creates the session
+_session_lock = threading.Lock()
+_client_lock = threading.Lock()
+
 
 class RecordType(Choices):
     _ = Choices.Choice
@@ -32,26 +47,56 @@ def renew_token_when_unauthorized(func):
         self._verify_oauth_token_validity()
         status_code, data = func(self, *args, **kwargs)
         if status_code == 401:
-            self._update_oauth_token()
+            self._update_oauth_token(renew=True)
             status_code, data = func(self, *args, **kwargs)
         return status_code, data
     return wrapper
 
 
+def get_session() -> requests.Session:
+    """
+    Return HTTP session shared by all DNSaaS clients in the process (keeps
+    pool of keep-alive connections to DNSaaS).
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=settings.DNSAAS_POOL_SIZE,
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+    return _session
+
+
+def get_dnsaas_client() -> 'DNSaaS':
+    """
+    Return DNSaaS client shared by the whole process.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = DNSaaS()
+    return _client
+
+
 class DNSaaS:
 
     def __init__(self, headers: dict = None):
-        self.session = requests.Session()
-        _headers = {
+        self.session = get_session()
+        self.headers = {
             'Content-Type': 'application/json',
             'User-agent': 'Ralph/DNSaaS/Client',
-            'Authorization': 'Bearer {}'.format(self._get_oauth_token())
         }
         if headers is not None:
-            _headers.update(headers)
-        self.session.headers.update(_headers)
+            self.headers.update(headers)
+        # token is fetched (or taken from cache) with the first request
+        self.token_expiration = None
 
-    def _get_oauth_token(self):
+    def _fetch_oauth_token(self) -> dict:
         client_id = settings.OAUTH_CLIENT_ID
         secret = settings.OAUTH_SECRET
         token_url = settings.OAUTH_TOKEN_URL
@@ -63,17 +108,40 @@ class DNSaaS:
             )
         except CustomOAuth2Error as e:
             logger.error(str(e))
+            raise
+        valid_for = token.get('expires_in') - OAUTH_TOKEN_EXPIRATION_MARGIN
+        return {
+            'access_token': token.get('access_token'),
+            'expires_at': time.time() + valid_for,
+            'valid_for': valid_for,
+        }
 
-        expire_in = token.get('expires_in')
-        self.token_expiration = datetime.now() + timedelta(0, expire_in - 60)
-        return token.get('access_token')
+    def _get_oauth_token(self, renew: bool = False) -> str:
+        """
+        Return OAuth token. Token is shared (using cache) by all processes
+        until it expires.
 
-    def _update_oauth_token(self):
-        token = self._get_oauth_token()
-        self.session.headers['Authorization'] = 'Bearer {}'.format(token)
+        Args:
+            renew: fetch new token even if there is one in cache (ex. when
+                cached one was rejected by DNSaaS)
+        """
+        token = None if renew else cache.get(OAUTH_TOKEN_CACHE_KEY)
+        if token is None:
+            token = self._fetch_oauth_token()
+            cache.set(OAUTH_TOKEN_CACHE_KEY, token, token['valid_for'])
+        self.token_expiration = datetime.fromtimestamp(token['expires_at'])
+        return token['access_token']
+
+    def _update_oauth_token(self, renew: bool = False):
+        token = self._get_oauth_token(renew=renew)
+        self.headers['Authorization'] = 'Bearer {}'.format(token)
 
     def _verify_oauth_token_validity(self):
-        if datetime.now() >= self.token_expiration:
+        if (
+            'Authorization' not in self.headers or
+            self.token_expiration is not None and
+            datetime.now() >= self.token_expiration
+        ):
             self._update_oauth_token()
 
     @staticmethod
@@ -114,39 +182,106 @@ class DNSaaS:
         """
         Returns 'results' from DNSAAS API.
 
+        When the number of pages is known (after fetching the first one),
+        remaining pages are fetched concurrently.
+
         Args:
             :str url: Url to API
-            :int page:
 
         Returns:
             list of records
         """
-        page = 0
-        api_results, last_page = self._get_api_result(url)
-        while not last_page:
-            page = page + 1
-            next_url = self._set_page_qp(url, page)
-            _api_results, last_page = self._get_api_result(next_url)
-            api_results.extend(_api_results)
+        json_data = self._get_api_page(url)
+        api_results = json_data.get('content', [])
+        if json_data.get('last', False):
+            return api_results
+        total_pages = json_data.get('totalPages')
+        if total_pages is None:
+            # number of pages is unknown - fetch them one after another
+            page = 0
+            last_page = False
+            while not last_page:
+                page = page + 1
+                next_url = self._set_page_qp(url, page)
+                _api_results, last_page = self._get_api_result(next_url)
+                api_results.extend(_api_results)
+            return api_results
+        urls = [
+            self._set_page_qp(url, page) for page in range(1, total_pages)
+        ]
+        for _api_results in self._map(self._get_api_result, urls):
+            api_results.extend(_api_results[0])
         return api_results
 
-    def _get_api_result(self, url: str) -> Tuple[List[dict], bool]:
+    def _map(self, func, args):
+        """
+        Call `func` for every item of `args` using up to
+        `DNSAAS_CONCURRENCY` threads (results are returned in order of
+        `args`).
+        """
+        args = list(args)
+        workers = min(settings.DNSAAS_CONCURRENCY, len(args))
+        if workers <= 1:
+            return [func(arg) for arg in args]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(func, args))
+
+    def _get_api_page(self, url: str) -> dict:
         status_code, json_data = self._get(url)
+        return json_data or {}
+
+    def _get_api_result(self, url: str) -> Tuple[List[dict], bool]:
+        json_data = self._get_api_page(url)
         api_results = json_data.get('content', [])
         last_page = bool(json_data.get('last', False))
         return api_results, last_page
 
+    def iter_api_pages(self, url: str) -> Iterator[List[dict]]:
+        """
+        Yield consecutive pages of 'results' from DNSAAS API (without keeping
+        all of them in memory).
+        """
+        page = 0
+        api_results, last_page = self._get_api_result(url)
+        yield api_results
+        while not last_page:
+            page = page + 1
+            api_results, last_page = self._get_api_result(
+                self._set_page_qp(url, page)
+            )
+            yield api_results
+
+    def get_records_by_ips(self, ipaddresses: List[str]) -> List[dict]:
+        """
+        Return (raw) DNSaaS records of `ipaddresses`.
+
+        Addresses are sent in batches of `DNSAAS_IPS_BATCH_SIZE` (batches are
+        fetched concurrently).
+        """
+        ipaddresses = list(ipaddresses)
+        batch_size = settings.DNSAAS_IPS_BATCH_SIZE
+        urls = [
+            self.build_url(
+                'records',
+                get_params=[('size', '100'), ] + [
+                    ('ip', i) for i in ipaddresses[start:start + batch_size]
+                ]
+            )
+            for start in range(0, len(ipaddresses), batch_size)
+        ]
+        return [
+            item
+            for batch_results in self._map(self.get_api_result, urls)
+            for item in batch_results
+        ]
+
     def get_dns_records(self, ipaddresses: List[str]) -> List[dict]:
         """Gets DNS Records for `ipaddresses` by API call"""
         dns_records = []
+        ipaddresses = list(ipaddresses)
         if not ipaddresses:
             return []
-        ipaddresses = [('ip', i) for i in ipaddresses]
-        url = self.build_url(
-            'records',
-            get_params=[('size', '100'), ] + ipaddresses
-        )
-        api_results = self.get_api_result(url)
+        api_results = self.get_records_by_ips(ipaddresses)
         ptrs = set([i['content'] for i in api_results if i['type'] == 'PTR'])
 
         for item in api_results:
@@ -236,6 +371,7 @@ class DNSaaS:
                 method=request_method,
                 url=url,
                 json=json_data,
+                headers=self.headers,
                 timeout=float(settings.DNSAAS_TIMEOUT)
             )
             logger.info(
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Local stub of DNSaaS API (OAuth token endpoint and paginated records),
+used by tests and to benchmark DNSaaS client against (local) network.
+
+Run it standalone:
+
+    python -m ralph.dns.dnsaas_stub --port 8055 --page-size 100
+
+and point Ralph to it (`DNSAAS_URL=http://127.0.0.1:8055/`,
+`OAUTH_TOKEN_URL=http://127.0.0.1:8055/token/` and
+`OAUTHLIB_INSECURE_TRANSPORT=1`). Every IP address (`ip` param) has single A
+and PTR record.
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlsplit
+
+
+class DNSaaSStubRequestHandler(BaseHTTPRequestHandler):
+    # keep-alive connections
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, data, status=200):
+        content = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length)
+
+    def do_POST(self):
+        self._read_body()
+        if urlsplit(self.path).path != '/token/':
+            self._send_json({}, status=404)
+            return
+        self._send_json(self.server.issue_token())
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path != '/api/records/':
+            self._send_json({}, status=404)
+            return
+        if not self.server.is_authorized(self.headers.get('Authorization')):
+            self._send_json({'detail': 'Unauthorized'}, status=401)
+            return
+        self._send_json(self.server.get_records_page(parse_qs(url.query)))
+
+
+class DNSaaSStubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, page_size=100, latency=0):
+        super().__init__(('127.0.0.1', port), DNSaaSStubRequestHandler)
+        self.page_size = page_size
+        # delay (in seconds) of every response
+        self.latency = latency
+        self.tokens = set()
+        self.token_requests = 0
+        self.requests = 0
+        self.connections = 0
+        self._stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        return 'http://{}:{}/'.format(*self.server_address)
+
+    @property
+    def token_url(self):
+        return '{}token/'.format(self.url)
+
+    def get_request(self):
+        with self._stats_lock:
+            self.connections += 1
+        return super().get_request()
+
+    def issue_token(self):
+        token = uuid.uuid4().hex
+        with self._stats_lock:
+            self.token_requests += 1
+            self.tokens.add(token)
+        return {
+            'access_token': token,
+            'token_type': 'Bearer',
+            'expires_in': 3600,
+        }
+
+    def revoke_tokens(self):
+        self.tokens.clear()
+
+    def is_authorized(self, authorization):
+        with self._stats_lock:
+            self.requests += 1
+        time.sleep(self.latency)
+        token = (authorization or '').replace('Bearer ', '', 1)
+        return token in self.tokens
+
+    def get_records_page(self, params):
+        records = []
+        for i, ip in enumerate(params.get('ip', [])):
+            name = 'host-{}.local'.format(ip.replace('.', '-'))
+            records.append({
+                'id': 2 * i, 'type': 'A', 'name': name, 'content': ip
+            })
+            records.append({
+                'id': 2 * i + 1, 'type': 'PTR', 'name': ip, 'content': name
+            })
+        page = int(params.get('page', [0])[0])
+        total_pages = max(
+            (len(records) + self.page_size - 1) // self.page_size, 1
+        )
+        return {
+            'content': records[
+                page * self.page_size:(page + 1) * self.page_size
+            ],
+            'number': page,
+            'totalPages': total_pages,
+            'last': page >= total_pages - 1,
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run stub of DNSaaS API')
+    parser.add_argument('--port', type=int, default=8055)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument(
+        '--latency', type=float, default=0,
+        help='Delay of every response (in seconds)'
+    )
+    args = parser.parse_args()
+    server = DNSaaSStubServer(
+        port=args.port, page_size=args.page_size, latency=args.latency
+    )
+    print('DNSaaS stub listening on {}'.format(server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
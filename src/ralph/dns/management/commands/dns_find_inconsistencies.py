@@ -1,23 +1,56 @@
 # -*- coding: utf-8 -*-
+"""
+Compare DNS records (A and PTR) in DNSaaS with IP-hostname pairs in Ralph.
+
+Records are reconciled in chunks (of `DNS_INCONSISTENCIES_CHUNK_SIZE` IPs):
+first Ralph IPs are walked in order of their address, then the rest of the
+DNSaaS A and PTR records are streamed page by page, so only a single chunk is
+kept in memory at once. DNS records of every chunk are fetched (and compared)
+in parallel.
+
+Found inconsistencies are written as text, CSV or JSON lines. Every JSON line
+contains (when possible) a fix, which could be applied later using
+`--replay`.
+"""
+import csv
 import ipaddress
+import json
 import logging
-from collections import defaultdict
+import os
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
 
-from ralph.dns.dnsaas import DNSaaS
+from ralph.dns.dnsaas import get_dnsaas_client, RecordType
 from ralph.networks.models import IPAddress
 
 logger = logging.getLogger(__name__)
 
-TEMPLATE = """
-{description}
+MISSING_A_IN_DNSAAS = 'missing_a_in_dnsaas'
+MISSING_A_IN_RALPH = 'missing_a_in_ralph'
+WRONG_A = 'wrong_a'
+WRONG_PTR = 'wrong_ptr'
+ZOMBIE_PTR = 'zombie_ptr'
+DUPLICATED_PTR = 'duplicated_ptr'
 
-{headers}
-{content}
---------------
+DESCRIPTIONS = {
+    MISSING_A_IN_DNSAAS: 'A records missing in DNSaaS',
+    MISSING_A_IN_RALPH: 'A records missing in Ralph',
+    WRONG_A: 'Inconsistent A records',
+    WRONG_PTR: 'Missing or wrong PTR records',
+    ZOMBIE_PTR: 'Zombie PTR records',
+    DUPLICATED_PTR: 'Duplicated PTR records',
+}
 
-"""
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+
+CSV_FIELDS = ['kind', 'ip', 'ralph_hostname', 'dns', 'fix']
 
 
 def get_ptr(ip):
@@ -39,182 +72,332 @@ def get_ptr(ip):
     return rev_ptr
 
 
+def get_ip_from_ptr(ptr):
+    """
+    Reverse `ptr` to ip (inverse of `get_ptr`). Return None if `ptr` is not
+    a valid reverse pointer.
+    """
+    for suffix, separator, group in (
+        ('.in-addr.arpa', '.', 1), ('.ip6.arpa', ':', 4)
+    ):
+        if ptr.endswith(suffix):
+            chars = ptr[:-len(suffix)].split('.')[::-1]
+            address = separator.join(
+                ''.join(chars[i:i + group])
+                for i in range(0, len(chars), group)
+            )
+            try:
+                return str(ipaddress.ip_address(address))
+            except ValueError:
+                return None
+    return None
+
+
+def _diff(kind, ip, ralph_hostname, dns, fix=None):
+    return {
+        'kind': kind,
+        'ip': ip,
+        'ralph_hostname': ralph_hostname,
+        'dns': dns,
+        'fix': fix,
+    }
+
+
+def reconcile(ips, records):
+    """
+    Compare IP-hostname pairs from Ralph with DNS records of these IPs.
+
+    Args:
+        ips: dict of IP (address) -> hostname in Ralph (None if IP is not in
+            Ralph)
+        records: DNSaaS records (A and PTR) of `ips`
+
+    Yields:
+        dicts describing found inconsistencies (kind, ip, ralph_hostname,
+        dns - related DNS records, fix - change which fixes inconsistency in
+        DNSaaS, if it could be determined)
+    """
+    a_records = defaultdict(list)
+    ptr_records = defaultdict(list)
+    for record in records:
+        if record['type'] == 'A':
+            a_records[record['content']].append(record)
+        elif record['type'] == 'PTR':
+            ip = get_ip_from_ptr(record['name'])
+            if ip is not None:
+                ptr_records[ip].append(record)
+
+    for ip in sorted(ips, key=ipaddress.ip_address):
+        hostname = ips[ip]
+        a_names = [record['name'] for record in a_records[ip]]
+        ptr_contents = [record['content'] for record in ptr_records[ip]]
+        if hostname is not None:
+            if not a_names:
+                yield _diff(
+                    MISSING_A_IN_DNSAAS, ip, hostname, [],
+                    fix={'action': CREATE, 'record': {
+                        'name': hostname, 'type': 'A', 'content': ip
+                    }}
+                )
+            else:
+                if a_names != [hostname]:
+                    fix = None
+                    if len(a_records[ip]) == 1:
+                        fix = {
+                            'action': UPDATE,
+                            'pk': a_records[ip][0]['id'],
+                            'record': {
+                                'name': hostname, 'type': 'A', 'content': ip
+                            }
+                        }
+                    yield _diff(WRONG_A, ip, hostname, a_names, fix=fix)
+                if hostname in a_names and hostname not in ptr_contents:
+                    yield _diff(WRONG_PTR, ip, hostname, ptr_contents)
+        elif a_names:
+            yield _diff(MISSING_A_IN_RALPH, ip, hostname, a_names)
+
+        for record in ptr_records[ip]:
+            if record['content'] not in a_names:
+                yield _diff(
+                    ZOMBIE_PTR, ip, hostname, [record['content']],
+                    fix={'action': DELETE, 'pk': record['id']}
+                )
+        if len(ptr_contents) > 1:
+            yield _diff(DUPLICATED_PTR, ip, hostname, ptr_contents)
+
+
+class TextWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, diff):
+        self.stream.write('\t'.join(map(str, [
+            DESCRIPTIONS[diff['kind']], diff['ip'], diff['ralph_hostname'],
+            ', '.join(diff['dns'])
+        ])))
+
+
+class CSVWriter:
+    def __init__(self, stream):
+        self.writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS)
+        self.writer.writeheader()
+
+    def write(self, diff):
+        self.writer.writerow(dict(
+            diff,
+            dns=' '.join(diff['dns']),
+            fix=json.dumps(diff['fix']) if diff['fix'] else ''
+        ))
+
+
+class JSONWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, diff):
+        self.stream.write(json.dumps(diff))
+
+
+WRITERS = {
+    'text': TextWriter,
+    'csv': CSVWriter,
+    'json': JSONWriter,
+}
+
+
 class Command(BaseCommand):
     help = 'Compare DNS records in DNSaaS with state of IP-hostname in Ralph'
 
     # TODO (mkurek): add possibility to exclude some domains
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=list(WRITERS), default='text',
+            help='Format of found inconsistencies',
+        )
+        parser.add_argument(
+            '--incremental', action='store_true', default=False,
+            help='Check only IPs modified in Ralph since the last run',
+        )
+        parser.add_argument(
+            '--state-file', default=settings.DNS_INCONSISTENCIES_STATE_PATH,
+            help='File with time of the last run (used by --incremental)',
+        )
+        parser.add_argument(
+            '--replay', metavar='PATH',
+            help='Apply fixes from file generated with --format=json',
+        )
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.dns = DNSaaS()
+        self.dns = get_dnsaas_client()
 
-    def _fetch_dns_records(self):
+    def _get_ips_queryset(self):
+        return IPAddress.objects.filter(
+            ethernet__base_object__cloudhost__isnull=True,
+        )
+
+    def _iter_ralph_chunks(self, modified_since=None):
+        """
+        Yield chunks (dicts of IP -> hostname) of Ralph IPs, in order of
+        their address.
         """
-        Fetch DNS Records (A and PTR) from DNSaaS.
-
-        Returns two nested dicts, where key on the first level is record type,
-        and key-values on the second level are name-content and content-name
-        respectively.
-
-        Example output:
-        (
-            # regular order: name -> [content]
-            {
-                'A': {
-                    'myserver.mydc.net': ['1.2.3.4', '5.6.7.8'],
-                    'myserver2.mydc.net': ['10.20.30.40']
-                },
-                'PTR': {
-                    '4.3.2.1.in-addr.arpa': ['myserver.mydc.net'],
-                    '8.7.5.6.in-addr.arpa': ['myserver.mydc.net'],
-                    '40.30.20.10.in-addr.arpa': ['myserver2.mydc.net']
-                }
-            },
-            # reversed order: content -> [name]
-            {
-                'A': {
-                    '1.2.3.4': ['myserver.mydc.net'],
-                    '5.6.7.8': ['myserver.mydc.net'],
-                    '10.20.30.40': ['myserver2.mydc.net']
-                },
-                'PTR': {
-                    'myserver.mydc.net': [
-                        '4.3.2.1.in-addr.arpa', '8.7.5.6.in-addr.arpa'
-                    ],
-                    'myserver2.mydc.net': ['40.30.20.10.in-addr.arpa']
-                }
+        queryset = self._get_ips_queryset()
+        if modified_since is None:
+            queryset = queryset.filter(hostname__isnull=False)
+        else:
+            # IPs which hostname was removed are checked too (their A records
+            # should be removed from DNSaaS)
+            queryset = queryset.filter(modified__gte=modified_since)
+        queryset = queryset.order_by('number')
+        chunk_size = settings.DNS_INCONSISTENCIES_CHUNK_SIZE
+        last_number = None
+        while True:
+            chunk_queryset = queryset
+            if last_number is not None:
+                chunk_queryset = chunk_queryset.filter(number__gt=last_number)
+            chunk = list(chunk_queryset.values_list(
+                'number', 'address', 'hostname'
+            )[:chunk_size])
+            if not chunk:
+                return
+            last_number = chunk[-1][0]
+            yield {
+                address: hostname or None for _, address, hostname in chunk
             }
-        )
+
+    def _iter_dnsaas_chunks(self):
+        """
+        Yield chunks of IPs (with A or PTR record in DNSaaS) which are not
+        (checked) in Ralph.
         """
         url = self.dns.build_url(
             'records',
             get_params=[
-                ('limit', 1000),
-                ('offset', 0),
-            ] + [('type', t) for t in {'A', 'PTR'}]
+                ('size', settings.DNS_INCONSISTENCIES_CHUNK_SIZE),
+            ] + [('type', t) for t in ('A', 'PTR')]
         )
-        api_results = self.dns.get_api_result(url)
-        records_by_types = defaultdict(lambda: defaultdict(list))
-        records_by_types_rev = defaultdict(lambda: defaultdict(list))
-        for record in api_results:
-            records_by_types[record['type']][record['name']].append(
-                record['content']
-            )
-            records_by_types_rev[record['type']][record['content']].append(
-                record['name']
-            )
-        return records_by_types, records_by_types_rev
+        # IPs with records on many pages are checked only once
+        checked_ips = set()
+        for page in self.dns.iter_api_pages(url):
+            ips = set()
+            for record in page:
+                if record['type'] == 'A':
+                    ips.add(record['content'])
+                elif record['type'] == 'PTR':
+                    ip = get_ip_from_ptr(record['name'])
+                    if ip is not None:
+                        ips.add(ip)
+            ips -= checked_ips
+            ips_in_ralph = set(self._get_ips_queryset().filter(
+                address__in=ips, hostname__isnull=False
+            ).values_list('address', flat=True))
+            chunk = {ip: None for ip in ips - ips_in_ralph}
+            checked_ips.update(chunk)
+            if chunk:
+                yield chunk
 
-    def _get_ips(self):
-        """
-        Return dict with IP-hostname from Ralph.
-        """
-        ips = IPAddress.objects.filter(
-            ethernet__base_object__cloudhost__isnull=True,
-            hostname__isnull=False
-        ).values_list('address', 'hostname')
-        return dict(ips)
+    def _check_chunk(self, ips):
+        records = self.dns.get_records_by_ips(list(ips))
+        return list(reconcile(ips, records))
 
-    def get_missing_a_records_in_dnsaas(self, ips, dns, dns_rev):
+    def _check_chunks(self, chunks):
         """
-        Return pairs of (ip, hostname) which are present in Ralph, but not in
-        DNSaaS
+        Check chunks in parallel (using up to
+        `DNS_INCONSISTENCIES_CONCURRENCY` threads), keeping only limited
+        number of chunks in memory at once.
         """
-        for ip, hostname in ips.items():
-            if ip not in dns_rev['A']:
-                yield (ip, hostname)
+        workers = settings.DNS_INCONSISTENCIES_CONCURRENCY
+        if workers <= 1:
+            for chunk in chunks:
+                yield from self._check_chunk(chunk)
+            return
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(self._check_chunk, chunk))
+                if len(pending) >= 2 * workers:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
 
-    def get_wrong_a_records_in_dnsaas(self, ips, dns, dns_rev):
-        """
-        Return triplets of (ip, ralph_hostname, dns_hostname) for Records which
-        are both in Ralph and DNSaaS, but are inconsistent
-        """
-        for ip, hostname in ips.items():
-            if ip in dns_rev['A']:
-                dns_hostnames = dns_rev['A'][ip]
-                if hostname not in dns_hostnames or len(dns_hostnames) != 1:
-                    yield (ip, hostname, dns_hostnames)
+    def _read_last_run(self, path):
+        try:
+            with open(path) as f:
+                # naive local time, like timezone.now() (USE_TZ is disabled)
+                return datetime.fromtimestamp(json.load(f)['last_run'])
+        except FileNotFoundError:
+            return None
 
-    def get_missing_a_records_in_ralph(self, ips, dns, dns_rev):
-        """
-        Return pairs of (ip, list of hostnames) for Records (ips) which are
-        present in DNSaaS, but they are not in Ralph.
-        """
-        for ip, hostnames in dns_rev['A'].items():
-            if ip not in ips:
-                yield (ip, hostnames)
+    def _write_last_run(self, path, last_run):
+        tmp_path = '{}.tmp'.format(path)
+        with open(tmp_path, 'w') as f:
+            json.dump({'last_run': last_run.timestamp()}, f)
+        os.replace(tmp_path, path)
 
-    def check_ralph_ptrs(self, ips, dns, dns_rev):
-        """
-        Return pairs of (ip, hostname) which has not properly configured PTR
-        records.
-        """
-        for ip, hostname in ips.items():
-            if ip in dns_rev['A'] and hostname in dns_rev['A'][ip]:
-                ptr = get_ptr(ip)
-                if ptr not in dns['PTR'] or hostname not in dns['PTR'][ptr]:
-                    yield (ip, hostname, dns['PTR'].get(ptr))
+    def find_inconsistencies(self, incremental=False, state_file=None):
+        started = timezone.now()
+        modified_since = None
+        if incremental:
+            modified_since = self._read_last_run(state_file)
+            if modified_since is None:
+                logger.info('No previous run found - checking all IPs')
+        yield from self._check_chunks(
+            self._iter_ralph_chunks(modified_since)
+        )
+        if modified_since is None:
+            yield from self._check_chunks(self._iter_dnsaas_chunks())
+        if state_file:
+            self._write_last_run(state_file, started)
 
-    def get_zombie_ptrs(self, ips, dns, dns_rev):
-        """
-        Return pairs of (ip, hostname) which has not properly configured PTR
-        records.
-        """
-        for hostname, ptrs in dns_rev['PTR'].items():
-            for ptr in ptrs:
-                ip = '.'.join(ptr.split('.')[3::-1])
-                if hostname not in dns['A'] or ip not in dns['A'][hostname]:
-                    yield ptr, hostname
+    def _apply_fix(self, fix, ip):
+        if fix['action'] == DELETE:
+            return self.dns.delete_dns_record(fix['pk'])
+        record = dict(
+            fix['record'],
+            type=RecordType.from_name(fix['record']['type'].lower()).id
+        )
+        if fix['action'] == UPDATE:
+            return self.dns.update_dns_record(dict(record, pk=fix['pk']))
+        ip_address = IPAddress.objects.filter(address=ip).select_related(
+            'ethernet__base_object'
+        ).first()
+        service = None
+        if ip_address and ip_address.ethernet:
+            service = ip_address.ethernet.base_object.service
+        return self.dns.create_dns_record(record, service=service)
 
-    def get_duplicated_ptrs(self, ips, dns, dns_rev):
-        """
-        Return pairs of (ip, hostname) which has not properly configured PTR
-        records.
-        """
-        for ptr, hostnames in dns['PTR'].items():
-            if len(hostnames) > 1:
-                yield ptr, hostnames
+    def replay(self, path):
+        applied = failed = 0
+        with open(path) as f:
+            for line in f:
+                diff = json.loads(line)
+                if not diff.get('fix'):
+                    continue
+                errors = self._apply_fix(diff['fix'], diff['ip'])
+                if errors:
+                    failed += 1
+                    logger.error(
+                        'Could not apply fix %s: %s', diff['fix'], errors
+                    )
+                else:
+                    applied += 1
+        self.stdout.write('Applied fixes: {}, failed: {}'.format(
+            applied, failed
+        ))
 
     def handle(self, **options):
-        dns, dns_rev = self._fetch_dns_records()
-        ips = self._get_ips()
-        for func, headers, description in [
-            (
-                self.get_missing_a_records_in_dnsaas,
-                ['IP', 'hostname'],
-                'A records missing in DNSaaS'
-            ),
-            (
-                self.get_missing_a_records_in_ralph,
-                ['IP', 'hostname'],
-                'A records missing in Ralph'
-            ),
-            (
-                self.get_wrong_a_records_in_dnsaas,
-                ['IP', 'ralph hostname', 'dnsaas hostnames'],
-                'Inconsistent A records'
-            ),
-            (
-                self.check_ralph_ptrs,
-                ['IP', 'ralph hostname', 'PTR content'],
-                'Missing or wrong PTR records'
-            ),
-            (
-                self.get_zombie_ptrs,
-                ['PTR', 'hostname (content)'],
-                'Zombie PTR records'
-            ),
-            (
-                self.get_duplicated_ptrs,
-                ['PTR', 'hostnames'],
-                'Duplicated PTR records'
-            ),
-        ]:
-            result = func(ips, dns, dns_rev)
-            self.stdout.write(TEMPLATE.format(
-                description=description,
-                headers='\t'.join(headers),
-                content='\n'.join(
-                    ['\t'.join(map(str, line)) for line in result]
-                ),
-            ))
+        if options['replay']:
+            try:
+                self.replay(options['replay'])
+            except FileNotFoundError:
+                raise CommandError(
+                    'File {} does not exist'.format(options['replay'])
+                )
+            return
+        writer = WRITERS[options['format']](self.stdout)
+        for diff in self.find_inconsistencies(
+            incremental=options['incremental'],
+            state_file=options['state_file'],
+        ):
+            writer.write(diff)
@@ -1,41 +1,164 @@
 # -*- coding: utf-8 -*-
+"""
+Publishing of DNS TXT records (auto TXT data) of hosts to DNSaaS.
+
+Hosts saved in a transaction are collected (and de-duplicated) and, after
+commit, their TXT data is calculated for all of them at once (with related
+objects prefetched) and published in batched messages. When `USE_CACHE` is
+enabled, hosts which TXT data didn't change since the last publish are
+skipped.
+"""
+import hashlib
+import json
 import logging
+from collections import OrderedDict
 
 import pyhermes
 from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from pyhermes import publish
 
 from ralph.data_center.models.physical import DataCenterAsset
 from ralph.data_center.models.virtual import Cluster
-from ralph.signals import post_commit
+from ralph.networks.models import IPAddress
+from ralph.signals import OnCommitBatch
 from ralph.virtual.models import VirtualServer
 
 logger = logging.getLogger(__name__)
 
+TXT_DATA_HASH_CACHE_KEY_TMPL = 'ralph_dns_txt_data_{}_{}'
+# keep hashes of published data for a week
+TXT_DATA_HASH_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+
+_SERVICE_ENV_RELATED = (
+    'configuration_path__module',
+    'service_env__service',
+    'service_env__environment',
+)
+SELECT_RELATED = {
+    DataCenterAsset: _SERVICE_ENV_RELATED + (
+        'model__category',
+        'model__manufacturer',
+        'rack__server_room__data_center',
+    ),
+    Cluster: _SERVICE_ENV_RELATED + ('type',),
+    VirtualServer: _SERVICE_ENV_RELATED + (
+        'type',
+        'parent__asset__datacenterasset__rack__server_room__data_center',
+    ),
+}
+PREFETCH_RELATED = {
+    Cluster: ('baseobjectcluster_set__base_object',),
+}
 
-def _get_txt_data_to_publish_to_dnsaas(obj):
+
+def _get_txt_data_to_publish_to_dnsaas(obj, ipaddresses=None):
     publish_data = []
-    for data in obj.get_auto_txt_data():
+    for data in obj.get_auto_txt_data(ipaddresses=ipaddresses):
         data['owner'] = settings.DNSAAS_OWNER
         data['target_owner'] = settings.DNSAAS_OWNER
         publish_data.append(data)
     return publish_data
 
 
+def _get_ipaddresses(pks):
+    """
+    Return (non-management) IP addresses of base objects with `pks`.
+    """
+    ipaddresses = {pk: [] for pk in pks}
+    for base_object_id, address in IPAddress.objects.filter(
+        ethernet__base_object__in=pks, is_management=False
+    ).values_list('ethernet__base_object', 'address'):
+        ipaddresses[base_object_id].append(address)
+    return ipaddresses
+
+
+def _get_hash_cache_key(obj):
+    return TXT_DATA_HASH_CACHE_KEY_TMPL.format(obj._meta.label_lower, obj.pk)
+
+
+def _get_hash(publish_data):
+    return hashlib.md5(
+        json.dumps(publish_data, sort_keys=True).encode()
+    ).hexdigest()
+
+
+def _iter_txt_data(model, pks):
+    """
+    Yield pairs of (object, TXT data) for objects of `model` with `pks`
+    (fetched in batches with related objects).
+    """
+    batch_size = settings.DNSAAS_AUTO_TXT_RECORD_BATCH_SIZE
+    queryset = model.objects.select_related(
+        *SELECT_RELATED.get(model, ())
+    ).prefetch_related(*PREFETCH_RELATED.get(model, ()))
+    for start in range(0, len(pks), batch_size):
+        batch_pks = pks[start:start + batch_size]
+        ipaddresses = _get_ipaddresses(batch_pks)
+        for obj in queryset.filter(pk__in=batch_pks):
+            yield obj, _get_txt_data_to_publish_to_dnsaas(
+                obj, ipaddresses=ipaddresses[obj.pk]
+            )
+
+
 @pyhermes.publisher(
     topic=settings.DNSAAS_AUTO_TXT_RECORD_TOPIC_NAME or '',
     # call publish directly to make testing (overriding settings) easier
     auto_publish_result=False,
 )
-def publish_data_to_dnsaaas(obj):
-    if settings.DNSAAS_AUTO_TXT_RECORD_TOPIC_NAME:
-        logger.info('Publishing DNS TXT records update for {}'.format(obj))
-        publish(
-            settings.DNSAAS_AUTO_TXT_RECORD_TOPIC_NAME,
-            _get_txt_data_to_publish_to_dnsaas(obj)
-        )
-
-
-post_commit(publish_data_to_dnsaaas, DataCenterAsset)
-post_commit(publish_data_to_dnsaaas, Cluster)
-post_commit(publish_data_to_dnsaaas, VirtualServer)
+def publish_txt_data_to_dnsaas(objects):
+    """
+    Publish TXT data of `objects` (hosts) in batched messages, skipping
+    objects which data didn't change since the last publish.
+    """
+    if not settings.DNSAAS_AUTO_TXT_RECORD_TOPIC_NAME:
+        return
+    pks_by_model = OrderedDict()
+    for obj in objects:
+        pks_by_model.setdefault(obj._meta.model, []).append(obj.pk)
+    batch_size = settings.DNSAAS_AUTO_TXT_RECORD_BATCH_SIZE
+    message = []
+    message_objects = []
+    hashes = {}
+
+    def _publish():
+        logger.info('Publishing DNS TXT records update for {}'.format(
+            ', '.join(map(str, message_objects))
+        ))
+        publish(settings.DNSAAS_AUTO_TXT_RECORD_TOPIC_NAME, list(message))
+        if settings.USE_CACHE:
+            cache.set_many(hashes, TXT_DATA_HASH_CACHE_TIMEOUT)
+        message.clear()
+        message_objects.clear()
+        hashes.clear()
+
+    for model, pks in pks_by_model.items():
+        for obj, publish_data in _iter_txt_data(model, pks):
+            if settings.USE_CACHE:
+                cache_key = _get_hash_cache_key(obj)
+                data_hash = _get_hash(publish_data)
+                if cache.get(cache_key) == data_hash:
+                    logger.debug('DNS TXT records of %s not changed', obj)
+                    continue
+                hashes[cache_key] = data_hash
+            message.extend(publish_data)
+            message_objects.append(obj)
+            if len(message_objects) >= batch_size:
+                _publish()
+    if message_objects:
+        _publish()
+
+
+# hosts saved in current transaction, which TXT data will be published after
+# commit
+_pending_txt_data = OnCommitBatch(publish_txt_data_to_dnsaas)
+
+
+@receiver(post_save, sender=DataCenterAsset)
+@receiver(post_save, sender=Cluster)
+@receiver(post_save, sender=VirtualServer)
+def publish_txt_data_to_dnsaas_on_commit(sender, instance, **kwargs):
+    # when not in transaction, data is published immediately
+    _pending_txt_data.add(instance, key=(instance._meta.model, instance.pk))
@@ -1,6 +1,12 @@
 # -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+from io import StringIO
 from unittest.mock import patch
 
+from django.core.cache import cache
+from django.core.management import call_command
 from django.db import transaction
 from django.test import override_settings, TestCase, TransactionTestCase
 
@@ -9,8 +15,21 @@ from ralph.assets.tests.factories import (
     EthernetFactory
 )
 from ralph.data_center.models import BaseObjectCluster, DataCenterAsset
-from ralph.dns.dnsaas import DNSaaS
+from ralph.dns import dnsaas
+from ralph.dns.dnsaas import (
+    DNSaaS,
+    get_dnsaas_client,
+    get_session,
+    OAUTH_TOKEN_CACHE_KEY
+)
+from ralph.dns.dnsaas_stub import DNSaaSStubServer
 from ralph.dns.forms import DNSRecordForm, RecordType
+from ralph.dns.management.commands.dns_find_inconsistencies import (
+    Command as FindInconsistenciesCommand,
+    get_ip_from_ptr,
+    get_ptr,
+    reconcile
+)
 from ralph.dns.publishers import _get_txt_data_to_publish_to_dnsaas
 from ralph.dns.views import (
     add_errors,
@@ -92,6 +111,201 @@ class TestGetDnsRecords(TestCase):
         )
 
 
+class TestDNSaaSClient(TestCase):
+    def setUp(self):
+        cache.delete(OAUTH_TOKEN_CACHE_KEY)
+        self.server = DNSaaSStubServer(page_size=3).start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(
+            DNSAAS_URL=self.server.url,
+            OAUTH_TOKEN_URL=self.server.token_url,
+            DNSAAS_IPS_BATCH_SIZE=2,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        env_patcher = patch.dict(os.environ, OAUTHLIB_INSECURE_TRANSPORT='1')
+        env_patcher.start()
+        self.addCleanup(env_patcher.stop)
+        self.ips = ['10.0.0.{}'.format(i) for i in range(1, 6)]
+
+    def test_token_is_shared_between_clients(self):
+        DNSaaS().get_dns_records(self.ips[:1])
+        DNSaaS().get_dns_records(self.ips[:1])
+        self.assertEqual(self.server.token_requests, 1)
+
+    def test_token_is_renewed_when_unauthorized(self):
+        dnsaas = DNSaaS()
+        dnsaas.get_dns_records(self.ips[:1])
+        self.server.revoke_tokens()
+        self.assertEqual(len(dnsaas.get_dns_records(self.ips[:1])), 1)
+        self.assertEqual(self.server.token_requests, 2)
+
+    def test_get_api_result_fetches_all_pages(self):
+        url = DNSaaS.build_url(
+            'records', get_params=[('ip', ip) for ip in self.ips]
+        )
+        records = DNSaaS().get_api_result(url)
+        self.assertEqual(len(records), 10)
+        self.assertEqual(len({record['id'] for record in records}), 10)
+
+    def test_get_dns_records_in_batches(self):
+        records = DNSaaS().get_dns_records(self.ips)
+        self.assertCountEqual(
+            [record['content'] for record in records], self.ips
+        )
+        self.assertTrue(all(record['ptr'] for record in records))
+
+    @override_settings(DNSAAS_CONCURRENCY=1)
+    def test_connections_are_reused(self):
+        dnsaas = DNSaaS()
+        dnsaas.get_dns_records(self.ips[:1])
+        connections = self.server.connections
+        dnsaas.get_dns_records(self.ips)
+        DNSaaS().get_dns_records(self.ips)
+        self.assertGreater(self.server.requests, 4)
+        self.assertEqual(self.server.connections, connections)
+
+    def test_get_dnsaas_client_returns_shared_client(self):
+        for attr in ('_client', '_session'):
+            patcher = patch.object(dnsaas, attr, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        client = get_dnsaas_client()
+        self.assertIs(get_dnsaas_client(), client)
+        self.assertIs(client.session, get_session())
+        self.assertEqual(len(client.get_dns_records(self.ips[:1])), 1)
+
+
+def _a(id, name, ip):
+    return {'id': id, 'type': 'A', 'name': name, 'content': ip}
+
+
+def _ptr(id, ip, name):
+    return {'id': id, 'type': 'PTR', 'name': get_ptr(ip), 'content': name}
+
+
+class TestReconcile(TestCase):
+    def _kinds(self, diffs):
+        return [(diff['kind'], diff['ip']) for diff in diffs]
+
+    def test_get_ip_from_ptr(self):
+        for ip in ('10.20.30.40', '2001:db8::1'):
+            self.assertEqual(get_ip_from_ptr(get_ptr(ip)), ip)
+        self.assertIsNone(get_ip_from_ptr('example.com'))
+
+    def test_consistent_records(self):
+        diffs = reconcile({'10.0.0.1': 'a.local'}, [
+            _a(1, 'a.local', '10.0.0.1'), _ptr(2, '10.0.0.1', 'a.local')
+        ])
+        self.assertEqual(list(diffs), [])
+
+    def test_missing_a_record_in_dnsaas(self):
+        diffs = list(reconcile({'10.0.0.1': 'a.local'}, []))
+        self.assertEqual(self._kinds(diffs), [
+            ('missing_a_in_dnsaas', '10.0.0.1')
+        ])
+        self.assertEqual(diffs[0]['fix'], {'action': 'create', 'record': {
+            'name': 'a.local', 'type': 'A', 'content': '10.0.0.1'
+        }})
+
+    def test_wrong_a_record(self):
+        diffs = list(reconcile({'10.0.0.1': 'a.local'}, [
+            _a(1, 'b.local', '10.0.0.1'), _ptr(2, '10.0.0.1', 'b.local')
+        ]))
+        self.assertEqual(self._kinds(diffs), [('wrong_a', '10.0.0.1')])
+        self.assertEqual(diffs[0]['fix']['action'], 'update')
+        self.assertEqual(diffs[0]['fix']['pk'], 1)
+
+    def test_missing_ptr_and_missing_a_in_ralph(self):
+        diffs = reconcile({'10.0.0.1': 'a.local', '10.0.0.2': None}, [
+            _a(1, 'a.local', '10.0.0.1'), _a(2, 'b.local', '10.0.0.2')
+        ])
+        self.assertEqual(self._kinds(diffs), [
+            ('wrong_ptr', '10.0.0.1'), ('missing_a_in_ralph', '10.0.0.2')
+        ])
+
+    def test_zombie_and_duplicated_ptrs(self):
+        diffs = list(reconcile({'10.0.0.1': 'a.local'}, [
+            _a(1, 'a.local', '10.0.0.1'),
+            _ptr(2, '10.0.0.1', 'a.local'),
+            _ptr(3, '10.0.0.1', 'old.local'),
+        ]))
+        self.assertEqual(self._kinds(diffs), [
+            ('zombie_ptr', '10.0.0.1'), ('duplicated_ptr', '10.0.0.1')
+        ])
+        self.assertEqual(diffs[0]['fix'], {'action': 'delete', 'pk': 3})
+
+
+@override_settings(DNS_INCONSISTENCIES_CHUNK_SIZE=2)
+class TestFindInconsistenciesCommand(TestCase):
+    def setUp(self):
+        self.ips = [
+            IPAddressFactory(address='10.0.0.{}'.format(i), hostname=hostname)
+            for i, hostname in enumerate(['a.local', 'b.local', 'c.local'])
+        ]
+        self.records = [
+            _a(1, 'a.local', '10.0.0.0'),
+            _ptr(2, '10.0.0.0', 'a.local'),
+            _a(3, 'b.local', '10.0.0.1'),
+            _a(4, 'x.local', '10.0.0.9'),
+        ]
+        patchers = [
+            patch.object(
+                DNSaaS, 'get_records_by_ips', side_effect=self._get_records
+            ),
+            patch.object(
+                DNSaaS, 'iter_api_pages', return_value=[self.records]
+            ),
+        ]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+        self.get_records_mock = patchers[0].start()
+        patchers[1].start()
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            self.state_file = f.name
+        os.remove(self.state_file)
+        self.addCleanup(
+            lambda: os.path.exists(self.state_file) and
+            os.remove(self.state_file)
+        )
+
+    def _get_records(self, ips):
+        return [
+            record for record in self.records
+            if record['content'] in ips or
+            get_ip_from_ptr(record['name']) in ips
+        ]
+
+    def _call(self, *args):
+        out = StringIO()
+        # ralph.dns is not in INSTALLED_APPS, so command is passed directly
+        call_command(
+            FindInconsistenciesCommand(), '--format=json',
+            '--state-file={}'.format(self.state_file), *args, stdout=out
+        )
+        return [
+            (diff['kind'], diff['ip'])
+            for diff in map(json.loads, out.getvalue().splitlines())
+        ]
+
+    def test_find_inconsistencies(self):
+        self.assertEqual(self._call(), [
+            ('wrong_ptr', '10.0.0.1'),
+            ('missing_a_in_dnsaas', '10.0.0.2'),
+            ('missing_a_in_ralph', '10.0.0.9'),
+        ])
+
+    def test_incremental_mode_checks_only_modified_ips(self):
+        self._call()
+        self.ips[2].hostname = 'd.local'
+        self.ips[2].save()
+        self.get_records_mock.reset_mock()
+        self.assertEqual(self._call('--incremental'), [
+            ('missing_a_in_dnsaas', '10.0.0.2'),
+        ])
+        self.get_records_mock.assert_called_once_with(['10.0.0.2'])
+
+
 class TestDNSView(TestCase):
     @override_settings(ENABLE_DNSAAS_INTEGRATION=False)
     def test_dnsaasintegration_disabled(self):
@@ -99,7 +313,7 @@ class TestDNSView(TestCase):
             DNSView()
 
     @override_settings(ENABLE_DNSAAS_INTEGRATION=True)
-    @patch('ralph.dns.views.DNSaaS._get_oauth_token')
+    @patch('ralph.dns.dnsaas.DNSaaS._get_oauth_token')
     def test_dnsaasintegration_enabled(self, _get_oauth_token_mock):
         # should not raise exception
         _get_oauth_token_mock.return_value = 'token'
@@ -457,14 +671,12 @@ class TestGetTXTDataToPublishToDNSaaS(TestCase):
 
 class TestPublishAutoTXTToDNSaaS(TransactionTestCase):
 
-    @classmethod
-    def setUpClass(cls):
+    def setUp(self):
         from ralph.data_center.tests.factories import (
             DataCenterAssetFactory,
             RackFactory,
         )
-        super().setUpClass()
-        cls.dc_asset = DataCenterAssetFactory(
+        self.dc_asset = DataCenterAssetFactory(
             hostname='ralph0.allegro.pl',
             service_env__service__name='service',
             service_env__environment__name='test',
@@ -481,13 +693,13 @@ class TestPublishAutoTXTToDNSaaS(TransactionTestCase):
             configuration_path__class_name='www',
             configuration_path__module__name='ralph',
         )
-        cls.dc_ip = IPAddressFactory(
-            base_object=cls.dc_asset,
-            ethernet=EthernetFactory(base_object=cls.dc_asset),
+        self.dc_ip = IPAddressFactory(
+            base_object=self.dc_asset,
+            ethernet=EthernetFactory(base_object=self.dc_asset),
         )
         IPAddressFactory(
-            base_object=cls.dc_asset,
-            ethernet=EthernetFactory(base_object=cls.dc_asset),
+            base_object=self.dc_asset,
+            ethernet=EthernetFactory(base_object=self.dc_asset),
             is_management=True,
         )
 
@@ -547,6 +759,66 @@ class TestPublishAutoTXTToDNSaaS(TransactionTestCase):
             }
         ])
 
+    @override_settings(
+        DNSAAS_AUTO_TXT_RECORD_TOPIC_NAME='dnsaas_auto_txt_record',
+        DNSAAS_AUTO_TXT_RECORD_BATCH_SIZE=2,
+    )
+    @patch('ralph.dns.publishers.publish')
+    def test_publishing_is_coalesced_per_transaction(self, publish_mock):
+        from ralph.data_center.tests.factories import DataCenterAssetFactory
+        dc_assets = [
+            DataCenterAsset.objects.get(pk=self.dc_asset.pk)
+        ] + DataCenterAssetFactory.create_batch(2)
+        publish_mock.reset_mock()
+        with transaction.atomic():
+            for dc_asset in dc_assets + dc_assets:
+                dc_asset.save()
+            self.assertEqual(publish_mock.call_count, 0)
+
+        # 3 assets published in batches of 2
+        self.assertEqual(publish_mock.call_count, 2)
+        published_ips = [
+            data['ips'] for call in publish_mock.call_args_list
+            for data in call[0][1]
+        ]
+        self.assertIn([self.dc_ip.address], published_ips)
+
+    @override_settings(
+        DNSAAS_AUTO_TXT_RECORD_TOPIC_NAME='dnsaas_auto_txt_record',
+        USE_CACHE=True,
+    )
+    @patch('ralph.dns.publishers.publish')
+    def test_not_changed_data_is_not_published_again(self, publish_mock):
+        cache.clear()
+        dc_asset = DataCenterAsset.objects.get(pk=self.dc_asset.pk)
+        with transaction.atomic():
+            dc_asset.save()
+        with transaction.atomic():
+            dc_asset.save()
+        self.assertEqual(publish_mock.call_count, 1)
+
+        dc_asset.position = 2
+        with transaction.atomic():
+            dc_asset.save()
+        self.assertEqual(publish_mock.call_count, 2)
+
+    @override_settings(
+        DNSAAS_AUTO_TXT_RECORD_TOPIC_NAME='dnsaas_auto_txt_record'
+    )
+    @patch('ralph.dns.publishers.publish')
+    def test_nothing_is_published_after_rollback(self, publish_mock):
+        dc_asset = DataCenterAsset.objects.get(pk=self.dc_asset.pk)
+        try:
+            with transaction.atomic():
+                dc_asset.save()
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertEqual(publish_mock.call_count, 0)
+        with transaction.atomic():
+            dc_asset.save()
+        self.assertEqual(publish_mock.call_count, 1)
+
 
 class TestDNSForm(TestCase):
     def test_unknown_field_goes_to_non_field_errors(self):
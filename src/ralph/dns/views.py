@@ -8,7 +8,7 @@ from django.http import HttpResponseRedirect
 from django.utils.translation import ugettext_lazy as _
 
 from ralph.admin.views.extra import RalphDetailView
-from ralph.dns.dnsaas import DNSaaS
+from ralph.dns.dnsaas import get_dnsaas_client
 from ralph.dns.forms import DNSRecordForm, RecordType
 
 logger = logging.getLogger(__name__)
@@ -53,7 +53,7 @@ class DNSView(RalphDetailView):
     def __init__(self, *args, **kwargs):
         if not settings.ENABLE_DNSAAS_INTEGRATION:
             raise DNSaaSIntegrationNotEnabledError()
-        self.dnsaas = DNSaaS()
+        self.dnsaas = get_dnsaas_client()
         return super().__init__(*args, **kwargs)
 
     def get_forms(self):
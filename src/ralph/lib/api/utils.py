@@ -5,7 +5,7 @@ from django.urls import NoReverseMatch
 from django.utils.encoding import force_text
 from rest_framework.metadata import SimpleMetadata
 from rest_framework.relations import ManyRelatedField, RelatedField
-from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.reverse import reverse
 
 logger = logging.getLogger(__name__)
@@ -113,6 +113,30 @@ class NoFiltersBrowsableAPIRenderer(BrowsableAPIRenderer):
         return None
 
 
+class NDJSONRenderer(JSONRenderer):
+    """
+    Newline delimited JSON - every item of the list is rendered in separate
+    line (single JSON object in other cases).
+
+    List views of Ralph API viewsets stream whole (filtered) queryset using
+    this renderer (see `RalphAPIViewSetMixin.list`).
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render_lines(self, items, renderer_context=None):
+        for item in items:
+            yield super().render(item, renderer_context=renderer_context)
+            yield b'\n'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, list):
+            data = [data]
+        return b''.join(self.render_lines(data, renderer_context))
+
+
 class OnlyRawBrowsableAPIRenderer(NoFiltersBrowsableAPIRenderer):
     """For some views HTML form loads many objects and it's really slow."""
     def render_form_for_serializer(self, serializer):
@@ -1,8 +1,50 @@
+import time
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
 from ralph.lib.cache.django_connection_pool_redis_cache import (
     DjangoConnectionPoolCache,
 )
 
 
+def is_shared_cache(alias='default'):
+    """
+    Return True if cache `alias` is shared between processes (ex. Redis),
+    False if it's local to the current process (or dummy).
+    """
+    return not isinstance(caches[alias], (DummyCache, LocMemCache))
+
+
+def get_cache_generation(key):
+    """
+    Return current value of generation counter kept in Django cache under
+    `key`.
+
+    Counter starts from current time (in milliseconds), so generations used
+    before cache was flushed (or counter was evicted) are not reused.
+    """
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, int(time.time() * 1000), None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_cache_generation(key):
+    """
+    Increment generation counter kept in Django cache under `key`.
+    """
+    try:
+        cache.incr(key)
+    except ValueError:
+        get_cache_generation(key)
+
+
 __all__ = [
-    'DjangoConnectionPoolCache'
+    'bump_cache_generation',
+    'DjangoConnectionPoolCache',
+    'get_cache_generation',
+    'is_shared_cache',
 ]
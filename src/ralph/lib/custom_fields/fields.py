@@ -1,6 +1,6 @@
 import operator
 from collections import defaultdict
-from functools import reduce
+from functools import lru_cache, reduce
 from typing import Any
 
 from django.contrib.contenttypes.fields import (
@@ -10,6 +10,7 @@ from django.contrib.contenttypes.fields import (
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.db.models.fields.related import OneToOneRel
+from django.utils.functional import cached_property
 
 from ralph.admin.helpers import get_field_by_relation_path, getattr_dunder
 
@@ -59,20 +60,125 @@ class CustomFieldsWithInheritanceRelation(GenericRelation):
         )
 
 
-def _get_content_type_from_field_path(model, field_path):
-    # TODO: add some validator for it
-    # TODO: store fields in some field in meta, not "calculate"
-    # it every time
+@lru_cache(maxsize=None)
+def _get_related_model_from_field_path(model, field_path):
     field = get_field_by_relation_path(model, field_path)
     if isinstance(field, OneToOneRel):
-        related_model = field.related_model
-    else:
-        related_model = field.remote_field.model
-    content_type = ContentType.objects.get_for_model(related_model)
-    return content_type
+        return field.related_model
+    return field.remote_field.model
+
+
+def _get_content_type_from_field_path(model, field_path):
+    # TODO: add some validator for it
+    if not isinstance(model, type):
+        model = type(model)
+    return ContentType.objects.get_for_model(
+        _get_related_model_from_field_path(model, field_path)
+    )
+
+
+def _get_local_attname(model, field_path):
+    """
+    Return attname of (concrete) foreign key of the model if `field_path`
+    points directly to it (then id of related object is already known without
+    fetching it).
+    """
+    if '__' in field_path:
+        return None
+    field = model._meta.get_field(field_path)
+    if field.concrete and (field.many_to_one or field.one_to_one):
+        return field.attname
+    return None
+
 
+def _get_cached_related_pk(instance, field_path):
+    """
+    Return pk of object pointed by `field_path` using only relations already
+    cached on the instance (ex. by `select_related`).
 
-def _prioritize_custom_field_values(objects, model, content_type):
+    Raise `KeyError` if any relation on the path is not cached.
+    """
+    obj = instance
+    *path, last = field_path.split('__')
+    for field_name in path:
+        obj = obj._meta.get_field(field_name).get_cached_value(obj)
+        if obj is None:
+            return None
+    field = obj._meta.get_field(last)
+    if field.concrete and (field.many_to_one or field.one_to_one):
+        return getattr(obj, field.attname)
+    related = field.get_cached_value(obj)
+    return related.pk if related else None
+
+
+def _get_inheritance_objects_ids(model, instances):
+    """
+    Return mapping from pk of every instance to set of
+    `(content type id, object id)` of objects from which instance inherits
+    custom fields values (including instance itself).
+
+    Ids of objects pointed by nested (or reverse) fields from
+    `custom_fields_inheritance` are taken from relations already selected with
+    instances - if they are not, they are fetched for all remaining instances
+    using single query.
+    """
+    content_type = ContentType.objects.get_for_model(model)
+    result = defaultdict(set)
+    for instance in instances:
+        result[instance.pk].add((content_type.pk, instance.pk))
+    local_paths = []
+    remote_paths = []
+    for field_path in model.custom_fields_inheritance:
+        content_type_id = _get_content_type_from_field_path(
+            model, field_path
+        ).pk
+        attname = _get_local_attname(model, field_path)
+        if attname:
+            local_paths.append((content_type_id, attname))
+        else:
+            remote_paths.append((content_type_id, field_path))
+
+    not_cached = []
+    for instance in instances:
+        for content_type_id, attname in local_paths:
+            value = getattr(instance, attname)
+            if value:
+                result[instance.pk].add((content_type_id, value))
+        try:
+            values = [
+                _get_cached_related_pk(instance, field_path)
+                for _, field_path in remote_paths
+            ]
+        except KeyError:
+            not_cached.append(instance.pk)
+            continue
+        for (content_type_id, _), value in zip(remote_paths, values):
+            if value:
+                result[instance.pk].add((content_type_id, value))
+    if not_cached:
+        rows = model._base_manager.filter(
+            pk__in=not_cached
+        ).values_list('pk', *[field_path for _, field_path in remote_paths])
+        for pk, *values in rows:
+            for (content_type_id, _), value in zip(remote_paths, values):
+                if value:
+                    result[pk].add((content_type_id, value))
+    return result
+
+
+def _get_content_types_priority(model, content_type):
+    ct_priority = [content_type.id]
+    for field_path in model.custom_fields_inheritance:
+        content_type = _get_content_type_from_field_path(model, field_path)
+        ct_priority.append(content_type.id)
+    return {
+        ct_id: index for (index, ct_id) in enumerate(ct_priority)
+    }
+
+
+def _prioritize_custom_field_values(
+    objects, model, content_type, ct_priority=None
+):
     """
     Sort custom field values by priorities and leave the ones with
     biggest priority for each custom field type.
@@ -84,13 +190,8 @@ def _prioritize_custom_field_values(objects, model, content_type):
       `custom_fields_inheritance` list, then second from this list and
       so on
     """
-    ct_priority = [content_type.id]
-    for field_path in model.custom_fields_inheritance:
-        content_type = _get_content_type_from_field_path(model, field_path)
-        ct_priority.append(content_type.id)
-    ct_priority = {
-        ct_id: index for (index, ct_id) in enumerate(ct_priority)
-    }
+    if ct_priority is None:
+        ct_priority = _get_content_types_priority(model, content_type)
     custom_fields_seen = set()
     for cfv in sorted(
         objects, key=lambda cfv: ct_priority[cfv.content_type_id]
@@ -170,19 +271,17 @@ class ReverseGenericRelatedObjectsWithInheritanceDescriptor:
         """
         if instance is None:
             return self
+        return self.related_manager_cls(instance=instance)
+
+    @cached_property
+    def related_manager_cls(self):
         rel_model = RelModel(model=self.field.remote_field.model, field=self.field)
         # difference here comparing to Django!
         superclass = rel_model.model.inherited_objects.__class__
-        RelatedManager = create_generic_related_manager_with_inheritance(
+        return create_generic_related_manager_with_inheritance(
             superclass, rel_model
         )
 
-        manager = RelatedManager(
-            instance=instance,
-        )
-
-        return manager
-
 
 def create_generic_related_manager_with_inheritance(superclass, rel):  # noqa: C901
     """
@@ -203,48 +302,55 @@ def create_generic_related_manager_with_inheritance(superclass, rel):  # noqa: C
             # don't use filters for single content type and single object id,
             # like in Django's GenericRelatedObject
             self.core_filters = {}
+
+        @cached_property
+        def inheritance_filters(self):
             # construct inheritance filters based on
             # `custom_fields_inheritance` defined on model
-            self.inheritance_filters = [
-                self._get_inheritance_filters_for_single_instance()
-            ]
+            return [self._get_inheritance_filters_for_single_instance()]
 
         def _get_inheritance_filters_for_single_instance(self):
             """
             Return queryset filter for CustomFieldValue with inheritance for
             single instance.
-
-            Final format of queryset will look similar to:
-            (Q(content_type_id=X) & Q(object_id=Y)) | (Q(content_type_id=A) & Q(object_id=B)) | ...  # noqa
             """
-            inheritance_filters = [
-                # custom field of instance
-                models.Q(**{
-                    self.content_type_field_name: self.content_type.id
-                }) &
-                # object id of instance
-                models.Q(**{
-                    self.object_id_field_name: self.instance.id
-                })
-            ]
+            # custom field of instance
+            objects_ids = [(self.content_type.id, self.instance.id)]
             # for each related field (foreign key), add it's content_type
             # and object_id to queryset filter
             for field_path in self.instance.custom_fields_inheritance:
                 content_type = _get_content_type_from_field_path(
                     self.instance, field_path
                 )
-                value = getattr_dunder(self.instance, field_path)
+                # don't fetch related object if it's id is already known
+                attname = _get_local_attname(type(self.instance), field_path)
+                if attname:
+                    value = getattr(self.instance, attname)
+                else:
+                    value = getattr_dunder(self.instance, field_path)
+                    value = value.pk if value else None
                 # filter only if related field has some value
                 if value:
-                    inheritance_filters.append(
-                        models.Q(**{
-                            self.content_type_field_name: content_type.id
-                        }) &
-                        models.Q(**{
-                            self.object_id_field_name: value.pk
-                        })
-                    )
-            return reduce(operator.or_, inheritance_filters)
+                    objects_ids.append((content_type.id, value))
+            return self._get_inheritance_filters(objects_ids)
+
+        def _get_inheritance_filters(self, objects_ids):
+            """
+            Return queryset filter for CustomFieldValue of objects with
+            `objects_ids` (pairs of content type id and object id).
+
+            Final format of queryset will look similar to:
+            (Q(content_type_id=X) & Q(object_id=Y)) | (Q(content_type_id=A) & Q(object_id=B)) | ...  # noqa
+            """
+            return reduce(operator.or_, [
+                models.Q(**{
+                    self.content_type_field_name: content_type_id
+                }) &
+                models.Q(**{
+                    self.object_id_field_name: object_id
+                })
+                for content_type_id, object_id in objects_ids
+            ])
 
         def get_queryset(self):
             try:
@@ -272,38 +378,20 @@ def create_generic_related_manager_with_inheritance(superclass, rel):  # noqa: C
 
             queryset._add_hints(instance=instances[0])
             queryset = queryset.using(queryset._db or self._db)
-            content_type = ContentType.objects.get_for_model(
-                instances[0]
+            # mapping from instance id to content_type and object id of
+            # dependent fields for inheritance (fetched with single query for
+            # all instances and all inheritance levels)
+            instances_cfs = _get_inheritance_objects_ids(
+                type(self.instance), instances
             )
-            # store possible content types of CustomFieldValue
-            content_types = set([content_type])
-            # store possible values of object id
+            # store possible content types and object ids of
+            # CustomFieldValue
+            content_types = set()
             objects_ids = set()
-            # mapping from instance id to content_type and object id of
-            # dependent fields for inheritance
-            instances_cfs = defaultdict(set)
-            # process every instance (no inheritance here right now)
-            for instance in instances:
-                objects_ids.add(instance.pk)
-                instances_cfs[instance.pk].add((content_type.pk, instance.pk))
-            # process each dependent field from `custom_fields_inheritance`
-            for field_path in self.instance.custom_fields_inheritance:
-                # assume that field is foreign key
-                content_type = _get_content_type_from_field_path(
-                    self.instance, field_path
-                )
-                content_types.add(content_type)
-                # for each instance, get value of this dependent field
-                for instance in instances:
-                    value = getattr_dunder(instance, field_path)
-                    if value:
-                        objects_ids.add(value.pk)
-                        # store mapping from instance to content type and value
-                        # of dependent field to know, which CustomFieldValue
-                        # assign later to instance
-                        instances_cfs[instance.pk].add(
-                            (content_type.pk, value.pk)
-                        )
+            for instance_cfs in instances_cfs.values():
+                for content_type_id, object_id in instance_cfs:
+                    content_types.add(content_type_id)
+                    objects_ids.add(object_id)
 
             # filter by possible content types and objects ids
             # notice that thus this filter is not perfect (filter separately
@@ -336,6 +424,9 @@ def create_generic_related_manager_with_inheritance(superclass, rel):  # noqa: C
                     rel_obj
                 )
 
+            ct_priority = _get_content_types_priority(
+                type(self.instance), self.content_type
+            )
             # for each instance reconstruct it's CustomFieldValues
             # using `instances_cfs` mapping (from instance pk to content_type
             # and object_id of possible CustomFieldValue)
@@ -355,12 +446,24 @@ def create_generic_related_manager_with_inheritance(superclass, rel):  # noqa: C
                         pass
                 vals = [
                     v[1] for v in _prioritize_custom_field_values(
-                        vals, self.instance, self.content_type
+                        vals, self.instance, self.content_type, ct_priority
                     )
                 ]
 
-                # store `CustomFieldValue`s of instance in cache
-                instance_custom_fields_queryset = obj.custom_fields.all()
+                # store `CustomFieldValue`s of instance in cache (inheritance
+                # filters of instance are built from already fetched ids, so
+                # chained querysets, ex. `obj.custom_fields.filter(...)`, are
+                # still restricted to values of this instance)
+                obj._prefetched_objects_cache.pop(
+                    self.prefetch_cache_name, None
+                )
+                instance_manager = obj.custom_fields
+                instance_manager.inheritance_filters = [
+                    self._get_inheritance_filters(instances_cfs[obj.pk])
+                ]
+                instance_custom_fields_queryset = (
+                    instance_manager.get_queryset()
+                )
                 instance_custom_fields_queryset._result_cache = vals
                 instance_custom_fields_queryset._prefetch_done = True
                 obj._prefetched_objects_cache[
@@ -1,18 +1,28 @@
 import logging
+
 import six
 
 from dj.choices import Choices
 from django import forms
+from django.conf import settings
 from django.contrib.auth.models import Group
 from django.contrib.contenttypes import fields
 
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.db.models.fields.related import lazy_related_operation
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.text import capfirst, slugify
 from django.utils.translation import ugettext_lazy as _
 
+from ralph.lib.cache import (
+    bump_cache_generation,
+    get_cache_generation,
+    is_shared_cache
+)
 from ralph.lib.mixins.models import AdminAbsoluteUrlMixin, TimeStampMixin
 from .fields import (
     CustomFieldsWithInheritanceRelation,
@@ -22,6 +32,7 @@ from .fields import (
 logger = logging.getLogger(__name__)
 
 CUSTOM_FIELD_VALUE_MAX_LENGTH = 1000
+GENERATION_CACHE_KEY = 'ralph_custom_fields_generation'
 
 STRING_CHOICE = Choices.Choice('string').extra(
     form_field=forms.CharField,
@@ -206,6 +217,14 @@ class CustomFieldMeta(models.base.ModelBase):
 def add_custom_field_inheritance(field_path, model, cls):
     model._meta.custom_fields_inheritance_by_model[cls] = field_path
     cls._meta.custom_fields_inheritance_by_path[field_path] = cls
+    # values inherited from model depend on its (related) fields
+    for signal in (post_save, post_delete):
+        signal.connect(
+            bump_custom_fields_generation, sender=model,
+            dispatch_uid='bump_custom_fields_generation_{}'.format(
+                model._meta.label
+            )
+        )
 
 
 class WithCustomFieldsMixin(models.Model, metaclass=CustomFieldMeta):
@@ -220,10 +239,35 @@ class WithCustomFieldsMixin(models.Model, metaclass=CustomFieldMeta):
 
     @property
     def custom_fields_as_dict(self):
-        return {
-            cfv.custom_field.name: cfv.value
-            for cfv in self.custom_fields.select_related('custom_field')
-        }
+        if not _use_cache():
+            return self._get_custom_fields_as_dict()
+        key = 'ralph_custom_fields_{}_{}_{}_{}'.format(
+            get_custom_fields_generation(),
+            ContentType.objects.get_for_model(self).pk,
+            self.pk,
+            # inherited values depend on (related) fields of the object
+            self._get_modified_timestamp(),
+        )
+        result = cache.get(key)
+        if result is None:
+            result = self._get_custom_fields_as_dict()
+            cache.set(key, result, settings.CUSTOM_FIELDS_CACHE_TIMEOUT)
+        return result
+
+    def _get_modified_timestamp(self):
+        modified = getattr(self, 'modified', None)
+        return int(modified.timestamp() * 1000000) if modified else None
+
+    def _get_custom_fields_as_dict(self):
+        custom_fields = self.custom_fields
+        if custom_fields.prefetch_cache_name in getattr(
+            self, '_prefetched_objects_cache', {}
+        ):
+            # use prefetched values (`select_related` would fetch them again)
+            values = custom_fields.all()
+        else:
+            values = custom_fields.select_related('custom_field')
+        return {cfv.custom_field.name: cfv.value for cfv in values}
 
     @property
     def custom_fields_configuration_variables(self):
@@ -260,3 +304,37 @@ class WithCustomFieldsMixin(models.Model, metaclass=CustomFieldMeta):
                 model, field_path
             )
             custom_fields_values_to_delete.delete()
+
+
+def _use_cache():
+    """
+    Custom fields values are cached only in cache shared between processes
+    (otherwise bumped generation wouldn't be visible in other processes).
+    """
+    return settings.CUSTOM_FIELDS_CACHE_ENABLED and is_shared_cache()
+
+
+def get_custom_fields_generation():
+    """
+    Return current generation of custom fields values.
+    """
+    return get_cache_generation(GENERATION_CACHE_KEY)
+
+
+def _bump_custom_fields_generation():
+    bump_cache_generation(GENERATION_CACHE_KEY)
+
+
+@receiver(post_save, sender=CustomField)
+@receiver(post_delete, sender=CustomField)
+@receiver(post_save, sender=CustomFieldValue)
+@receiver(post_delete, sender=CustomFieldValue)
+def bump_custom_fields_generation(sender, **kwargs):
+    """
+    Bump generation of custom fields values (immediately and once again
+    after commit of current transaction).
+    """
+    if not _use_cache():
+        return
+    _bump_custom_fields_generation()
+    transaction.on_commit(_bump_custom_fields_generation)
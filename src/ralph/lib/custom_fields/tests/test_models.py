@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
+from unittest.mock import patch
+
 from django import forms
-from django.test import TestCase
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import override_settings, TestCase
 
 from ..models import CustomField, CustomFieldTypes, CustomFieldValue
 from .admin import SomeModelAdmin
@@ -181,3 +185,103 @@ class CustomFieldInheritanceModelsTestCase(TestCase):
         self.a1.clear_children_custom_field_value(self.custom_field_str2)
         self.assertIn(self.cfv3, self.sm1.custom_fields.all())
         self.assertNotIn(cfv4, self.sm1.custom_fields.all())
+
+    def test_prefetch_with_inheritance_runs_constant_number_of_queries(self):
+        for i in range(5):
+            a = ModelA.objects.create()
+            CustomFieldValue.objects.create(
+                object=a, custom_field=self.custom_field_str, value=str(i)
+            )
+            SomeModel.objects.create(
+                name='sm{}'.format(i), b=ModelB.objects.create(a=a)
+            )
+        # warm up content types cache
+        for model in (ModelA, ModelB, SomeModel):
+            ContentType.objects.get_for_model(model)
+        with self.assertNumQueries(3):
+            # queries:
+            # select SomeModel
+            # select ids of objects from nested inheritance paths (b__a)
+            # select CustomFieldValue (with CustomField)
+            objects = list(
+                SomeModel.objects.prefetch_related('custom_fields')
+            )
+            result = {obj.name: obj.custom_fields_as_dict for obj in objects}
+        self.assertEqual(result['abc'], {
+            'test str': 'sample_value', 'test str 2': 'sample_value2'
+        })
+        self.assertEqual(result['def'], {'test str 2': 'qwerty'})
+        self.assertEqual(result['sm3'], {'test str': '3'})
+
+    def test_prefetch_with_inheritance_uses_selected_relations(self):
+        for model in (ModelA, ModelB, SomeModel):
+            ContentType.objects.get_for_model(model)
+        with self.assertNumQueries(2):
+            # queries:
+            # select SomeModel (with ModelB)
+            # select CustomFieldValue (with CustomField)
+            objects = list(
+                SomeModel.objects.select_related('b').prefetch_related(
+                    'custom_fields'
+                )
+            )
+            result = {obj.name: obj.custom_fields_as_dict for obj in objects}
+        self.assertEqual(result['abc'], {
+            'test str': 'sample_value', 'test str 2': 'sample_value2'
+        })
+        self.assertEqual(result['def'], {'test str 2': 'qwerty'})
+
+    def test_filter_prefetched_custom_fields(self):
+        objects = {
+            obj.pk: obj
+            for obj in SomeModel.objects.prefetch_related('custom_fields')
+        }
+        self.assertCountEqual(
+            objects[self.sm1.pk].custom_fields.filter(
+                custom_field=self.custom_field_str2
+            ),
+            [self.cfv3]
+        )
+        self.assertCountEqual(
+            objects[self.sm2.pk].custom_fields.filter(
+                custom_field=self.custom_field_str2
+            ),
+            [self.cfv2]
+        )
+
+    @override_settings(CUSTOM_FIELDS_CACHE_ENABLED=True)
+    @patch('ralph.lib.custom_fields.models.is_shared_cache', lambda: True)
+    def test_custom_fields_as_dict_cache(self):
+        cache.clear()
+        self.assertEqual(self.sm1.custom_fields_as_dict, {
+            'test str': 'sample_value', 'test str 2': 'sample_value2'
+        })
+        with self.assertNumQueries(0):
+            self.sm1.custom_fields_as_dict
+        # inherited value changed
+        self.cfv3.value = 'changed'
+        self.cfv3.save()
+        self.assertEqual(self.sm1.custom_fields_as_dict, {
+            'test str': 'sample_value', 'test str 2': 'changed'
+        })
+
+    @override_settings(CUSTOM_FIELDS_CACHE_ENABLED=True)
+    @patch('ralph.lib.custom_fields.models.is_shared_cache', lambda: True)
+    def test_custom_fields_as_dict_cache_when_inheritance_source_changes(self):
+        cache.clear()
+        self.assertEqual(
+            self.sm1.custom_fields_as_dict['test str 2'], 'sample_value2'
+        )
+        a2 = ModelA.objects.create()
+        CustomFieldValue.objects.create(
+            object=a2, custom_field=self.custom_field_str2, value='other'
+        )
+        self.b1.a = a2
+        self.b1.save()
+        self.assertEqual(self.sm1.custom_fields_as_dict['test str 2'], 'other')
+
+    @override_settings(CUSTOM_FIELDS_CACHE_ENABLED=True)
+    def test_custom_fields_as_dict_not_cached_in_process_local_cache(self):
+        self.sm1.custom_fields_as_dict
+        with self.assertNumQueries(1):
+            self.sm1.custom_fields_as_dict
@@ -1,15 +1,58 @@
+import asyncio
+import math
+import pickle
 import time
+from functools import partial
+from uuid import uuid4
 
 import django_rq
 from django.conf import settings
+from rq.job import get_current_job, JobStatus
+from rq.utils import import_attribute
+
+NOTIFY_KEY_PREFIX = 'ralph:services:done:'
+# result, which wasn't collected by caller (ex. after timeout), is removed
+# after this time
+NOTIFY_KEY_TTL = 3600
+# polling of job status (when worker doesn't notify about completion) starts
+# with this interval and is doubled up to max interval
+POLL_INTERVAL = 0.01
+POLL_MAX_INTERVAL = 1
 
 
 class QueuedServiceError(Exception):
     pass
 
 
+class QueuedServiceTimeout(QueuedServiceError):
+    pass
+
+
+def run_and_notify(method, notify_key, notify_ttl, kwargs):
+    """
+    Run `method` (on worker) and push its result to `notify_key` Redis list,
+    on which caller is waiting (using BLPOP).
+
+    If method raises an exception, None is pushed as a result (and the
+    exception is re-raised to mark job as failed).
+    """
+    connection = get_current_job().connection
+    result = None
+    try:
+        result = import_attribute(method)(**kwargs)
+        return result
+    finally:
+        pipe = connection.pipeline()
+        pipe.rpush(notify_key, pickle.dumps(result))
+        pipe.expire(notify_key, notify_ttl)
+        pipe.execute()
+
+
 class ExternalService(object):
     services = settings.RALPH_EXTERNAL_SERVICES
+    # worker of external service doesn't have to have access to Ralph's code,
+    # so by default completion of job is checked by polling its status
+    notify = False
 
     def __init__(self, service_name):
         """Initializing queue and check existence of service."""
@@ -17,7 +60,13 @@ class ExternalService(object):
         if not service:
             raise ValueError('The {} service doesn\'t exist'.format(service))
         self.method = service['method']
+        # optional method processing multiple jobs at once
+        self.bulk_method = service.get('bulk_method')
         self.queue = django_rq.get_queue(service['queue_name'])
+        self.notify = service.get('notify', self.notify)
+        self.timeout = service.get(
+            'timeout', settings.RALPH_SERVICES_WAIT_TIMEOUT
+        )
 
     def run(self, **kwargs):
         """Run function with params on external service.
@@ -35,21 +84,127 @@ class ExternalService(object):
 
         Raises:
             QueuedServiceError: If something goes wrong on queue.
+            QueuedServiceTimeout: If job wasn't finished in time.
         """
-        job = self.queue.enqueue(self.method, **kwargs)
-        if not job.is_queued:
-            raise QueuedServiceError
-        while job and not any([job.is_finished, job.is_failed]):
-            time.sleep(0.1)
-        return job.result
+        return self.run_many([kwargs])[0]
+
+    def run_many(self, kwargs_list, timeout=None):
+        """Run function on external service once for every params in
+        `kwargs_list` and wait for all of them together.
+
+        Args:
+            kwargs_list: A list of dictonaries with params.
+            timeout: Max time (in seconds) of waiting for all jobs (service
+                timeout is used by default).
+
+        Returns:
+            List of results (in order of `kwargs_list`).
+
+        Raises:
+            QueuedServiceError: If something goes wrong on queue.
+            QueuedServiceTimeout: If jobs weren't finished in time.
+        """
+        jobs = [self._enqueue(kwargs) for kwargs in kwargs_list]
+        return self._wait(jobs, self.timeout if timeout is None else timeout)
+
+    async def run_awaitable(self, **kwargs):
+        """Awaitable version of `run` - waiting for the result doesn't block
+        event loop (it's done in default executor).
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, partial(self.run, **kwargs))
 
     def run_async(self, **kwargs):
         job = self.queue.enqueue(self.method, kwargs=kwargs)
         return job
 
+    def run_async_bulk(self, **kwargs):
+        """Run `bulk_method` of the service asynchronously."""
+        if not self.bulk_method:
+            raise QueuedServiceError('Service does not support bulk jobs')
+        return self.queue.enqueue(self.bulk_method, kwargs=kwargs)
+
+    def _enqueue(self, kwargs):
+        if self.notify:
+            notify_key = NOTIFY_KEY_PREFIX + uuid4().hex
+            job = self.queue.enqueue(run_and_notify, kwargs={
+                'method': self.method,
+                'notify_key': notify_key,
+                'notify_ttl': NOTIFY_KEY_TTL,
+                'kwargs': kwargs,
+            })
+            job.notify_key = notify_key
+        else:
+            job = self.queue.enqueue(self.method, kwargs=kwargs)
+        if job.get_status() not in (
+            JobStatus.QUEUED, JobStatus.STARTED, JobStatus.FINISHED
+        ):
+            raise QueuedServiceError
+        return job
+
+    def _wait(self, jobs, timeout):
+        deadline = time.monotonic() + timeout if timeout else None
+        if self.notify:
+            return self._wait_for_notifications(jobs, deadline)
+        return self._poll(jobs, deadline)
+
+    def _wait_for_notifications(self, jobs, deadline):
+        """
+        Wait for results pushed by `run_and_notify` (single BLPOP for all
+        pending jobs).
+        """
+        connection = self.queue.connection
+        results = {}
+        pending = {job.notify_key: job for job in jobs}
+        while pending:
+            if deadline is None:
+                block_for = 0
+            else:
+                block_for = math.ceil(deadline - time.monotonic())
+                if block_for <= 0:
+                    raise QueuedServiceTimeout
+            item = connection.blpop(list(pending), timeout=block_for)
+            if item is None:
+                raise QueuedServiceTimeout
+            key, value = item
+            key = key.decode() if isinstance(key, bytes) else key
+            results[key] = pickle.loads(value)
+            del pending[key]
+        return [results[job.notify_key] for job in jobs]
+
+    def _poll(self, jobs, deadline):
+        """
+        Poll status of all pending jobs (with single round trip to Redis)
+        with exponential backoff.
+        """
+        connection = self.queue.connection
+        pending = list(jobs)
+        interval = POLL_INTERVAL
+        while True:
+            pipe = connection.pipeline()
+            for job in pending:
+                pipe.hget(job.key, 'status')
+            statuses = pipe.execute()
+            pending = [
+                job for job, status in zip(pending, statuses)
+                if (status.decode() if status else None) not in (
+                    JobStatus.FINISHED, JobStatus.FAILED
+                )
+            ]
+            if not pending:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                raise QueuedServiceTimeout
+            time.sleep(interval)
+            interval = min(interval * 2, POLL_MAX_INTERVAL)
+        return [job.result for job in jobs]
+
 
 class InternalService(ExternalService):
     """
     Service with DB (and Ralph-code) access
     """
     services = settings.RALPH_INTERNAL_SERVICES
+    # worker has access to Ralph's code, so it could notify about completion
+    # of the job
+    notify = True
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import logging
 import uuid
+from collections import OrderedDict
 from datetime import date
 
 from dateutil.parser import parse
@@ -56,6 +57,25 @@ class JobQuerySet(models.QuerySet):
     def inactive(self):
         return self.exclude(status__in=JOB_NOT_ENDED_STATUSES)
 
+    def progress(self):
+        """
+        Return aggregated progress of jobs (number of jobs in every status)
+        using single query.
+        """
+        counts = dict(
+            self.order_by().values_list('status').annotate(
+                count=models.Count('pk')
+            )
+        )
+        result = OrderedDict(
+            (status.name.lower(), counts.get(status.id, 0)) for status in (
+                JobStatus.QUEUED, JobStatus.STARTED, JobStatus.FROZEN,
+                JobStatus.FINISHED, JobStatus.FAILED, JobStatus.KILLED,
+            )
+        )
+        result['total'] = sum(counts.values())
+        return result
+
 
 def collect_metrics(action):
     def wrapper(func):
@@ -1,11 +1,25 @@
 # -*- coding: utf-8 -*-
 import json
+import pickle
+from unittest.mock import MagicMock, patch
 
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
-from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase
+)
 from djmoney.money import Money
-
+from rq.job import JobStatus as RQJobStatus
+
+from ralph.lib.external_services import base
+from ralph.lib.external_services.base import (
+    InternalService,
+    QueuedServiceTimeout,
+    run_and_notify
+)
 from ralph.lib.external_services.models import Job, JobStatus
 from ralph.tests.models import Bar, Foo
 
@@ -100,3 +114,128 @@ class JobRunTestCase(TransactionTestCase):
         self.assertEqual(Bar.objects.count(), prev_bar_count + 1)
         self.assertEqual(self.foo.bar, 'barbar')
         self.assertTrue(Bar.objects.filter(name='test1').exists())
+
+
+def add(a, b):
+    return a + b
+
+
+class FakeRedis(object):
+    """
+    Minimal in-memory replacement of Redis connection (lists and job
+    statuses only).
+    """
+    def __init__(self):
+        self.lists = {}
+        self.hashes = {}
+
+    def pipeline(self):
+        connection = self
+
+        class Pipeline(object):
+            def __init__(self):
+                self.calls = []
+
+            def __getattr__(self, name):
+                def call(*args, **kwargs):
+                    self.calls.append((name, args, kwargs))
+                return call
+
+            def execute(self):
+                return [
+                    getattr(connection, name)(*args, **kwargs)
+                    for name, args, kwargs in self.calls
+                ]
+        return Pipeline()
+
+    def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+
+    def expire(self, key, ttl):
+        pass
+
+    def blpop(self, keys, timeout=0):
+        for key in keys:
+            if self.lists.get(key):
+                return key.encode(), self.lists[key].pop(0)
+        return None
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+
+class ServiceRunTestCase(SimpleTestCase):
+    def setUp(self):
+        self.connection = FakeRedis()
+        self.queue = MagicMock(connection=self.connection)
+        self.queue.enqueue.side_effect = self._enqueue
+        self.run_jobs = True
+        patcher = patch('django_rq.get_queue', return_value=self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _enqueue(self, func, kwargs):
+        job = MagicMock(key='rq:job:{}'.format(len(self.connection.hashes)))
+        job.get_status.return_value = RQJobStatus.QUEUED
+        self.connection.hashes[job.key] = {}
+        if self.run_jobs:
+            if func is run_and_notify:
+                with patch.object(
+                    base, 'get_current_job',
+                    return_value=MagicMock(connection=self.connection)
+                ):
+                    job.result = func(**kwargs)
+            else:
+                job.result = func(**kwargs)
+            self.connection.hashes[job.key]['status'] = (
+                RQJobStatus.FINISHED.encode()
+            )
+        return job
+
+    def _get_service(self, notify):
+        services = {'ADD': {
+            'queue_name': 'test', 'method': add, 'notify': notify,
+            'timeout': 1,
+        }}
+        with patch.object(InternalService, 'services', services):
+            return InternalService('ADD')
+
+    def test_run_with_notification(self):
+        service = self._get_service(notify=True)
+        service.method = 'ralph.lib.external_services.tests.add'
+        self.assertEqual(service.run(a=1, b=2), 3)
+        self.assertEqual(
+            service.run_many([{'a': 1, 'b': 2}, {'a': 3, 'b': 4}]), [3, 7]
+        )
+
+    def test_run_with_polling(self):
+        service = self._get_service(notify=False)
+        self.assertEqual(service.run(a=1, b=2), 3)
+        self.assertEqual(
+            service.run_many([{'a': 1, 'b': 2}, {'a': 3, 'b': 4}]), [3, 7]
+        )
+
+    def test_run_with_notification_timeout(self):
+        self.run_jobs = False
+        service = self._get_service(notify=True)
+        with self.assertRaises(QueuedServiceTimeout):
+            service.run(a=1, b=2)
+
+    @patch.object(base, 'POLL_MAX_INTERVAL', 0.01)
+    def test_run_with_polling_timeout(self):
+        self.run_jobs = False
+        service = self._get_service(notify=False)
+        with self.assertRaises(QueuedServiceTimeout):
+            service.run(a=1, b=2)
+
+    def test_run_and_notify_pushes_none_on_error(self):
+        with patch.object(
+            base, 'get_current_job',
+            return_value=MagicMock(connection=self.connection)
+        ):
+            with self.assertRaises(TypeError):
+                run_and_notify(
+                    'ralph.lib.external_services.tests.add', 'key', 10,
+                    {'a': 1}
+                )
+        self.assertEqual(self.connection.lists['key'], [pickle.dumps(None)])
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ralph.lib.metrics.profiling import aggregate_profiles, load_profiles
+
+SORT_KEYS = {
+    'queries': itemgetter('avg_queries_count'),
+    'max-queries': itemgetter('max_queries_count'),
+    'time': itemgetter('avg_queries_time'),
+    'repeated': lambda view: len(view['repeated']),
+}
+
+
+class Command(BaseCommand):
+    help = 'Show the worst views based on collected query profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=settings.QUERY_PROFILES_PATH,
+            help='Path to the file with query profiles',
+        )
+        parser.add_argument(
+            '--sort', choices=list(SORT_KEYS), default='queries',
+            help='Sort views by this metric (descending)',
+        )
+        parser.add_argument(
+            '--limit', type=int, default=20,
+            help='Number of views to show',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            views = aggregate_profiles(load_profiles(options['path']))
+        except FileNotFoundError:
+            raise CommandError(
+                'Profiles file {} does not exist'.format(options['path'])
+            )
+        views.sort(key=SORT_KEYS[options['sort']], reverse=True)
+        for view in views[:options['limit']]:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                '{} {}'.format(view['method'], view['view_name'])
+            ))
+            self.stdout.write(
+                '\trequests: {requests}, queries: {avg_queries_count:.1f} '
+                '(max {max_queries_count}), queries time: '
+                '{avg_queries_time:.2f} ms (max {max_queries_time:.2f} '
+                'ms)'.format(**view)
+            )
+            for repeated in view['repeated']:
+                self.stdout.write(self.style.WARNING(
+                    '\t[REPEATED up to {max_count}x] {fingerprint}'.format(
+                        **repeated
+                    )
+                ))
+                for location in sorted(repeated['locations']):
+                    self.stdout.write('\t\t{}'.format(location))
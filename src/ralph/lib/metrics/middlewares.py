@@ -3,12 +3,22 @@ import logging
 import threading
 import time
 from collections import deque
+from contextlib import contextmanager
 from resource import getrusage, RUSAGE_SELF
 
 from django.conf import settings
 from django.db.backends.utils import CursorWrapper
 from django.utils.deprecation import MiddlewareMixin
 from .collector import statsd
+from .profiling import (
+    build_profile,
+    check_query_budget,
+    dump_profile,
+    format_profile,
+    get_caller_location,
+    get_query_budget,
+    QueryBudgetExceeded
+)
 
 PROCESSING_TIME_METRIC_PREFIX = getattr(
     settings, 'PROCESSING_TIME_METRIC_PREFIX', 'processing_time'
@@ -44,6 +54,12 @@ LONG_QUERIES_THRESHOLD_MS = getattr(
     'LONG_QUERIES_THRESHOLD_MS',
     250
 )
+QUERY_PROFILING_ENABLED = getattr(settings, 'QUERY_PROFILING_ENABLED', False)
+QUERY_PROFILING_HEADER = getattr(
+    settings,
+    'QUERY_PROFILING_HEADER',
+    'HTTP_X_RALPH_QUERY_PROFILE'
+)
 
 logger = logging.getLogger(__name__)
 
@@ -55,10 +71,12 @@ old_executemany = CursorWrapper.executemany
 class QueryLogEntry:
     sql: str  # noqa
     duration: float  # noqa
+    location: str  # noqa
 
-    def __init__(self, sql: str, duration: float):
-        self.sql = sql,
+    def __init__(self, sql: str, duration: float, location: str = None):
+        self.sql = sql
         self.duration = duration
+        self.location = location
 
     def __str__(self):
         return "'{}' took {} ms".format(self.sql, self.duration * 1000)
@@ -71,7 +89,48 @@ def get_queries_log() -> deque:
 
 
 def add_query_log(duration: float, sql: str) -> None:
-    get_queries_log().append(QueryLogEntry(sql=sql, duration=duration))
+    location = None
+    if (
+        getattr(queries_data, 'capture_locations', 0) or
+        getattr(queries_data, 'request_profiling', False)
+    ):
+        location = get_caller_location()
+    entry = QueryLogEntry(sql=sql, duration=duration, location=location)
+    get_queries_log().append(entry)
+    for collector in getattr(queries_data, 'collectors', []):
+        collector.append(entry)
+
+
+@contextmanager
+def capture_locations():
+    """
+    Record location of the code which executed query for every query
+    executed inside the block (it's expensive, so it's not done by default).
+    """
+    queries_data.capture_locations = getattr(
+        queries_data, 'capture_locations', 0
+    ) + 1
+    try:
+        yield
+    finally:
+        queries_data.capture_locations -= 1
+
+
+@contextmanager
+def collect_queries():
+    """
+    Collect (with their locations) all queries executed inside the block
+    into yielded list.
+    """
+    if not hasattr(queries_data, 'collectors'):
+        queries_data.collectors = []
+    queries = []
+    queries_data.collectors.append(queries)
+    try:
+        with capture_locations():
+            yield queries
+    finally:
+        queries_data.collectors.remove(queries)
 
 
 @functools.wraps(old_execute)
@@ -134,6 +193,58 @@ class RequestMetricsMiddleware(MiddlewareMixin):
         request._request_start_time = time.monotonic()
         request._start_resources = getrusage(RUSAGE_SELF)
         get_queries_log().clear()
+        # record locations of queries (required by profile) only when
+        # profiling is enabled (globally or using header - see `process_view`)
+        queries_data.request_profiling = QUERY_PROFILING_ENABLED
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # profiling on demand (using header) is allowed only for superusers -
+        # user is known (authenticated by session) only after all
+        # `process_request`s, so recording of locations starts here
+        if (
+            not queries_data.request_profiling and
+            QUERY_PROFILING_HEADER in request.META
+        ):
+            user = getattr(request, 'user', None)
+            queries_data.request_profiling = bool(
+                user and user.is_superuser
+            )
+
+    def _profile_queries(self, request, response):
+        """
+        Build profile of request queries, dump it (if profiling is enabled)
+        and check query budget of the view.
+        """
+        if not request.resolver_match:
+            return
+        url_name = request.resolver_match.url_name
+        budget = get_query_budget(url_name)
+        user = getattr(request, 'user', None)
+        # profiling on demand (using header) is allowed only for superusers
+        profiling = getattr(queries_data, 'request_profiling', False) and (
+            QUERY_PROFILING_ENABLED or (user and user.is_superuser)
+        )
+        if not profiling and budget is None:
+            return
+        profile = build_profile(
+            get_queries_log(),
+            path=request.get_full_path(),
+            url_name=url_name,
+            view_name=request.resolver_match.view_name,
+            method=request.method,
+            status_code=response.status_code,
+        )
+        if profiling:
+            if profile['repeated_count']:
+                logger.warning('Repeated queries in {}: {}'.format(
+                    profile['view_name'],
+                    format_profile(profile, only_repeated=True)
+                ), extra={'path': profile['path']})
+            dump_profile(profile)
+            response['X-Ralph-Queries-Count'] = profile['queries_count']
+            response['X-Ralph-Repeated-Queries'] = profile['repeated_count']
+        if getattr(settings, 'QUERY_BUDGETS_ENFORCED', False):
+            check_query_budget(profile, budget, url_name)
 
     def _collect_metrics(self, request, response):
         if not REQUESTS_METRICS_ENABLED:
@@ -241,4 +352,12 @@ class RequestMetricsMiddleware(MiddlewareMixin):
             self._collect_metrics(request, response)
         except Exception:
             logger.exception('Exception during collecting metrics')
+        try:
+            self._profile_queries(request, response)
+        except QueryBudgetExceeded:
+            raise
+        except Exception:
+            logger.exception('Exception during profiling queries')
+        finally:
+            queries_data.request_profiling = False
         return response
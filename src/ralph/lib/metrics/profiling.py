@@ -0,0 +1,260 @@
+"""
+Query profiling utilities.
+
+Queries executed during request (collected by `RequestMetricsMiddleware`) are
+fingerprinted (literals and lists of parameters are removed from SQL) and
+grouped, so the same query repeated many times (usually N+1 problem) could
+be easily spotted together with the code which executed it.
+"""
+import json
+import logging
+import os
+import re
+import sys
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+RALPH_DIR = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)
+)))
+METRICS_DIR = os.path.dirname(os.path.abspath(__file__))
+# frames of these files are skipped when looking for location of the query
+SKIPPED_FILES = {
+    os.path.join(METRICS_DIR, 'middlewares.py'),
+    os.path.join(METRICS_DIR, 'profiling.py'),
+}
+
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAMS_LIST_RE = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def get_repeated_queries_threshold():
+    return getattr(settings, 'REPEATED_QUERIES_THRESHOLD', 5)
+
+
+def fingerprint(sql):
+    """
+    Return normalized SQL - literals are replaced by `?` and lists of
+    parameters (ex. in `IN` clause) by `(...)`, so the same query executed
+    with different params has the same fingerprint.
+    """
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _PARAMS_LIST_RE.sub('(...)', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+
+def get_caller_location():
+    """
+    Return location (`path:line (function)`) of the innermost Ralph's code
+    frame in current stack (outside of queries profiling code).
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(RALPH_DIR + os.sep) and
+            filename not in SKIPPED_FILES
+        ):
+            return '{}:{} ({})'.format(
+                os.path.relpath(filename, RALPH_DIR),
+                frame.f_lineno,
+                frame.f_code.co_name,
+            )
+        frame = frame.f_back
+    return None
+
+
+def group_queries(queries):
+    """
+    Group queries by fingerprint.
+
+    Returns:
+        list of groups (dicts with fingerprint, count, total time (in ms)
+        and locations of queries) sorted by count (descending)
+    """
+    groups = OrderedDict()
+    for query in queries:
+        key = fingerprint(query.sql)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                'fingerprint': key,
+                'count': 0,
+                'time': 0,
+                'locations': OrderedDict(),
+            }
+        group['count'] += 1
+        group['time'] += query.duration * 1000
+        if query.location:
+            group['locations'][query.location] = (
+                group['locations'].get(query.location, 0) + 1
+            )
+    threshold = get_repeated_queries_threshold()
+    result = sorted(groups.values(), key=lambda g: g['count'], reverse=True)
+    for group in result:
+        group['repeated'] = group['count'] >= threshold
+        group['locations'] = [
+            {'location': location, 'count': count}
+            for location, count in group['locations'].items()
+        ]
+    return result
+
+
+def build_profile(queries, **metadata):
+    """
+    Build profile (JSON-serializable dict) of queries.
+    """
+    groups = group_queries(queries)
+    return dict(
+        metadata,
+        timestamp=datetime.now().isoformat(),
+        queries_count=sum(group['count'] for group in groups),
+        queries_time=sum(group['time'] for group in groups),
+        repeated_count=sum(1 for group in groups if group['repeated']),
+        groups=groups,
+    )
+
+
+def format_profile(profile, only_repeated=False):
+    """
+    Format profile as human-readable text.
+    """
+    lines = ['{} queries ({:.2f} ms), {} repeated'.format(
+        profile['queries_count'], profile['queries_time'],
+        profile['repeated_count'],
+    )]
+    for group in profile['groups']:
+        if only_repeated and not group['repeated']:
+            continue
+        lines.append('{}{}x ({:.2f} ms): {}'.format(
+            '[REPEATED] ' if group['repeated'] else '',
+            group['count'], group['time'], group['fingerprint'],
+        ))
+        for location in group['locations']:
+            lines.append('\t{count}x {location}'.format(**location))
+    return '\n'.join(lines)
+
+
+def dump_profile(profile, path=None):
+    """
+    Append profile (as single JSON line) to profiles file.
+    """
+    path = path or settings.QUERY_PROFILES_PATH
+    with open(path, 'a') as f:
+        f.write(json.dumps(profile) + '\n')
+
+
+def load_profiles(path):
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning('Invalid profile line in %s', path)
+
+
+def aggregate_profiles(profiles):
+    """
+    Aggregate profiles by view (and HTTP method).
+
+    Returns:
+        list of dicts with stats of every view (requests count, average and
+        max queries count and time, repeated queries with their locations)
+    """
+    views = OrderedDict()
+    for profile in profiles:
+        key = (profile.get('view_name'), profile.get('method'))
+        view = views.get(key)
+        if view is None:
+            view = views[key] = {
+                'view_name': key[0],
+                'method': key[1],
+                'requests': 0,
+                'queries_count': 0,
+                'queries_time': 0,
+                'max_queries_count': 0,
+                'max_queries_time': 0,
+                'repeated': OrderedDict(),
+            }
+        view['requests'] += 1
+        view['queries_count'] += profile['queries_count']
+        view['queries_time'] += profile['queries_time']
+        view['max_queries_count'] = max(
+            view['max_queries_count'], profile['queries_count']
+        )
+        view['max_queries_time'] = max(
+            view['max_queries_time'], profile['queries_time']
+        )
+        for group in profile['groups']:
+            if not group['repeated']:
+                continue
+            repeated = view['repeated'].setdefault(group['fingerprint'], {
+                'fingerprint': group['fingerprint'],
+                'max_count': 0,
+                'locations': set(),
+            })
+            repeated['max_count'] = max(repeated['max_count'], group['count'])
+            repeated['locations'].update(
+                location['location'] for location in group['locations']
+            )
+    result = []
+    for view in views.values():
+        view['avg_queries_count'] = view['queries_count'] / view['requests']
+        view['avg_queries_time'] = view['queries_time'] / view['requests']
+        view['repeated'] = sorted(
+            view['repeated'].values(),
+            key=lambda r: r['max_count'], reverse=True
+        )
+        result.append(view)
+    return result
+
+
+def get_query_budget(url_name):
+    """
+    Return max number of queries for url name (or None, if unlimited).
+    """
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(
+        url_name, getattr(settings, 'DEFAULT_QUERY_BUDGET', None)
+    )
+
+
+def check_query_budget(profile, budget, name):
+    if budget is not None and profile['queries_count'] > budget:
+        raise QueryBudgetExceeded(
+            'Query budget of {} exceeded ({} > {}):\n{}'.format(
+                name, profile['queries_count'], budget,
+                format_profile(profile),
+            )
+        )
+
+
+@contextmanager
+def query_budget(max_queries, name='block'):
+    """
+    Assert that code inside the block executes at most `max_queries` queries
+    (on failure report with repeated queries and their locations is shown).
+
+    Usage:
+        with query_budget(10):
+            self.client.get(url)
+    """
+    from ralph.lib.metrics.middlewares import collect_queries
+    with collect_queries() as queries:
+        yield
+    check_query_budget(build_profile(queries), max_queries, name)
@@ -0,0 +1,149 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings, TestCase
+from django.urls import reverse
+
+from ralph.lib.metrics.middlewares import collect_queries, QueryLogEntry
+from ralph.lib.metrics.profiling import (
+    aggregate_profiles,
+    build_profile,
+    fingerprint,
+    query_budget,
+    QueryBudgetExceeded
+)
+
+
+class FingerprintTestCase(TestCase):
+    def test_literals_are_removed(self):
+        self.assertEqual(
+            fingerprint(
+                "SELECT a FROM t  WHERE b = 'x''y' AND c = 12 AND d IN "
+                "(%s, %s, %s)"
+            ),
+            'SELECT a FROM t WHERE b = ? AND c = ? AND d IN (...)'
+        )
+
+    def test_identifiers_are_not_changed(self):
+        self.assertEqual(
+            fingerprint('SELECT T2.id FROM table1 T2'),
+            'SELECT T2.id FROM table1 T2'
+        )
+
+
+@override_settings(REPEATED_QUERIES_THRESHOLD=3)
+class ProfileTestCase(TestCase):
+    def _get_queries(self):
+        return [
+            QueryLogEntry('SELECT * FROM a WHERE id = %s', 0.001, 'x.py:1'),
+            QueryLogEntry('SELECT * FROM b', 0.001),
+            QueryLogEntry('SELECT * FROM a WHERE id = %s', 0.002, 'x.py:1'),
+            QueryLogEntry('SELECT * FROM a WHERE id = %s', 0.001, 'y.py:2'),
+        ]
+
+    def test_build_profile(self):
+        profile = build_profile(self._get_queries(), view_name='test')
+        self.assertEqual(profile['view_name'], 'test')
+        self.assertEqual(profile['queries_count'], 4)
+        self.assertEqual(profile['repeated_count'], 1)
+        group = profile['groups'][0]
+        self.assertEqual(group['fingerprint'], 'SELECT * FROM a WHERE id = %s')
+        self.assertEqual(group['count'], 3)
+        self.assertTrue(group['repeated'])
+        self.assertEqual(group['locations'], [
+            {'location': 'x.py:1', 'count': 2},
+            {'location': 'y.py:2', 'count': 1},
+        ])
+        self.assertFalse(profile['groups'][1]['repeated'])
+
+    def test_aggregate_profiles(self):
+        profiles = [
+            build_profile(self._get_queries(), view_name='a', method='GET'),
+            build_profile(
+                self._get_queries()[:2], view_name='a', method='GET'
+            ),
+            build_profile([], view_name='b', method='GET'),
+        ]
+        view_a, view_b = aggregate_profiles(profiles)
+        self.assertEqual(view_a['requests'], 2)
+        self.assertEqual(view_a['avg_queries_count'], 3)
+        self.assertEqual(view_a['max_queries_count'], 4)
+        self.assertEqual(len(view_a['repeated']), 1)
+        self.assertEqual(
+            view_a['repeated'][0]['locations'], {'x.py:1', 'y.py:2'}
+        )
+        self.assertEqual(view_b['requests'], 1)
+
+    def test_report_command(self):
+        with tempfile.NamedTemporaryFile('w', delete=False) as f:
+            f.write(json.dumps(build_profile(
+                self._get_queries(), view_name='test-view', method='GET'
+            )) + '\n')
+        self.addCleanup(os.remove, f.name)
+        out = StringIO()
+        call_command('query_profiles_report', path=f.name, stdout=out)
+        self.assertIn('GET test-view', out.getvalue())
+        self.assertIn('SELECT * FROM a WHERE id = %s', out.getvalue())
+        self.assertIn('x.py:1', out.getvalue())
+
+
+class QueryBudgetTestCase(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_superuser(
+            'test', 'test@test.test', 'test'
+        )
+        self.client.login(username='test', password='test')
+
+    def test_collect_queries_records_location(self):
+        with collect_queries() as queries:
+            get_user_model().objects.count()
+        self.assertEqual(len(queries), 1)
+        self.assertIn('lib/metrics/tests.py', queries[0].location)
+
+    def test_query_budget(self):
+        with query_budget(1):
+            get_user_model().objects.count()
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(1):
+                get_user_model().objects.count()
+                get_user_model().objects.count()
+
+    @override_settings(QUERY_BUDGETS={'api-root': 0})
+    def test_query_budget_of_view_is_enforced(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('test-ralph-api:api-root'))
+
+    def test_profile_is_dumped_on_demand(self):
+        with tempfile.NamedTemporaryFile('w', delete=False) as f:
+            path = f.name
+        self.addCleanup(os.remove, path)
+        with override_settings(QUERY_PROFILES_PATH=path):
+            response = self.client.get(
+                reverse('test-ralph-api:api-root'),
+                HTTP_X_RALPH_QUERY_PROFILE='1'
+            )
+        self.assertIn('X-Ralph-Queries-Count', response)
+        with open(path) as f:
+            profile = json.loads(f.read())
+        self.assertEqual(profile['url_name'], 'api-root')
+        self.assertEqual(
+            profile['queries_count'], int(response['X-Ralph-Queries-Count'])
+        )
+
+    def test_profiling_on_demand_is_not_enabled_for_regular_user(self):
+        get_user_model().objects.create_user('regular', password='regular')
+        self.client.login(username='regular', password='regular')
+        with patch(
+            'ralph.lib.metrics.middlewares.get_caller_location'
+        ) as get_caller_location_mock:
+            response = self.client.get(
+                reverse('test-ralph-api:api-root'),
+                HTTP_X_RALPH_QUERY_PROFILE='1'
+            )
+        self.assertNotIn('X-Ralph-Queries-Count', response)
+        self.assertFalse(get_caller_location_mock.called)
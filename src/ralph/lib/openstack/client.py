@@ -1,5 +1,6 @@
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 
 from django.conf import settings
@@ -245,13 +246,30 @@ class RalphOpenStackInfrastructureClient:
             'tag': client.site['tag'],
         }
 
-    def get_openstack_flavors(self):
-        openstack_flavors = {}
-        for client in self.clients:
+    def _map_clients(self, func):
+        """
+        Call `func` for every client (OpenStack instance) concurrently
+        (using up to `OPENSTACK_SYNC_CONCURRENCY` threads).
+
+        Returns list of results in the order of clients.
+        """
+        def _process(client):
             logger.info('Processing {} ({})'.format(
                 client.site['auth_url'], client.site['tag']
             ))
-            for flavor in client.get_flavors_list():
+            return func(client)
+        workers = min(settings.OPENSTACK_SYNC_CONCURRENCY, len(self.clients))
+        if workers <= 1:
+            return [_process(client) for client in self.clients]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_process, self.clients))
+
+    def get_openstack_flavors(self):
+        openstack_flavors = {}
+        for client, flavors in zip(
+            self.clients, self._map_clients(lambda c: c.get_flavors_list())
+        ):
+            for flavor in flavors:
                 openstack_flavors[flavor['id']] = self._get_flavor_data(
                     client, flavor
                 )
@@ -259,11 +277,11 @@ class RalphOpenStackInfrastructureClient:
 
     def get_openstack_projects(self):
         openstack_projects = {}
-        for client in self.clients:
-            logger.info('Processing {} ({})'.format(
-                client.site['auth_url'], client.site['tag']
-            ))
-            for project in client.get_keystone_projects():
+        for client, projects in zip(
+            self.clients,
+            self._map_clients(lambda c: c.get_keystone_projects())
+        ):
+            for project in projects:
                 if project.id not in openstack_projects:
                     openstack_projects[project.id] = {
                         'name': project.name,
@@ -275,6 +293,51 @@ class RalphOpenStackInfrastructureClient:
                 )
         return openstack_projects
 
+    def _get_servers_data(self, client, search_opts):
+        """
+        Fetch servers of single OpenStack instance (with images and hostnames
+        of IPs resolved from DNS).
+        """
+        servers = []
+        for server in client.get_servers_list(search_opts=search_opts):
+            image_name = client.get_image_name(
+                 server['image']['id']
+            ) if server['image'] else None
+            new_server = {
+                'hostname': None,
+                'id': server['id'],
+                'flavor_id': server['flavor']['id'],
+                'tag': client.site['tag'],
+                'ips': {},
+                'created': server['created'],
+                'hypervisor': server['OS-EXT-SRV-ATTR:hypervisor_hostname'],
+                'image': image_name,
+                'status': server['status']
+            }
+            for zone in server['addresses']:
+                if (
+                    'network_regex' in client.site and
+                    not re.match(client.site['network_regex'], zone)
+                ):
+                    continue
+                for ip in server['addresses'][zone]:
+                    addr = ip['addr']
+                    # fetch FQDN from DNS by IP address
+                    hostname = network.hostname(addr)
+                    logger.debug('Get IP {} ({}) for {}'.format(
+                        addr, hostname, server['id']
+                    ))
+                    new_server['ips'][addr] = hostname
+                    if not new_server['hostname']:
+                        new_server['hostname'] = hostname
+            # fallback to default behavior if FQDN could not be fetched
+            # from DNS
+            new_server['hostname'] = (
+                new_server['hostname'] or server['name']
+            )
+            servers.append((server['tenant_id'], new_server))
+        return servers
+
     def get_openstack_instances_data(
         self, openstack_projects, openstack_flavors, search_opts=None
     ):
@@ -283,6 +346,8 @@ class RalphOpenStackInfrastructureClient:
         (servers). If any flavor is missing, add it to the openstack_flavors
         dictionary.
 
+        Servers are fetched from all OpenStack instances concurrently.
+
         :param openstack_flavors: dictionary of openstack flavors
         :param openstack_projects: dictionary of openstack projects
         :return: updated openstack_projects and openstack_flavors
@@ -293,49 +358,12 @@ class RalphOpenStackInfrastructureClient:
             search_opts = {}
         search_opts.update(default_search_opts)
 
-        for client in self.clients:
-            logger.info('Processing {} ({})'.format(
-                client.site['auth_url'], client.site['tag']
-            ))
-            for server in client.get_servers_list(search_opts=search_opts):
-                project_id = server['tenant_id']
-                host_id = server['id']
-                image_name = client.get_image_name(
-                     server['image']['id']
-                ) if server['image'] else None
-                flavor_id = server['flavor']['id']
-                new_server = {
-                    'hostname': None,
-                    'id': server['id'],
-                    'flavor_id': flavor_id,
-                    'tag': client.site['tag'],
-                    'ips': {},
-                    'created': server['created'],
-                    'hypervisor': server['OS-EXT-SRV-ATTR:hypervisor_hostname'],  # noqa: E501
-                    'image': image_name,
-                    'status': server['status']
-                }
-                for zone in server['addresses']:
-                    if (
-                        'network_regex' in client.site and
-                        not re.match(client.site['network_regex'], zone)
-                    ):
-                        continue
-                    for ip in server['addresses'][zone]:
-                        addr = ip['addr']
-                        # fetch FQDN from DNS by IP address
-                        hostname = network.hostname(addr)
-                        logger.debug('Get IP {} ({}) for {}'.format(
-                            addr, hostname, server['id']
-                        ))
-                        new_server['ips'][addr] = hostname
-                        if not new_server['hostname']:
-                            new_server['hostname'] = hostname
-                # fallback to default behavior if FQDN could not be fetched
-                # from DNS
-                new_server['hostname'] = (
-                    new_server['hostname'] or server['name']
-                )
+        for client, servers in zip(self.clients, self._map_clients(
+            lambda c: self._get_servers_data(c, search_opts)
+        )):
+            for project_id, new_server in servers:
+                host_id = new_server['id']
+                flavor_id = new_server['flavor_id']
                 try:
                     openstack_projects[project_id]['servers'][host_id] = (
                         new_server
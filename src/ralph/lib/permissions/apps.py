@@ -9,9 +9,11 @@ class PermissionAppConfig(AppConfig):
 
     def ready(self):
         from ralph.lib.permissions.models import create_permissions
+        from ralph.lib.permissions.snapshot import connect_signals
         from ralph.lib.permissions.views import update_extra_view_permissions
         post_migrate.disconnect(
             dispatch_uid='django.contrib.auth.management.create_permissions'
         )
         post_migrate.connect(create_permissions)
         post_migrate.connect(update_extra_view_permissions)
+        connect_signals()
@@ -6,6 +6,8 @@ from django.db import DEFAULT_DB_ALIAS, models, router, transaction
 from django.db.models.base import ModelBase
 from django.utils.translation import ugettext_lazy as _
 
+from ralph.lib.permissions.snapshot import get_permissions_snapshot
+
 
 def get_perm_key(action, class_name, field_name):
     """
@@ -209,19 +211,9 @@ class PermByFieldMixin(models.Model, metaclass=PermissionsBase):
         :rtype: bool
         """
         # TODO: if it's m2m field, check on the other side
-        perm_key = get_perm_key(
-            action,
-            cls._meta.model_name,
-            field_name
-        )
-        perm = user.has_perm(
-            '{}.{}'.format(cls._meta.app_label, perm_key)
+        return get_permissions_snapshot(user).has_access_to_field(
+            cls, field_name, action
         )
-        # If the user does not have rights to view,
-        # but has the right to change he can view the field
-        if action == 'view' and not perm:
-            return cls.has_access_to_field(field_name, user, action='change')
-        return perm
 
     @classmethod
     def allowed_fields(cls, user, action='change'):
@@ -243,20 +235,7 @@ class PermByFieldMixin(models.Model, metaclass=PermissionsBase):
         :return: List of field names
         :rtype: list
         """
-        result = set()
-        blacklist = cls._permissions.blacklist
-
-        for field in (cls._meta.fields + cls._meta.many_to_many):
-            if (
-                field.name not in blacklist and
-                cls.has_access_to_field(field.name, user, action)
-            ):
-                result.add(field.name)
-        # If the user does not have rights to view,
-        # but has the right to change he can view the field
-        if action == 'view':
-            result |= cls.allowed_fields(user, 'change')
-        return result
+        return get_permissions_snapshot(user).allowed_fields(cls, action)
 
     class Meta:
         abstract = True
@@ -269,7 +248,9 @@ class PermissionsForObjectMixin(models.Model, metaclass=PermissionsBase):
         """
         Check if user has all rights to single object.
         """
-        user_perms = self._permissions.has_access(user)
+        user_perms = get_permissions_snapshot(user).get_objects_filter(
+            self.__class__
+        )
         if not user_perms:
             return True
         return self.__class__.objects.filter(
@@ -286,7 +267,9 @@ class PermissionsForObjectMixin(models.Model, metaclass=PermissionsBase):
         """
         if queryset is None:
             queryset = cls._default_manager
-        return queryset.filter(cls._permissions.has_access(user))
+        return queryset.filter(
+            get_permissions_snapshot(user).get_objects_filter(cls)
+        )
 
     class Meta:
         abstract = True
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Per-user snapshot of permissions.
+
+Checking permissions to fields (`PermByFieldMixin`) requires calling
+`user.has_perm` for every field of every model (and every serializer in case
+of nested serializers), and checking object-level permissions requires
+building `Q` filter every time. Snapshot is built once per user (instance)
+and it's consulted instead - permissions of the user are fetched once (and
+shared between processes using Django cache), and allowed fields and
+object-level filter are calculated once per model.
+
+Permissions kept in Django cache are versioned - version is bumped every
+time groups or permissions of any user (or group) are changed. Permissions
+are cached only when cache is shared between processes (otherwise change made
+in one process wouldn't invalidate permissions cached in other processes).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete
+
+from ralph.lib.cache import (
+    bump_cache_generation,
+    get_cache_generation,
+    is_shared_cache
+)
+
+VERSION_CACHE_KEY = 'ralph_permissions_version'
+SNAPSHOT_ATTR = '_permissions_snapshot'
+
+
+def _get_version():
+    return get_cache_generation(VERSION_CACHE_KEY)
+
+
+def _bump_version():
+    bump_cache_generation(VERSION_CACHE_KEY)
+
+
+def _get_cache_key(user):
+    return 'ralph_permissions_{}_{}_{}'.format(
+        _get_version(), user.pk, int(user.is_superuser)
+    )
+
+
+def _get_user_permissions(user):
+    """
+    Return set of all permissions (`<app_label>.<codename>`) of the user.
+    """
+    if not user or not user.is_active or user.is_anonymous:
+        return frozenset()
+    if user.is_superuser:
+        # superuser has all permissions - there is no need to fetch them
+        return frozenset()
+    if not settings.USE_CACHE or not is_shared_cache():
+        return frozenset(user.get_all_permissions())
+    key = _get_cache_key(user)
+    permissions = cache.get(key)
+    if permissions is None:
+        permissions = frozenset(user.get_all_permissions())
+        cache.set(key, permissions, settings.PERMISSIONS_CACHE_TIMEOUT)
+    return permissions
+
+
+class PermissionsSnapshot(object):
+    """
+    Permissions of single user, with allowed fields and object-level filters
+    calculated (lazily) once per model.
+    """
+    def __init__(self, user, permissions):
+        self.user = user
+        self.is_superuser = bool(
+            user and user.is_active and user.is_superuser
+        )
+        self.permissions = permissions
+        self._allowed_fields = {}
+        self._objects_filters = {}
+
+    def has_perm(self, perm):
+        return self.is_superuser or perm in self.permissions
+
+    def has_access_to_field(self, model, field_name, action='change'):
+        from ralph.lib.permissions.models import get_perm_key
+        perm = '{}.{}'.format(
+            model._meta.app_label,
+            get_perm_key(action, model._meta.model_name, field_name)
+        )
+        if self.has_perm(perm):
+            return True
+        # If the user does not have rights to view,
+        # but has the right to change he can view the field
+        if action == 'view':
+            return self.has_access_to_field(model, field_name, 'change')
+        return False
+
+    def allowed_fields(self, model, action='change'):
+        """
+        Return names of fields of the model to which user has permission.
+        """
+        key = (model, action)
+        if key not in self._allowed_fields:
+            blacklist = model._permissions.blacklist
+            result = {
+                field.name
+                for field in (model._meta.fields + model._meta.many_to_many)
+                if (
+                    field.name not in blacklist and
+                    self.has_access_to_field(model, field.name, action)
+                )
+            }
+            if action == 'view':
+                result |= self.allowed_fields(model, 'change')
+            self._allowed_fields[key] = frozenset(result)
+        # callers are free to modify the result
+        return set(self._allowed_fields[key])
+
+    def get_objects_filter(self, model):
+        """
+        Return object-level permissions filter (`Q`) of the model.
+        """
+        if model not in self._objects_filters:
+            self._objects_filters[model] = model._permissions.has_access(
+                self.user
+            )
+        return self._objects_filters[model]
+
+
+def get_permissions_snapshot(user):
+    """
+    Return permissions snapshot of the user.
+
+    Snapshot is kept on user instance (similar to Django's permissions cache),
+    so it's built once per request.
+    """
+    snapshot = getattr(user, SNAPSHOT_ATTR, None)
+    if snapshot is None:
+        snapshot = PermissionsSnapshot(user, _get_user_permissions(user))
+        if user is not None:
+            try:
+                setattr(user, SNAPSHOT_ATTR, snapshot)
+            except AttributeError:
+                pass
+    return snapshot
+
+
+def invalidate_permissions(*args, **kwargs):
+    """
+    Invalidate permissions snapshots of all users.
+    """
+    action = kwargs.get('action')
+    if action and not action.startswith('post_'):
+        return
+    instance = kwargs.get('instance')
+    if instance is not None and hasattr(instance, SNAPSHOT_ATTR):
+        delattr(instance, SNAPSHOT_ATTR)
+    _bump_version()
+    transaction.on_commit(_bump_version)
+
+
+def connect_signals():
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.models import Group, Permission
+    user_model = get_user_model()
+    for through in (
+        user_model.groups.through,
+        user_model.user_permissions.through,
+        Group.permissions.through,
+    ):
+        m2m_changed.connect(
+            invalidate_permissions, sender=through,
+            dispatch_uid='invalidate_permissions_{}'.format(
+                through._meta.label
+            )
+        )
+    for model in (Group, Permission):
+        post_delete.connect(
+            invalidate_permissions, sender=model,
+            dispatch_uid='invalidate_permissions_{}'.format(
+                model._meta.label
+            )
+        )
@@ -0,0 +1,131 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.test import override_settings, TestCase
+
+from ralph.assets.models.assets import AssetModel
+from ralph.lib.permissions.snapshot import (
+    _get_version,
+    get_permissions_snapshot,
+    VERSION_CACHE_KEY
+)
+
+
+class PermissionsSnapshotTestCase(TestCase):
+    def setUp(self):
+        cache.delete(VERSION_CACHE_KEY)
+        # permissions are cached only in cache shared between processes
+        patcher = patch(
+            'ralph.lib.permissions.snapshot.is_shared_cache',
+            return_value=True
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = get_user_model().objects.create(username='user')
+        self.permission = Permission.objects.get(
+            codename='change_assetmodel_height_of_device_field',
+        )
+        self.user.user_permissions.add(self.permission)
+
+    def _get_user(self):
+        return get_user_model().objects.get(pk=self.user.pk)
+
+    def test_snapshot_is_kept_on_user_instance(self):
+        user = self._get_user()
+        self.assertEqual(
+            AssetModel.allowed_fields(user, 'change'), {'height_of_device'}
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                AssetModel.allowed_fields(user, 'view'), {'height_of_device'}
+            )
+            self.assertTrue(
+                AssetModel.has_access_to_field('height_of_device', user)
+            )
+            self.assertFalse(AssetModel.has_access_to_field('name', user))
+
+    def test_allowed_fields_could_be_modified_by_caller(self):
+        user = self._get_user()
+        AssetModel.allowed_fields(user).add('name')
+        self.assertEqual(AssetModel.allowed_fields(user), {'height_of_device'})
+
+    def test_superuser(self):
+        user = get_user_model().objects.create(
+            username='superuser', is_superuser=True
+        )
+        snapshot = get_permissions_snapshot(user)
+        self.assertIn('name', snapshot.allowed_fields(AssetModel))
+
+    def test_inactive_user_has_no_permissions(self):
+        user = self._get_user()
+        user.is_active = False
+        self.assertEqual(AssetModel.allowed_fields(user), set())
+
+    @override_settings(USE_CACHE=True)
+    def test_permissions_are_shared_between_user_instances(self):
+        AssetModel.allowed_fields(self._get_user())
+        user = self._get_user()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                AssetModel.allowed_fields(user), {'height_of_device'}
+            )
+
+    @override_settings(USE_CACHE=True)
+    def test_cache_is_invalidated_on_user_permissions_change(self):
+        AssetModel.allowed_fields(self._get_user())
+        self.user.user_permissions.add(Permission.objects.get(
+            codename='change_assetmodel_name_field',
+        ))
+        self.assertEqual(
+            AssetModel.allowed_fields(self._get_user()),
+            {'height_of_device', 'name'}
+        )
+
+    @override_settings(USE_CACHE=True)
+    def test_cache_is_invalidated_on_group_permissions_change(self):
+        group = Group.objects.create(name='group')
+        self.user.groups.add(group)
+        AssetModel.allowed_fields(self._get_user())
+        group.permissions.add(Permission.objects.get(
+            codename='change_assetmodel_name_field',
+        ))
+        self.assertEqual(
+            AssetModel.allowed_fields(self._get_user()),
+            {'height_of_device', 'name'}
+        )
+
+    @override_settings(USE_CACHE=True)
+    def test_permissions_are_not_cached_in_process_local_cache(self):
+        with patch(
+            'ralph.lib.permissions.snapshot.is_shared_cache',
+            return_value=False
+        ), patch('ralph.lib.permissions.snapshot.cache') as cache_mock:
+            self.assertEqual(
+                AssetModel.allowed_fields(self._get_user()),
+                {'height_of_device'}
+            )
+        self.assertFalse(cache_mock.get.called)
+        self.assertFalse(cache_mock.set.called)
+
+    def test_permissions_of_superuser_are_not_fetched(self):
+        user = self._get_user()
+        user.is_superuser = True
+        with self.assertNumQueries(0):
+            fields = AssetModel.allowed_fields(user, 'change')
+        self.assertIn('height_of_device', fields)
+        self.assertIn('name', fields)
+
+    def test_version_is_not_reused_when_evicted(self):
+        # version was already set when permissions were added to the user
+        cache.delete(VERSION_CACHE_KEY)
+        with patch(
+            'ralph.lib.cache.time.time', return_value=1000
+        ):
+            version = _get_version()
+        cache.delete(VERSION_CACHE_KEY)
+        with patch(
+            'ralph.lib.cache.time.time', return_value=1001
+        ):
+            self.assertGreater(_get_version(), version)
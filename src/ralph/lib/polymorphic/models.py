@@ -13,18 +13,24 @@ Example:
     ]
 """
 from collections import defaultdict
-from itertools import groupby
+from itertools import groupby, islice
 from typing import Dict, Iterable, List, Tuple
 
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.core import exceptions
 from django.db import models
-from django.db.models import QuerySet
+from django.db.models import prefetch_related_objects, QuerySet
 from django.db.models.base import ModelBase
+from django.db.models.query import ModelIterable
 
 
 class PolymorphicQuerySet(models.QuerySet):
+    # number of (base) rows for which descendant objects are fetched at once
+    # (when queryset is evaluated); use `iterator(chunk_size=...)` to stream
+    # objects in chunks of different size
+    polymorphic_chunk_size = 2000
+
     def __init__(self, *args, **kwargs):
         self._polymorphic_select_related = {}
         self._polymorphic_prefetch_related = {}
@@ -34,34 +40,81 @@ class PolymorphicQuerySet(models.QuerySet):
         self._extra_kwargs = {}
         self._polymorphic_filter_args = []
         self._polymorphic_filter_kwargs = {}
-        self._my_cache = None
-        self._pks_order = None
+        self._select_related = None
+        self._polymorphic_cache = None
         super().__init__(*args, **kwargs)
 
-    def _fetch_all(self):
-        if self._result_cache is not None:
-            return
-        self._result_cache = None
-        self._my_cache = None
-        self._pks_order = None
-
+    def _move_select_related_to_subqueries(self):
+        """
+        Select related is applied to descendant models queries instead of
+        base query.
+        """
         if self.query.select_related:
             self._select_related = self.query.select_related
             self.query.select_related = False
-        else:
-            self._select_related = None
 
-        super()._fetch_all()
-        try:
-            self._pks_order = [obj.pk for obj in self._result_cache]  # type: ignore
-        except AttributeError:
-            return self._result_cache
+    def _fetch_all(self):
+        if self._result_cache is None:
+            self._move_select_related_to_subqueries()
+            self._result_cache = list(self._iterable_class(self))
+            # `len()` and indexing of evaluated queryset use base objects,
+            # iteration yields descendant objects
+            self._polymorphic_cache = list(self._polymorphic_iterator(
+                self._result_cache,
+                self.polymorphic_chunk_size,
+                prefetch_base=True,
+            ))
+            self._prefetch_done = True
+        if self._prefetch_related_lookups and not self._prefetch_done:
+            self._prefetch_related_objects()
+
+    def __iter__(self):
+        self._fetch_all()
+        if self._polymorphic_cache is None:
+            # result cache set from outside (ex. by `prefetch_related`)
+            return iter(self._result_cache)
+        return iter(self._polymorphic_cache)
+
+    def iterator(self, chunk_size=2000):
+        """
+        Stream descendant objects - base rows are fetched in chunks of
+        `chunk_size` and descendant objects are fetched for every chunk
+        separately. Nothing is cached on the queryset.
+        """
+        clone = self._chain()
+        clone._move_select_related_to_subqueries()
+        return clone._polymorphic_iterator(
+            super(PolymorphicQuerySet, clone).iterator(chunk_size=chunk_size),
+            chunk_size,
+        )
 
-        result = groupby(
-            sorted(self._result_cache, key=lambda x: x.content_type_id),
-            lambda x: x.content_type_id,
-        )  # type: Iterable[Tuple[int, object]]
-        self._my_cache = self._subquery_for_children_models(result)
+    def _polymorphic_iterator(self, base_objects, chunk_size,
+                              prefetch_base=False):
+        if not issubclass(self._iterable_class, ModelIterable):
+            # values(), values_list() etc. - nothing to do here
+            yield from base_objects
+            return
+        seen_pks = set()
+        base_objects = iter(base_objects)
+        while True:
+            chunk = list(islice(base_objects, chunk_size))
+            if not chunk:
+                return
+            if prefetch_base and self._prefetch_related_lookups:
+                prefetch_related_objects(chunk, *self._prefetch_related_lookups)
+            result = groupby(
+                sorted(chunk, key=lambda x: x.content_type_id),
+                lambda x: x.content_type_id,
+            )  # type: Iterable[Tuple[int, object]]
+            objects_by_pk = self._subquery_for_children_models(result)
+            for base_obj in chunk:
+                # single object could be fetched multiple times (ex. when
+                # prefetching m2m relation) - all descendants are returned
+                # at its first occurrence
+                if base_obj.pk in seen_pks:
+                    continue
+                seen_pks.add(base_obj.pk)
+                yield from objects_by_pk.get(base_obj.pk, [])
 
     def _subquery_for_children_models(self, result) -> Dict[int, List[object]]:
         result_mapping = defaultdict(list)
@@ -222,21 +275,6 @@ class PolymorphicQuerySet(models.QuerySet):
                 )
         return query
 
-    def __iter__(self):
-        self._fetch_all()
-        try:
-            cache_ = self._my_cache.copy()
-            pks = [pk for pk in self._pks_order]
-        except AttributeError as e:
-            yield from self._result_cache
-        else:
-            for pk in pks:
-                while cache_[pk]:
-                    yield cache_[pk].pop()
-
-    def iterator(self):
-        yield from self.__iter__()
-
     def annotate(self, *args, **kwargs):
         self._annotate_args.extend(args)
         self._annotate_kwargs.update(kwargs)
@@ -257,14 +295,31 @@ class PolymorphicQuerySet(models.QuerySet):
         clone._extra_kwargs = self._extra_kwargs.copy()
         clone._polymorphic_filter_args = self._polymorphic_filter_args.copy()
         clone._polymorphic_filter_kwargs = self._polymorphic_filter_kwargs.copy()
-        clone._my_cache = self._my_cache.clone() if self._my_cache else None
-        clone._pks_order = self._pks_order.clone() if self._pks_order else None
+        clone._select_related = self._select_related
         return clone
 
     def get(self, *args, **kwargs):
-        obj = super().get(*args, **kwargs)
-        if hasattr(obj, 'content_type'):
-            obj = obj.content_type.get_object_for_this_type(pk=obj.pk)
+        clone = self.filter(*args, **kwargs)
+        if self.query.can_filter() and not self.query.distinct_fields:
+            clone = clone.order_by()
+        num = len(clone)
+        if not num:
+            raise self.model.DoesNotExist(
+                '%s matching query does not exist.' %
+                self.model._meta.object_name
+            )
+        if num > 1:
+            raise self.model.MultipleObjectsReturned(
+                'get() returned more than one %s -- it returned %s!' %
+                (self.model._meta.object_name, num)
+            )
+        # use descendant object if it was already fetched
+        obj = next(iter(clone), None) or clone._result_cache[0]
+        content_type_id = getattr(obj, 'content_type_id', None)
+        if content_type_id is not None:
+            content_type = ContentType.objects.get_for_id(content_type_id)
+            if not isinstance(obj, content_type.model_class()):
+                obj = content_type.get_object_for_this_type(pk=obj.pk)
         return obj
 
     def polymorphic_select_related(self, **kwargs):
@@ -10,6 +10,7 @@ from ralph.lib.polymorphic.tests.models import (
     SomeM2MModel,
     SomethingRelated
 )
+from ralph.lib.queryset import iter_chunks
 
 
 class PolymorphicTestCase(TestCase):
@@ -92,6 +93,64 @@ class PolymorphicTestCase(TestCase):
         with self.assertNumQueries(2):
             list(PolymorphicModelTest.polymorphic_objects.all())
 
+    def test_polymorphic_queryset_iterator(self):
+        queryset = PolymorphicModelBaseTest.polymorphic_objects.order_by("pk")
+        with self.assertNumQueries(4):
+            # queries:
+            # select PolymorphicModelBaseTest
+            # select descendant model for every (single-object) chunk
+            result = list(queryset.iterator(chunk_size=1))
+        self.assertEqual(result, [self.pol_1, self.pol_2, self.pol_3])
+        self.assertEqual(
+            [type(obj) for obj in result],
+            [PolymorphicModelTest, PolymorphicModelTest, PolymorphicModelTest2],
+        )
+        self.assertIsNone(queryset._result_cache)
+
+    def test_polymorphic_queryset_fetch_in_chunks(self):
+        queryset = PolymorphicModelBaseTest.polymorphic_objects.order_by("pk")
+        queryset.polymorphic_chunk_size = 2
+        with self.assertNumQueries(3):
+            # queries:
+            # select PolymorphicModelBaseTest
+            # select PolymorphicModelTest (pol_1 and pol_2)
+            # select PolymorphicModelTest2 (pol_3)
+            result = list(queryset)
+        self.assertEqual(result, [self.pol_1, self.pol_2, self.pol_3])
+        self.assertIsInstance(result[2], PolymorphicModelTest2)
+
+    def test_polymorphic_queryset_multiple_iterations(self):
+        queryset = PolymorphicModelBaseTest.polymorphic_objects.all()
+        self.assertEqual(len(list(queryset)), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(list(queryset)), 3)
+            self.assertEqual(len(queryset), 3)
+            self.assertIsInstance(list(queryset)[0], PolymorphicModelTest)
+
+    def test_iter_chunks_of_filtered_polymorphic_queryset(self):
+        queryset = PolymorphicModelBaseTest.polymorphic_objects.polymorphic_filter(
+            another_related=self.sth_related
+        )
+        # first chunk (pol_1 and pol_2) has no matching descendant objects
+        self.assertEqual(list(iter_chunks(queryset, 2)), [[self.pol_3]])
+
+    def test_polymorphic_queryset_values(self):
+        self.assertEqual(
+            list(
+                PolymorphicModelBaseTest.polymorphic_objects.order_by(
+                    "pk"
+                ).values_list("name", flat=True)
+            ),
+            ["Pol1", "Pol2", "Pol3"],
+        )
+
+    def test_polymorphic_queryset_get(self):
+        with self.assertNumQueries(2):
+            obj = PolymorphicModelBaseTest.polymorphic_objects.get(
+                pk=self.pol_3.pk
+            )
+        self.assertIsInstance(obj, PolymorphicModelTest2)
+
     def test_m2m_with_prefetch_related_on_polymorphic_object(self):
         sm2mm_1 = SomeM2MModel.objects.create(name="abc")
         sm2mm_1.polymorphics.set([self.pol_1, self.pol_2])
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+
+def iter_chunks(queryset, chunk_size):
+    """
+    Yield (lists of) objects from queryset ordered by primary key - every
+    chunk is fetched using keyset (`pk > <last pk>`), so prefetching works
+    and memory usage doesn't depend on the size of the queryset.
+
+    Iteration stops when there are no more rows - chunk could contain less
+    than `chunk_size` objects even if it's not the last one (ex. polymorphic
+    queryset returns only rows with descendant objects).
+    """
+    queryset = queryset.order_by('pk')
+    chunk_queryset = queryset
+    while True:
+        chunk = chunk_queryset[:chunk_size]
+        objects = list(chunk)
+        # `len()` and indexing of evaluated (polymorphic) queryset use
+        # fetched rows, not (descendant) objects
+        rows = len(chunk)
+        if objects:
+            yield objects
+        if rows < chunk_size:
+            return
+        last = chunk[rows - 1]
+        chunk_queryset = queryset.filter(pk__gt=getattr(last, 'pk', last))
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from django.conf import settings
+from django.conf.urls import url
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ralph.lib.permissions.api import VIEW_PERM
+from ralph.lib.permissions.models import PermissionsForObjectMixin
+from ralph.lib.search.query import search
+
+QUERY_PARAM = 'q'
+
+
+class SearchAPIView(APIView):
+    """
+    Find objects of all indexed models (ex. assets, virtual servers, IP
+    addresses) matching the query (`q` param) - every word of the query has
+    to be a part of hostname, serial number, barcode, IP address etc. of the
+    object. Results are ordered by rank (exact matches first).
+    """
+    def _get_queryset(self, model):
+        user = self.request.user
+        if not user.has_any_perms([
+            perm % {
+                'app_label': model._meta.app_label,
+                'model_name': model._meta.model_name,
+            }
+            for perm in VIEW_PERM
+        ]):
+            return model._default_manager.none()
+        queryset = model._default_manager.all()
+        if issubclass(model, PermissionsForObjectMixin):
+            queryset = model._get_objects_for_user(user, queryset)
+        return queryset
+
+    def _get_limit(self, request):
+        try:
+            limit = int(request.query_params.get('limit'))
+        except (TypeError, ValueError):
+            limit = settings.SEARCH_API_DEFAULT_LIMIT
+        return max(1, min(limit, settings.SEARCH_API_MAX_LIMIT))
+
+    def get(self, request, format=None):
+        results = search(
+            request.query_params.get(QUERY_PARAM, ''),
+            limit=self._get_limit(request),
+            queryset_getter=self._get_queryset,
+        )
+        return Response({'results': [
+            {
+                'model': obj._meta.label_lower,
+                'id': obj.pk,
+                'label': str(obj),
+                'url': (
+                    obj.get_absolute_url()
+                    if hasattr(obj, 'get_absolute_url') else None
+                ),
+                'rank': rank,
+            }
+            for obj, rank in results
+        ]})
+
+
+urlpatterns = [
+    url(r'^search/?$', SearchAPIView.as_view(), name='search'),
+]
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+from django.apps import AppConfig
+
+
+class SearchAppConfig(AppConfig):
+    name = 'ralph.lib.search'
+    verbose_name = 'Search'
+
+    def ready(self):
+        from ralph.lib.search.index import connect_signals
+        connect_signals()
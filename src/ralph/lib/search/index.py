@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Search index - denormalized table (`SearchDocument`) of searched values of
+objects of models from `SEARCH_INDEX_MODELS`.
+
+Values of every `search_fields` of model's admin (including values of related
+objects, ex. `ethernet_set__ipaddress__hostname`) are stored as separate
+documents, so admin search, autocomplete and search API could find matching
+objects using single (indexed) table instead of `icontains` on multiple
+joined tables.
+
+Documents are updated after commit of the transaction in which indexed object
+(or its related object used in `search_fields`) was saved or deleted. Changes
+of many-to-many relations and bulk updates (`QuerySet.update`) are not
+tracked - use `search_index` command to rebuild whole index.
+"""
+import logging
+from collections import OrderedDict
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, pre_save
+from django.utils.functional import cached_property
+
+from ralph.lib.search.models import SearchDocument, VALUE_MAX_LENGTH
+from ralph.signals import OnCommitBatch
+
+logger = logging.getLogger(__name__)
+
+
+class IndexedModel(object):
+    def __init__(self, model):
+        self.model = model
+
+    @cached_property
+    def fields(self):
+        """
+        Indexed fields (paths) - `search_fields` of model's admin (fields
+        with `^`, `=` or `@` prefix are indexed as regular fields).
+        """
+        from ralph.admin.sites import ralph_site
+        model_admin = ralph_site._registry.get(self.model)
+        return [
+            field.lstrip('^=@')
+            for field in getattr(model_admin, 'search_fields', None) or []
+        ]
+
+    @cached_property
+    def dependencies(self):
+        """
+        List of pairs (related model, lookup from related model to this
+        model) for every relation used in indexed fields.
+        """
+        dependencies = OrderedDict()
+        for path in self.fields:
+            current_model = self.model
+            lookups = []
+            for name in path.split('__')[:-1]:
+                try:
+                    field = current_model._meta.get_field(name)
+                except FieldDoesNotExist:
+                    logger.warning(
+                        'Could not track changes of %s of %s',
+                        path, self.model._meta.label
+                    )
+                    break
+                if field.auto_created and not field.concrete:
+                    # reverse relation (ex. `ethernet_set`)
+                    lookups.insert(0, field.field.name)
+                else:
+                    lookups.insert(0, field.related_query_name())
+                current_model = field.related_model
+                dependencies[(current_model, '__'.join(lookups))] = None
+        return list(dependencies)
+
+    @property
+    def content_type(self):
+        return ContentType.objects.get_for_model(self.model)
+
+    def get_documents(self, pks):
+        """
+        Return (not saved) documents of objects with `pks`.
+        """
+        documents = OrderedDict()
+        queryset = self.model._default_manager.filter(pk__in=pks)
+        for path in self.fields:
+            for pk, value in queryset.values_list('pk', path):
+                if value is None or value == '':
+                    continue
+                value = str(value)[:VALUE_MAX_LENGTH]
+                documents[(pk, path, value)] = SearchDocument(
+                    content_type_id=self.content_type.id,
+                    object_id=pk,
+                    field=path,
+                    value=value,
+                )
+        return list(documents.values())
+
+    def update(self, pks):
+        """
+        Rebuild documents of objects with `pks` (documents of not existing
+        objects are deleted).
+        """
+        documents = self.get_documents(pks)
+        with transaction.atomic():
+            SearchDocument.objects.filter(
+                content_type_id=self.content_type.id, object_id__in=pks
+            ).delete()
+            SearchDocument.objects.bulk_create(documents)
+        return documents
+
+
+_registry = OrderedDict()
+
+
+def get_indexed_models():
+    if not _registry:
+        for label in settings.SEARCH_INDEX_MODELS:
+            model = apps.get_model(label)
+            _registry[model] = IndexedModel(model)
+    return _registry
+
+
+def get_indexed_model(model):
+    """
+    Return `IndexedModel` of `model` (or None, if model is not indexed or
+    search index is disabled).
+    """
+    if not settings.SEARCH_INDEX_ENABLED:
+        return None
+    return get_indexed_models().get(model)
+
+
+def update_documents(model, pks):
+    get_indexed_models()[model].update(pks)
+
+
+def _update_pending_documents(items):
+    pks_by_model = OrderedDict()
+    for model, pk in items:
+        pks_by_model.setdefault(model, []).append(pk)
+    for model, pks in pks_by_model.items():
+        try:
+            update_documents(model, pks)
+        except Exception:
+            logger.exception(
+                'Could not update search documents of %s', model
+            )
+
+
+# objects which documents will be updated after commit (of the current
+# transaction)
+_pending_updates = OnCommitBatch(_update_pending_documents)
+
+
+def _schedule_update(model, pks):
+    for pk in pks:
+        _pending_updates.add((model, pk))
+
+
+def _get_affected(sender, instance):
+    """
+    Yield pairs of (indexed model, pks) of objects which documents depend
+    on `instance`.
+    """
+    for model, indexed_model in get_indexed_models().items():
+        if issubclass(sender, model):
+            yield model, [instance.pk]
+        for related_model, lookup in indexed_model.dependencies:
+            if issubclass(sender, related_model):
+                pks = [
+                    pk for pk in sender._default_manager.filter(
+                        pk=instance.pk
+                    ).values_list(lookup, flat=True)
+                    if pk is not None
+                ]
+                if pks:
+                    yield model, pks
+
+
+def collect_previous(sender, instance, raw=False, **kwargs):
+    """
+    Collect objects depending on `instance` before saving it (ex. previous
+    owner of IP address), to update their documents after saving.
+    """
+    if not settings.SEARCH_INDEX_ENABLED or raw or instance.pk is None:
+        return
+    instance._search_index_previous = list(_get_affected(sender, instance))
+
+
+def update_on_change(sender, instance, raw=False, **kwargs):
+    if not settings.SEARCH_INDEX_ENABLED or raw or instance.pk is None:
+        return
+    affected = getattr(instance, '_search_index_previous', [])
+    instance._search_index_previous = []
+    affected.extend(_get_affected(sender, instance))
+    for model, pks in affected:
+        _schedule_update(model, pks)
+
+
+def connect_signals():
+    pre_save.connect(collect_previous, dispatch_uid='search_index_pre_save')
+    post_save.connect(update_on_change, dispatch_uid='search_index_post_save')
+    # objects depending on deleted object are collected before deletion
+    # (documents are updated after commit)
+    pre_delete.connect(
+        update_on_change, dispatch_uid='search_index_pre_delete'
+    )
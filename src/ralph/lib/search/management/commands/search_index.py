@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ralph.lib.queryset import iter_chunks
+from ralph.lib.search.index import get_indexed_models
+from ralph.lib.search.models import SearchDocument
+
+DB_INDEX_NAME = 'search_document_value_search'
+CREATE_DB_INDEX_SQL = {
+    # `icontains` is translated to `UPPER(...) LIKE UPPER(...)` on PostgreSQL
+    'postgresql': [
+        'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+        'CREATE INDEX IF NOT EXISTS {index} ON {table} '
+        'USING gin (UPPER({column}::text) gin_trgm_ops)',
+    ],
+    # used when `SEARCH_INDEX_FULLTEXT` is enabled
+    'mysql': [
+        'ALTER TABLE {table} ADD FULLTEXT INDEX {index} ({column}) '
+        'WITH PARSER ngram',
+    ],
+}
+
+
+class Command(BaseCommand):
+    help = 'Rebuild search index (and create search database index)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            dest='models',
+            action='append',
+            help='Rebuild documents only of this model (ex. '
+                 'data_center.DataCenterAsset); could be used multiple times',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of objects indexed at once',
+        )
+        parser.add_argument(
+            '--create-db-index',
+            action='store_true',
+            default=False,
+            help='Create trigram (PostgreSQL) or FULLTEXT (MySQL) index of '
+                 'searched values',
+        )
+
+    def create_db_index(self):
+        statements = CREATE_DB_INDEX_SQL.get(connection.vendor)
+        if not statements:
+            raise CommandError(
+                'Search database index is not supported on {}'.format(
+                    connection.vendor
+                )
+            )
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement.format(
+                    index=quote(DB_INDEX_NAME),
+                    table=quote(SearchDocument._meta.db_table),
+                    column=quote(
+                        SearchDocument._meta.get_field('value').column
+                    ),
+                ))
+        self.stdout.write('Search database index created')
+
+    def handle(self, *args, **options):
+        if options['create_db_index']:
+            self.create_db_index()
+        indexed_models = get_indexed_models()
+        models = list(indexed_models)
+        if options['models']:
+            try:
+                models = [apps.get_model(label) for label in options['models']]
+            except (LookupError, ValueError) as e:
+                raise CommandError(str(e))
+            not_indexed = [m for m in models if m not in indexed_models]
+            if not_indexed:
+                raise CommandError('{} is not indexed'.format(
+                    ', '.join(m._meta.label for m in not_indexed)
+                ))
+        for model in models:
+            start = time.monotonic()
+            indexed = 0
+            for pks in iter_chunks(
+                model._default_manager.values_list('pk', flat=True),
+                options['chunk_size']
+            ):
+                indexed_models[model].update(pks)
+                indexed += len(pks)
+            # remove documents of objects deleted without signals
+            # (ex. using `QuerySet.update` or raw SQL)
+            SearchDocument.objects.filter(
+                content_type=indexed_models[model].content_type
+            ).exclude(
+                object_id__in=model._default_manager.values('pk')
+            ).delete()
+            self.stdout.write('Indexed {} objects of {} in {:.1f}s'.format(
+                indexed, model._meta.label, time.monotonic() - start
+            ))
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.db.models.lookups import IContains
+
+# max length of indexed value (longer values are truncated)
+VALUE_MAX_LENGTH = 255
+
+
+class SearchValueField(models.CharField):
+    pass
+
+
+@SearchValueField.register_lookup
+class Match(IContains):
+    """
+    Case-insensitive substring match of indexed value.
+
+    On PostgreSQL it's accelerated by trigram (`pg_trgm`) index, on MySQL
+    (when `SEARCH_INDEX_FULLTEXT` is enabled) FULLTEXT (ngram) index is used
+    instead of `LIKE` (see `search_index --create-db-index` command).
+    """
+    lookup_name = 'match'
+
+    def get_rhs_op(self, connection, rhs):
+        return connection.operators['icontains'] % rhs
+
+    def as_mysql(self, compiler, connection):
+        if (
+            not settings.SEARCH_INDEX_FULLTEXT or
+            len(self.rhs) < settings.SEARCH_INDEX_FULLTEXT_MIN_LENGTH
+        ):
+            return self.as_sql(compiler, connection)
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        # search for phrase (sequence of ngrams) in boolean mode
+        return 'MATCH ({}) AGAINST (%s IN BOOLEAN MODE)'.format(lhs_sql), (
+            lhs_params + ['"{}"'.format(self.rhs.replace('"', ''))]
+        )
+
+
+class SearchDocument(models.Model):
+    """
+    Single searched value (ex. hostname, serial number or IP address) of
+    indexed object. Values are denormalized (copied from the object and its
+    related objects, according to `search_fields` of the object's admin), so
+    searching doesn't require any join.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    field = models.CharField(max_length=100)
+    value = SearchValueField(max_length=VALUE_MAX_LENGTH, db_index=True)
+
+    class Meta:
+        index_together = (('content_type', 'object_id'),)
+
+    def __str__(self):
+        return '{}: {}'.format(self.field, self.value)
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Search service - finding (ranked) objects using search index.
+
+Object matches the query when every term of the query is a substring of any
+of its indexed values (the same as admin search). Objects are ranked by the
+best match of the first term: exact match, prefix match, substring match.
+"""
+import operator
+import re
+from collections import OrderedDict
+from functools import reduce
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import (
+    Case,
+    IntegerField,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When
+)
+
+from ralph.lib.search.index import get_indexed_model, get_indexed_models
+from ralph.lib.search.models import SearchDocument
+
+RANK_EXACT = 3
+RANK_PREFIX = 2
+RANK_SUBSTRING = 1
+WORDS_REGEX = re.compile(r'\s+')
+
+
+def split_query(query, regex=WORDS_REGEX):
+    """
+    Split query into terms (by whitespace by default).
+    """
+    return [term for term in regex.split(query or '') if term]
+
+
+def find_documents(terms, models=None, fields=None):
+    """
+    Return documents (of objects of `models`), which values (of `fields`)
+    match the first term, of objects which values match every term.
+    """
+    if models is None:
+        models = list(get_indexed_models())
+    content_types = list(ContentType.objects.get_for_models(*models).values())
+    documents = SearchDocument.objects.filter(content_type__in=content_types)
+    if fields is not None:
+        documents = documents.filter(field__in=fields)
+    if not terms or not content_types:
+        return documents.none()
+    matching = documents.filter(value__match=terms[0])
+    for term in terms[1:]:
+        matching = matching.filter(reduce(operator.or_, [
+            Q(content_type=content_type, object_id__in=documents.filter(
+                content_type=content_type, value__match=term
+            ).values('object_id'))
+            for content_type in content_types
+        ]))
+    return matching
+
+
+def rank_documents(documents, term):
+    """
+    Return (`content_type`, `object_id`, `rank`) of objects of `documents`
+    ordered by rank.
+    """
+    return documents.values('content_type', 'object_id').annotate(
+        rank=Max(Case(
+            When(value__iexact=term, then=Value(RANK_EXACT)),
+            When(value__istartswith=term, then=Value(RANK_PREFIX)),
+            default=Value(RANK_SUBSTRING),
+            output_field=IntegerField(),
+        ))
+    ).order_by('-rank', 'object_id')
+
+
+def is_searchable(model, fields=None):
+    """
+    Return True if objects of `model` could be searched using search index
+    (by `fields` - every of them has to be indexed).
+    """
+    indexed_model = get_indexed_model(model)
+    if indexed_model is None:
+        return False
+    return fields is None or set(fields) <= set(indexed_model.fields)
+
+
+def filter_queryset(queryset, terms, fields=None, ranked=False):
+    """
+    Filter `queryset` to objects matching every of `terms` (optionally
+    ordered by rank, which is annotated as `search_rank`).
+    """
+    documents = find_documents(terms, [queryset.model], fields)
+    queryset = queryset.filter(pk__in=documents.values('object_id'))
+    if ranked:
+        rank = rank_documents(
+            documents.filter(object_id=OuterRef('pk')), terms[0]
+        ).values('rank')[:1]
+        queryset = queryset.annotate(
+            search_rank=Subquery(rank, output_field=IntegerField())
+        ).order_by('-search_rank', 'pk')
+    return queryset
+
+
+def search(query, models=None, limit=20, queryset_getter=None):
+    """
+    Find objects (of `models` or of all indexed models) matching `query`.
+
+    Returns list of pairs (object, rank) ordered by rank. `queryset_getter`
+    (called with model) could be used to restrict objects (ex. to these which
+    user has access to).
+    """
+    terms = split_query(query)
+    if not terms:
+        return []
+    # fetch more matching objects than needed, because some of them may be
+    # excluded by `queryset_getter`
+    ranked = [
+        (
+            ContentType.objects.get_for_id(row['content_type']).model_class(),
+            row['object_id'],
+            row['rank'],
+        )
+        for row in rank_documents(
+            find_documents(terms, models), terms[0]
+        )[:limit * 2]
+    ]
+    pks_by_model = OrderedDict()
+    for model, pk, _ in ranked:
+        pks_by_model.setdefault(model, []).append(pk)
+    objects = {}
+    for model, pks in pks_by_model.items():
+        queryset = (
+            queryset_getter(model) if queryset_getter
+            else model._default_manager.all()
+        )
+        for obj in queryset.filter(pk__in=pks):
+            objects[(model, obj.pk)] = obj
+    return [
+        (objects[(model, pk)], rank) for model, pk, rank in ranked
+        if (model, pk) in objects
+    ][:limit]
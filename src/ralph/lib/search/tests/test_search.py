@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+from django.core.management import call_command
+from django.db import transaction
+from django.test import override_settings, TransactionTestCase
+from django.urls import reverse
+
+from ralph.data_center.models import DataCenterAsset
+from ralph.data_center.tests.factories import DataCenterAssetFactory
+from ralph.lib.search.models import SearchDocument
+from ralph.lib.search.query import (
+    filter_queryset,
+    RANK_EXACT,
+    RANK_PREFIX,
+    RANK_SUBSTRING,
+    search
+)
+from ralph.networks.tests.factories import IPAddressFactory
+from ralph.tests.mixins import ClientMixin
+
+
+def _get_values(obj, field=None):
+    documents = SearchDocument.objects.filter(object_id=obj.pk)
+    if field:
+        documents = documents.filter(field=field)
+    return set(documents.values_list('value', flat=True))
+
+
+@override_settings(SEARCH_INDEX_ENABLED=True)
+class SearchIndexTestCase(TransactionTestCase):
+    def setUp(self):
+        self.dc_asset = DataCenterAssetFactory(hostname='s12345.dc.local')
+        self.ip = IPAddressFactory(
+            ethernet__base_object=self.dc_asset, address='10.20.30.40',
+            hostname='ip.s12345.dc.local'
+        )
+
+    def test_documents_are_created_on_save(self):
+        self.assertIn('s12345.dc.local', _get_values(self.dc_asset))
+        self.assertIn(self.dc_asset.sn, _get_values(self.dc_asset))
+
+    def test_documents_of_related_objects_are_indexed(self):
+        self.assertEqual(
+            _get_values(self.dc_asset, 'ethernet_set__ipaddress__address'),
+            {'10.20.30.40'}
+        )
+
+    def test_documents_are_updated_when_related_object_changes(self):
+        other_dc_asset = DataCenterAssetFactory()
+        self.ip.ethernet.base_object = other_dc_asset
+        self.ip.ethernet.save()
+        self.assertFalse(
+            _get_values(self.dc_asset, 'ethernet_set__ipaddress__address')
+        )
+        self.assertEqual(
+            _get_values(other_dc_asset, 'ethernet_set__ipaddress__address'),
+            {'10.20.30.40'}
+        )
+
+    def test_documents_are_deleted_with_object(self):
+        self.ip.delete()
+        self.assertFalse(
+            _get_values(self.dc_asset, 'ethernet_set__ipaddress__address')
+        )
+        pk = self.dc_asset.pk
+        self.dc_asset.delete()
+        self.assertFalse(SearchDocument.objects.filter(object_id=pk).exists())
+
+    def test_documents_are_updated_after_commit(self):
+        with transaction.atomic():
+            self.dc_asset.hostname = 's54321.dc.local'
+            self.dc_asset.save()
+            self.assertIn('s12345.dc.local', _get_values(self.dc_asset))
+        self.assertIn('s54321.dc.local', _get_values(self.dc_asset))
+        self.assertNotIn('s12345.dc.local', _get_values(self.dc_asset))
+
+    def test_rebuild_index(self):
+        SearchDocument.objects.all().delete()
+        call_command('search_index', model=['data_center.DataCenterAsset'])
+        self.assertIn('s12345.dc.local', _get_values(self.dc_asset))
+        self.assertIn('10.20.30.40', _get_values(self.dc_asset))
+
+
+@override_settings(SEARCH_INDEX_ENABLED=True)
+class SearchTestCase(ClientMixin, TransactionTestCase):
+    def setUp(self):
+        self.login_as_user()
+        self.exact = DataCenterAssetFactory(hostname='s1.dc.local')
+        self.prefix = DataCenterAssetFactory(hostname='s1.dc.local.old')
+        self.substring = DataCenterAssetFactory(hostname='web-s1.dc.local')
+        self.other = DataCenterAssetFactory(hostname='db.dc.local')
+
+    def test_search_ranks_objects(self):
+        self.assertEqual(search('s1.dc.local'), [
+            (self.exact, RANK_EXACT),
+            (self.prefix, RANK_PREFIX),
+            (self.substring, RANK_SUBSTRING),
+        ])
+
+    def test_search_every_term_has_to_match(self):
+        IPAddressFactory(
+            ethernet__base_object=self.prefix, address='10.20.30.40'
+        )
+        self.assertEqual(
+            [obj for obj, _ in search('s1.dc 10.20.30')], [self.prefix]
+        )
+
+    def test_filter_queryset_by_fields(self):
+        self.assertEqual(
+            list(filter_queryset(
+                DataCenterAsset.objects.all(), ['s1.dc'], fields=['sn']
+            )),
+            []
+        )
+        self.assertEqual(
+            list(filter_queryset(
+                DataCenterAsset.objects.all(), ['s1.dc'], fields=['hostname'],
+                ranked=True
+            )),
+            [self.exact, self.prefix, self.substring]
+        )
+
+    def test_admin_search(self):
+        response = self.client.get(
+            reverse('admin:data_center_datacenterasset_changelist'),
+            {'q': 's1.dc'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(response.context_data['cl'].result_list),
+            {self.exact, self.prefix, self.substring}
+        )
+
+    def test_search_api(self):
+        response = self.client.get(reverse('search'), {'q': 's1.dc.local'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [
+                (result['model'], result['id'], result['rank'])
+                for result in response.data['results']
+            ],
+            [
+                ('data_center.datacenterasset', self.exact.id, RANK_EXACT),
+                ('data_center.datacenterasset', self.prefix.id, RANK_PREFIX),
+                (
+                    'data_center.datacenterasset', self.substring.id,
+                    RANK_SUBSTRING
+                ),
+            ]
+        )
+
+    def test_search_api_limit(self):
+        response = self.client.get(
+            reverse('search'), {'q': 's1.dc.local', 'limit': 1}
+        )
+        self.assertEqual(len(response.data['results']), 1)
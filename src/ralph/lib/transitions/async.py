@@ -2,8 +2,12 @@
 Asynchronous runner for transitions
 """
 import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
-from django.db import transaction
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
 
 from ralph.attachments.models import Attachment
 from ralph.lib.transitions.exceptions import (
@@ -19,6 +23,7 @@ from ralph.lib.transitions.models import (
     _order_actions_by_requirements,
     _post_transition_instance_processing,
     _prepare_action_data,
+    Transition,
     TransitionJob,
     TransitionJobAction,
     TransitionJobActionStatus
@@ -46,8 +51,9 @@ def _check_previous_actions(job, executed_actions):
         raise MoreThanOneStartedActionError()
 
 
-def run_async_transition(job_id):
-    transition_job = TransitionJob.objects.get(pk=job_id)
+def run_async_transition(job_id, transition_job=None):
+    if transition_job is None:
+        transition_job = TransitionJob.objects.get(pk=job_id)
     transition_job.start()
     try:
         _perform_async_transition(transition_job)
@@ -56,6 +62,62 @@ def run_async_transition(job_id):
         transition_job.fail(str(e))
 
 
+def _get_transition_jobs(job_ids):
+    """
+    Fetch transition jobs with state shared between them (transitions with
+    their actions, objects) precomputed using constant number of queries.
+    """
+    jobs = list(TransitionJob.objects.filter(pk__in=job_ids))
+    transitions = Transition.objects.prefetch_related('actions').in_bulk(
+        {job.transition_id for job in jobs}
+    )
+    objects_ids = defaultdict(set)
+    for job in jobs:
+        job.transition = transitions[job.transition_id]
+        objects_ids[job.content_type_id].add(job.object_id)
+    # objects are fetched per content type by hand - generic prefetch doesn't
+    # match integer pks with (char) `object_id` and clears the relation
+    objects = {}
+    for content_type_id, ids in objects_ids.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        for obj in model._base_manager.filter(pk__in=ids):
+            objects[content_type_id, str(obj.pk)] = obj
+    obj_field = TransitionJob._meta.get_field('obj')
+    for job in jobs:
+        obj = objects.get((job.content_type_id, job.object_id))
+        if obj is not None:
+            obj_field.set_cached_value(job, obj)
+    return jobs
+
+
+def _run_async_transition_in_thread(transition_job):
+    try:
+        run_async_transition(transition_job.pk, transition_job)
+    except Exception as e:
+        logger.exception(e)
+    finally:
+        # every thread uses its own connection to the database
+        connection.close()
+
+
+def run_async_transitions(job_ids):
+    """
+    Run chunk of asynchronous transition jobs.
+
+    Max `TRANSITION_ASYNC_CONCURRENCY` jobs are run in parallel (in separate
+    threads). Jobs which are rescheduled or unfrozen later are run separately
+    (using `run_async_transition`).
+    """
+    jobs = _get_transition_jobs(job_ids)
+    concurrency = min(settings.TRANSITION_ASYNC_CONCURRENCY, len(jobs))
+    if concurrency <= 1:
+        for job in jobs:
+            run_async_transition(job.pk, job)
+        return
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(_run_async_transition_in_thread, jobs))
+
+
 # TODO: unify this function with `ralph.lib.transitions.models.run_field_transition`  # noqa
 def _perform_async_transition(transition_job):
     transition = transition_job.transition
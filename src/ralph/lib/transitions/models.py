@@ -31,6 +31,7 @@ from ralph.admin.helpers import (
     get_field_by_relation_path
 )
 from ralph.attachments.models import Attachment
+from ralph.lib.external_services.base import InternalService
 from ralph.lib.external_services.models import (
     Job,
     JOB_NOT_ENDED_STATUSES,
@@ -284,20 +285,16 @@ def run_transition(
         first_instance, transition_obj_or_name, field
     )
     if transition.is_async:
-        job_ids = []
-        for instance in instances:
-            service_name = transition.async_service_name or DEFAULT_ASYNC_TRANSITION_SERVICE_NAME # noqa
-            job_id, job = TransitionJob.run(
-                service_name=service_name,
-                requester=requester,
-                obj=instance,
-                transition=transition,
-                data=data,
-                transition_id=transition.id,
-                **kwargs
-            )
-            job_ids.append(job_id)
-        return job_ids
+        service_name = transition.async_service_name or DEFAULT_ASYNC_TRANSITION_SERVICE_NAME # noqa
+        return TransitionJob.run_many(
+            service_name=service_name,
+            requester=requester,
+            instances=instances,
+            transition=transition,
+            data=data,
+            transition_id=transition.id,
+            **kwargs
+        )
     else:
         success = False
         try:
@@ -692,6 +689,72 @@ class TransitionJob(Job):
             **kwargs
         )
 
+    @classmethod
+    def run_many(
+        cls, service_name, instances, transition, requester, **kwargs
+    ):
+        """
+        Run transition asynchronously for multiple instances.
+
+        Jobs are created in bulk (params are dumped once, content type is
+        fetched once per model) and, if service supports it, enqueued in
+        chunks of `TRANSITION_ASYNC_CHUNK_SIZE` jobs processed by single
+        worker task.
+
+        Returns list of ids of created jobs (in order of instances).
+        """
+        service = InternalService(service_name)
+        if 'data' not in kwargs:
+            kwargs['data'] = {}
+        per_instance_params = [
+            p for p in ['history_kwargs', 'shared_params'] if p not in kwargs
+        ]
+        dumped_params = cls.prepare_params(requester=requester, **kwargs)
+        content_types = {}
+        jobs = []
+        for instance in instances:
+            model = type(instance)
+            if model not in content_types:
+                content_types[model] = ContentType.objects.get_for_model(
+                    instance
+                )
+            params = dumped_params.copy()
+            for p in per_instance_params:
+                params[p] = {instance.pk: {}}
+            job = cls(
+                service_name=service_name,
+                username=requester.username if requester else None,
+                _dumped_params=params,
+                content_type=content_types[model],
+                object_id=instance.pk,
+                transition=transition,
+            )
+            job.job_ptr_id = job.id
+            jobs.append(job)
+        with transaction.atomic():
+            # Django doesn't support bulk_create for multi-table inheritance,
+            # so parent and child rows are inserted separately (pk of job
+            # is generated on Python side)
+            Job.objects.bulk_create(jobs)
+            cls._base_manager._insert(
+                jobs, fields=cls._meta.local_concrete_fields
+            )
+        job_ids = [job.id for job in jobs]
+
+        def enqueue():
+            if service.bulk_method:
+                chunk_size = settings.TRANSITION_ASYNC_CHUNK_SIZE
+                for i in range(0, len(job_ids), chunk_size):
+                    service.run_async_bulk(
+                        job_ids=job_ids[i:i + chunk_size]
+                    )
+            else:
+                for job_id in job_ids:
+                    service.run_async(job_id=job_id)
+        # allow worker to fetch jobs using their ids
+        transaction.on_commit(enqueue)
+        return job_ids
+
     @classmethod
     def _restore_params(cls, obj):
         params = super()._restore_params(obj)
@@ -1,9 +1,12 @@
 """
 Test asynchronous transitions
 """
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
-from django.test import RequestFactory, TransactionTestCase
+from django.test import override_settings, RequestFactory, TransactionTestCase
 
+from ralph.lib.external_services.base import InternalService
 from ralph.lib.external_services.models import JobStatus
 from ralph.lib.transitions.models import (
     run_transition,
@@ -178,3 +181,47 @@ class AsyncTransitionsTest(TransitionTestCaseMixin, TransactionTestCase):
             )
             with self.assertRaises(TransitionsHistory.DoesNotExist):
                 TransitionsHistory.objects.get(object_id=async_order.id)
+
+    @override_settings(TRANSITION_ASYNC_CHUNK_SIZE=2)
+    def test_async_transition_jobs_are_run_in_chunks(self):
+        async_orders = [
+            AsyncOrder.objects.create(name='test{}'.format(i))
+            for i in range(3)
+        ]
+        _, transition, _ = self._create_transition(
+            model=async_orders[0], name='prepare',
+            source=[OrderStatus.new.id], target=OrderStatus.to_send.id,
+            actions=['long_running_action'],
+            async_service_name='ASYNC_TRANSITIONS',
+        )
+        with patch.object(
+            InternalService, 'run_async_bulk', autospec=True,
+            side_effect=InternalService.run_async_bulk,
+        ) as run_async_bulk_mock:
+            job_ids = run_transition(
+                instances=async_orders,
+                transition_obj_or_name=transition,
+                requester=self.user,
+                field='status',
+                data={'name': 'abc'}
+            )
+        self.assertEqual(
+            [
+                call[1]['job_ids']
+                for call in run_async_bulk_mock.call_args_list
+            ],
+            [job_ids[:2], job_ids[2:]]
+        )
+        for job_id, async_order in zip(job_ids, async_orders):
+            job = TransitionJob.objects.get(pk=job_id)
+            async_order.refresh_from_db()
+            self.assertEqual(job.status, JobStatus.FINISHED.id)
+            self.assertEqual(job.obj, async_order)
+            self.assertEqual(async_order.name, 'abc')
+        self.assertEqual(
+            TransitionJob.objects.filter(pk__in=job_ids).progress(),
+            {
+                'queued': 0, 'started': 0, 'frozen': 0, 'finished': 3,
+                'failed': 0, 'killed': 0, 'total': 3,
+            }
+        )
@@ -338,6 +338,9 @@ class AsyncBulkTransitionsAwaiterView(RalphTemplateView):
             context['jobs'] = jobs
             context['are_jobs_running'] = any([j.is_running for j in jobs])
             context['for_many_objects'] = True
+            context['progress'] = TransitionJob.objects.filter(
+                pk__in=job_ids
+            ).progress()
         return context
 
 
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Index of free IP addresses in networks.
+
+Every network, which was asked for free IP, gets (in-process) bitmap of used
+addresses in its allocable range (excluding network and broadcast address and
+reserved addresses). Bitmap is built with single query and then kept current
+by IPAddress (after commit) and Network signals, so looking for next free IP
+doesn't have to fetch all used addresses from database every time.
+
+Index is only a hint - it could be out of date when IP addresses are changed
+by other processes. Reservation of IP is always confirmed by database (see
+`Network.issue_next_free_ip`) and index is rebuilt from database periodically
+(see `NETWORK_FREE_IP_INDEX_TTL` setting).
+"""
+import threading
+import time
+
+from django.conf import settings
+
+
+class FreeIPIndex(object):
+    """
+    Bitmap of used IP addresses in range `start`..`end` (inclusive).
+
+    Besides bitmap, index keeps cursor - the lowest offset which might be
+    free. Cursor only moves forward when looking for free addresses (and moves
+    back when address is released), which makes "next free" lookups O(1)
+    amortised.
+    """
+    def __init__(self, start, end, used=()):
+        self.start = start
+        self.end = end
+        self.size = max(end - start + 1, 0)
+        self.built_at = time.monotonic()
+        self._bitmap = bytearray((self.size + 7) // 8)
+        self._cursor = 0
+        self._lock = threading.Lock()
+        for number in used:
+            self._set(number, True)
+
+    def __contains__(self, number):
+        return self.start <= number <= self.end
+
+    def _set(self, number, value):
+        if number not in self:
+            return
+        offset = number - self.start
+        if value:
+            self._bitmap[offset >> 3] |= 1 << (offset & 7)
+        else:
+            self._bitmap[offset >> 3] &= ~(1 << (offset & 7))
+            self._cursor = min(self._cursor, offset)
+
+    def _is_used(self, offset):
+        return bool(self._bitmap[offset >> 3] & (1 << (offset & 7)))
+
+    def mark_used(self, number):
+        with self._lock:
+            self._set(int(number), True)
+
+    def mark_free(self, number):
+        with self._lock:
+            self._set(int(number), False)
+
+    def _find_free_offset(self, offset):
+        """
+        Return first free offset starting from `offset` or None if there
+        is no free address left. Fully used bytes are skipped at once.
+        """
+        while offset < self.size:
+            if not offset & 7 and self._bitmap[offset >> 3] == 0xff:
+                offset += 8
+                continue
+            if not self._is_used(offset):
+                return offset
+            offset += 1
+        return None
+
+    def get_free(self, limit, after=None):
+        """
+        Return list of (at most) `limit` free addresses (as ints), starting
+        from the lowest one (or the first one greater than `after`).
+
+        Addresses are not reserved - they will be marked as used, when
+        IPAddress is saved.
+        """
+        result = []
+        with self._lock:
+            if after is None:
+                offset = self._find_free_offset(self._cursor)
+                # everything below first free address is used - move cursor
+                self._cursor = self.size if offset is None else offset
+            else:
+                offset = self._find_free_offset(
+                    max(int(after) - self.start + 1, self._cursor)
+                )
+            while offset is not None and len(result) < limit:
+                result.append(self.start + offset)
+                offset = self._find_free_offset(offset + 1)
+        return result
+
+    def is_stale(self):
+        return (
+            time.monotonic() - self.built_at >
+            settings.NETWORK_FREE_IP_INDEX_TTL
+        )
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_allocable_range(network):
+    """
+    Return tuple with the first and the last IP (as int) which could be
+    assigned automatically in `network`.
+    """
+    # add one to omit network address
+    start = int(network.min_ip + 1 + network.reserved_from_beginning)
+    # subtract 1 to omit broadcast address
+    end = int(network.max_ip - 1 - network.reserved_from_end)
+    return start, end
+
+
+def build_index(network):
+    from ralph.networks.models import IPAddress
+    start, end = get_allocable_range(network)
+    used = IPAddress.objects.filter(
+        number__range=(start, end)
+    ).values_list('number', flat=True)
+    return FreeIPIndex(start, end, used=(int(number) for number in used))
+
+
+def get_index(network):
+    """
+    Return (possibly cached) index of free IPs for `network`, or None if
+    network is too big to be indexed.
+    """
+    start, end = get_allocable_range(network)
+    if end - start + 1 > settings.NETWORK_FREE_IP_INDEX_MAX_SIZE:
+        return None
+    index = _indexes.get(network.pk)
+    if (
+        index is None or index.is_stale() or
+        (index.start, index.end) != (start, end)
+    ):
+        index = build_index(network)
+        if network.pk:
+            with _indexes_lock:
+                _indexes[network.pk] = index
+    return index
+
+
+def invalidate_index(network_id):
+    with _indexes_lock:
+        _indexes.pop(network_id, None)
+
+
+def clear_indexes():
+    with _indexes_lock:
+        _indexes.clear()
+
+
+def mark_used(number):
+    for index in list(_indexes.values()):
+        if number in index:
+            index.mark_used(number)
+
+
+def mark_free(number):
+    for index in list(_indexes.values()):
+        if number in index:
+            index.mark_free(number)
@@ -1,13 +1,20 @@
 # -*- coding: utf-8 -*-
 import ipaddress
 import logging
+import re
 import socket
 import struct
+from functools import partial
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models, transaction
-from django.db.models.signals import post_migrate, pre_save
+from django.db import IntegrityError, models, transaction
+from django.db.models.signals import (
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_save
+)
 from django.db.utils import ProgrammingError
 from django.dispatch import receiver
 from django.utils.translation import ugettext_lazy as _
@@ -28,20 +35,32 @@ from ralph.lib.mixins.models import (
     TimeStampMixin
 )
 from ralph.lib.polymorphic.fields import PolymorphicManyToManyField
+from ralph.networks import free_ips, networks_index
 from ralph.networks.fields import IPNetwork
 from ralph.networks.models.choices import IPAddressStatus
+from ralph.networks.reparenting import reassign_parents
 
 logger = logging.getLogger(__name__)
 
 
-def is_in_dnsaas(ip):
-    if not settings.ENABLE_DNSAAS_INTEGRATION:
-        return False
+def get_ips_in_dnsaas(ips):
+    """
+    Return set of addresses (as strings) from `ips` which have A record in
+    DNSaaS. All addresses are checked using single API call.
+    """
+    if not settings.ENABLE_DNSAAS_INTEGRATION or not ips:
+        return set()
     dnsaas_client = DNSaaS()
     url = dnsaas_client.build_url(
-        'records', get_params=[('ip', ip), ('type', 'A')]
+        'records', get_params=[('ip', str(ip)) for ip in ips] + [('type', 'A')]
     )
-    return len(dnsaas_client.get_api_result(url)) > 0
+    return {
+        record['content'] for record in dnsaas_client.get_api_result(url)
+    }
+
+
+def is_in_dnsaas(ip):
+    return str(ip) in get_ips_in_dnsaas([ip])
 
 
 class NetworkKind(AdminAbsoluteUrlMixin, NamedMixin, models.Model):
@@ -130,65 +149,96 @@ class NetworkEnvironment(
                     self.hostname_template_prefix,
                     self.hostname_template_postfix,
                     self.hostname_template_counter_length,
-                    self.check_hostname_is_available
+                    self.get_taken_hostnames
             )
         else:
             result = self.next_hostname_without_model_counter()
         return result
 
+    def get_taken_hostnames(self, hostnames):
+        """
+        Return these of `hostnames` which are already used by any of
+        `HOSTNAME_MODELS` (using single query).
+        """
+        querysets = [
+            model_class.objects.filter(
+                hostname__in=hostnames
+            ).order_by().values_list('hostname', flat=True)
+            for model_class in self.HOSTNAME_MODELS
+        ]
+        return set(querysets[0].union(*querysets[1:]))
+
     def check_hostname_is_available(self, hostname):
 
         if not hostname:
             return False
 
-        for model_class in self.HOSTNAME_MODELS:
-            if model_class.objects.filter(hostname=hostname).exists():
-                return False
-
-        return True
+        return not self.get_taken_hostnames([hostname])
 
     def issue_next_free_hostname(self):
         """
         Retrieve and reserve next free hostname
         """
-        if self.use_hostname_counter:
-            hostname = None
-
-            while not self.check_hostname_is_available(hostname):
-                hostname = AssetLastHostname.increment_hostname(
-                    self.hostname_template_prefix,
-                    self.hostname_template_postfix,
-                ).formatted_hostname(self.hostname_template_counter_length)
+        return self.issue_next_free_hostnames(1)[0]
 
-            return hostname
+    def issue_next_free_hostnames(self, count):
+        """
+        Retrieve and reserve `count` next free hostnames (ex. for mass
+        deployment).
 
-        return self.next_hostname_without_model_counter()
+        Returns:
+            list of hostnames
+        """
+        if self.use_hostname_counter:
+            return AssetLastHostname.reserve_hostnames(
+                self.hostname_template_prefix,
+                self.hostname_template_postfix,
+                count,
+                self.hostname_template_counter_length,
+                self.get_taken_hostnames,
+            )
+        hostname = AssetLastHostname(
+            prefix=self.hostname_template_prefix,
+            postfix=self.hostname_template_postfix
+        )
+        counter = self.next_counter_without_model()
+        return [
+            hostname.formatted_hostname(
+                self.hostname_template_counter_length, counter + i
+            )
+            for i in range(count)
+        ]
 
     def current_counter_without_model(self):
         """
-        Return current counter based on already added hostnames
+        Return current counter based on already added hostnames (using single
+        query for all `HOSTNAME_MODELS`)
 
         Returns:
             counter int
         """
-        start = len(self.hostname_template_prefix)
-        stop = -len(self.hostname_template_postfix)
-        hostnames = []
-        for model_class in self.HOSTNAME_MODELS:
-            item = model_class.objects.filter(
-                hostname__iregex='{}[0-9]+{}'.format(
-                    self.hostname_template_prefix,
-                    self.hostname_template_postfix
-                )
-            ).order_by('-hostname').first()
-            if item and item.hostname:
-                hostnames.append(item.hostname[start:stop])
-        counter = 0
-        if hostnames:
-            # queryset guarantees that hostnames are valid number
-            # therefore we can skip ValueError
-            counter = int(sorted(hostnames, reverse=True)[0])
-        return counter
+        prefix = self.hostname_template_prefix
+        postfix = self.hostname_template_postfix
+        # prefix lookup could use index on hostname - regex is evaluated only
+        # for hostnames starting with prefix
+        querysets = [
+            model_class.objects.filter(
+                hostname__istartswith=prefix,
+                hostname__iendswith=postfix,
+                hostname__iregex='^{}[0-9]+{}$'.format(
+                    re.escape(prefix), re.escape(postfix)
+                ),
+            ).order_by().values_list('hostname', flat=True)
+            for model_class in self.HOSTNAME_MODELS
+        ]
+        hostname = querysets[0].union(*querysets[1:]).order_by(
+            '-hostname'
+        ).first()
+        if not hostname:
+            return 0
+        # queryset guarantees that hostname contains valid number
+        # therefore we can skip ValueError
+        return int(hostname[len(prefix):len(hostname) - len(postfix)])
 
     def next_counter_without_model(self):
         """
@@ -437,15 +487,7 @@ class Network(
             'update_subnetworks_parent', True
         )
         creating = not self.pk
-        # store previous subnetworks to update them when address has changed
-        if (
-            self._has_address_changed and
-            update_subnetworks_parent and
-            not creating
-        ):
-            prev_subnetworks = self.get_immediate_subnetworks()
-        else:
-            prev_subnetworks = []
+        prev_min_ip, prev_max_ip = self.min_ip, self.max_ip
 
         self.min_ip = int(self.network_address)
         self.max_ip = int(self.broadcast_address)
@@ -454,13 +496,10 @@ class Network(
 
         # change related ips and (sub)networks only if address has changed
         if self._has_address_changed or creating:
-            # after changing address, assign new ips to this network
-            self._assign_new_ips_to_network()
-            # change also ip addresses which are no longer in scope of current
-            # network
-            self._unassign_ips_from_network()
-            if update_subnetworks_parent:
-                self._update_subnetworks_parent(prev_subnetworks)
+            self._reassign_parents(
+                prev_min_ip, prev_max_ip,
+                update_networks=update_subnetworks_parent,
+            )
 
     def delete(self):
         # Save fake address so that all children of network changed its
@@ -470,58 +509,25 @@ class Network(
             self.save()
             super().delete()
 
-    def _update_subnetworks_parent(self, prev_subnetworks):
-        """
-        When address change, update information about parent in previous and
-        current subnetworks.
+    def _reassign_parents(self, prev_min_ip, prev_max_ip, update_networks):
         """
-        # re-save previous subnetworks
-        for network in prev_subnetworks:
-            network.save(update_subnetworks_parent=False)
-        # re-save current subnetworks
-        for network in self.get_immediate_subnetworks():
-            network.save(update_subnetworks_parent=False)
-        # current network is intermediate network between previous parent and
-        # previous child - re-save child to assign current network as a parent
-        # example:
-        # previous state:
-        # * netX: 10.20.30.0/24 (parent)
-        # * netY: 10.20.30.240/28 (child)
-        # adding new network netZ 10.20.30.128/25
-        # -> should change parent of netY to netZ
-        for network in self.__class__._default_manager.filter(
-            parent=self.parent, min_ip__gte=self.min_ip, max_ip__lte=self.max_ip
-        ):
-            network.save(update_subnetworks_parent=False)
+        Recalculate (in bulk) parent of networks and IP addresses in scope of
+        previous and current address of this network.
 
-    def _assign_new_ips_to_network(self):
-        """
-        Filter IP addresses in scope of this network and save them, to
-        (possibly) assign them to current network (according to rules in
-        IPAddress.save)
-        """
-        for ip in IPAddress.objects.exclude(
-            network=self,
-        ).exclude(
-            network__in=self.get_subnetworks()
-        ).filter(
-            number__gte=self.min_ip,
-            number__lte=self.max_ip
-        ):
-            # call save instead of update - ip might be assigned to another
-            # (smaller) network, which became subnetwork of current network
-            ip.save()
-
-    def _unassign_ips_from_network(self):
-        """
-        Filter IPAddresses which are assigned to current network, but should
-        NOT be (their address is not in scope of current network) and save them
-        (to reassign them to another network).
+        Example:
+        previous state:
+        * netX: 10.20.30.0/24 (parent)
+        * netY: 10.20.30.240/28 (child)
+        adding new network netZ 10.20.30.128/25
+        -> changes parent of netY to netZ
         """
-        for ip in IPAddress.objects.filter(
-            network=self, number__lt=self.min_ip, number__gt=self.max_ip
-        ):
-            ip.save()
+        ranges = [(self.min_ip, self.max_ip)]
+        if prev_min_ip is not None and prev_max_ip is not None:
+            ranges.append((prev_min_ip, prev_max_ip))
+        reassign_parents(ranges, update_networks=update_networks)
+        if update_networks:
+            # tree could be rebuilt - refresh MPTT fields of this network
+            self._mptt_refresh()
 
     def get_subnetworks(self):
         return self.get_descendants()
@@ -529,31 +535,82 @@ class Network(
     def get_immediate_subnetworks(self):
         return self.get_children()
 
-    def get_first_free_ip(self):
-        used_ips = set(IPAddress.objects.filter(
-            number__range=(self.min_ip, self.max_ip)
-        ).values_list(
-            'number', flat=True
-        ))
-        # add one to omit network address
-        min_ip = int(self.min_ip + 1 + self.reserved_from_beginning)
-        # subtract 1 to omit broadcast address
-        max_ip = int(self.max_ip - 1 - self.reserved_from_end)
-        free_ip_as_int = None
-        for free_ip_as_int in range(min_ip, max_ip + 1):
-            if free_ip_as_int not in used_ips:
-                next_free_ip = ipaddress.ip_address(free_ip_as_int)
-                if is_in_dnsaas(next_free_ip):
+    def _get_free_ip_candidates(self):
+        """
+        Yield (in batches) free IP numbers from this network, without checking
+        them in DNSaaS.
+        """
+        batch_size = settings.NETWORK_FREE_IP_DNSAAS_BATCH_SIZE
+        index = free_ips.get_index(self)
+        if index is None:
+            # network too big to be indexed - scan used addresses directly
+            min_ip, max_ip = free_ips.get_allocable_range(self)
+            used_ips = set(IPAddress.objects.filter(
+                number__range=(min_ip, max_ip)
+            ).values_list(
+                'number', flat=True
+            ))
+            batch = []
+            for free_ip_as_int in range(min_ip, max_ip + 1):
+                if free_ip_as_int not in used_ips:
+                    batch.append(free_ip_as_int)
+                    if len(batch) == batch_size:
+                        yield batch
+                        batch = []
+            if batch:
+                yield batch
+            return
+        batch = index.get_free(batch_size)
+        while batch:
+            yield batch
+            batch = index.get_free(batch_size, after=batch[-1])
+
+    def _iter_free_ips(self):
+        """
+        Yield free IP addresses from this network (skipping addresses already
+        present in DNSaaS).
+        """
+        for batch in self._get_free_ip_candidates():
+            candidates = [ipaddress.ip_address(ip) for ip in batch]
+            in_dnsaas = get_ips_in_dnsaas(candidates)
+            for next_free_ip in candidates:
+                if str(next_free_ip) in in_dnsaas:
                     logger.warning(
                         'IP %s is already in DNS', next_free_ip
                     )
                 else:
-                    return next_free_ip
+                    yield next_free_ip
+
+    def get_first_free_ip(self):
+        return next(self._iter_free_ips(), None)
 
     def issue_next_free_ip(self):
-        # TODO: exception when any free IP found
-        ip_address = self.get_first_free_ip()
-        return IPAddress.objects.create(address=str(ip_address))
+        """
+        Reserve (create) first free IP address in this network.
+
+        Concurrent calls for the same network are serialized by lock on
+        network row. If address has been taken meanwhile by another process
+        (which is not reflected in local free IPs index), the next one is
+        tried.
+        """
+        with transaction.atomic():
+            list(
+                Network.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values_list('pk', flat=True)
+            )
+            for ip_address in self._iter_free_ips():
+                try:
+                    with transaction.atomic():
+                        return IPAddress.objects.create(
+                            address=str(ip_address)
+                        )
+                except IntegrityError:
+                    logger.warning(
+                        'IP %s has been already taken', ip_address
+                    )
+                    free_ips.mark_used(int(ip_address))
+        raise ValueError('No free IP address in network {}'.format(self))
 
     def search_networks(self):
         """
@@ -789,6 +846,25 @@ class IPAddress(
             self.ethernet = eth
             self.save()
 
+    def _assign_parent(self):
+        if not networks_index.is_enabled():
+            return super()._assign_parent()
+        network_id = networks_index.get_network_id(int(self.ip))
+        if network_id != self.network_id:
+            self.network_id = network_id
+            # drop previously cached network object
+            network_field = self._meta.get_field('network')
+            if network_field.is_cached(self):
+                network_field.delete_cached_value(self)
+
+    def get_network(self):
+        if not networks_index.is_enabled():
+            return super().get_network()
+        network_id = networks_index.get_network_id(int(self.ip))
+        if network_id is None:
+            return None
+        return Network.objects.filter(pk=network_id).first()
+
     def search_networks(self):
         """
         Search networks (ancestors) order first by min_ip descending,
@@ -834,3 +910,37 @@ def update_counter(sender, instance, **kwargs):
                 'counter': instance.current_counter_without_model(),
             }
         )
+
+
+# free IPs index is updated after commit, so addresses saved (or deleted) in
+# transaction which is rolled back don't stay marked as used (or free)
+@receiver(post_save, sender=IPAddress)
+def update_free_ips_index_on_ip_save(sender, instance, **kwargs):
+    previous_number = instance._previous_state.get('number')
+    if previous_number is not None and previous_number != instance.number:
+        transaction.on_commit(
+            partial(free_ips.mark_free, int(previous_number))
+        )
+    transaction.on_commit(partial(free_ips.mark_used, int(instance.number)))
+
+
+@receiver(post_delete, sender=IPAddress)
+def update_free_ips_index_on_ip_delete(sender, instance, **kwargs):
+    transaction.on_commit(partial(free_ips.mark_free, int(instance.number)))
+
+
+@receiver(post_save, sender=Network)
+@receiver(post_delete, sender=Network)
+def invalidate_free_ips_index(sender, instance, **kwargs):
+    free_ips.invalidate_index(instance.pk)
+
+
+@receiver(post_save, sender=Network)
+def invalidate_networks_index_on_save(sender, instance, created, **kwargs):
+    if created or instance._has_address_changed:
+        networks_index.invalidate()
+
+
+@receiver(post_delete, sender=Network)
+def invalidate_networks_index_on_delete(sender, instance, **kwargs):
+    networks_index.invalidate()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+In-process index of all networks, answering "which is the smallest network
+containing this IP" in O(log n), without querying the database.
+
+Index is built with single query (only ids and ranges of networks are
+fetched) and rebuilt when any network is created, deleted or its address
+changes. Version of the index is kept in Django cache, so changes made by one
+process invalidate indexes in all processes - that's why index is used only
+when cache is shared between processes (Redis in production).
+
+Index built while current transaction has uncommitted changes of networks is
+not cached (it would be stale if the transaction is rolled back).
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from ralph.lib.cache import (
+    bump_cache_generation,
+    get_cache_generation,
+    is_shared_cache
+)
+from ralph.networks.reparenting import NetworksLayout
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = 'ralph_networks_index_version'
+
+
+class _IndexState(object):
+    layout = None
+    version = None
+    built_at = 0
+
+
+_state = _IndexState()
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def is_enabled():
+    return settings.NETWORKS_INDEX_ENABLED and is_shared_cache()
+
+
+def _get_shared_version():
+    return get_cache_generation(VERSION_CACHE_KEY)
+
+
+def _bump_shared_version():
+    bump_cache_generation(VERSION_CACHE_KEY)
+
+
+def _has_pending_changes():
+    """
+    Return True if networks were changed in current (not committed yet)
+    transaction.
+    """
+    if not getattr(_local, 'pending', False):
+        return False
+    if not transaction.get_connection().in_atomic_block:
+        # transaction with changes was rolled back
+        _local.pending = False
+        return False
+    return True
+
+
+def _on_commit():
+    _local.pending = False
+    _bump_shared_version()
+
+
+def _build_layout():
+    from ralph.networks.models import Network
+    return NetworksLayout(
+        (pk, int(min_ip), int(max_ip))
+        for pk, min_ip, max_ip in Network.objects.values_list(
+            'pk', 'min_ip', 'max_ip'
+        )
+    )
+
+
+def get_layout():
+    """
+    Return (current) layout of all networks.
+    """
+    # version has to be fetched before building the index - if it'll change
+    # during building, index will be rebuilt next time
+    version = _get_shared_version()
+    if _has_pending_changes():
+        # don't cache index with uncommitted changes
+        return _build_layout()
+    with _lock:
+        if (
+            _state.layout is None or
+            _state.version != version or
+            time.monotonic() - _state.built_at > settings.NETWORKS_INDEX_TTL
+        ):
+            logger.debug('Rebuilding networks index')
+            _state.layout = _build_layout()
+            _state.version = version
+            _state.built_at = time.monotonic()
+        return _state.layout
+
+
+def get_network_id(number):
+    """
+    Return id of the smallest network containing IP `number` (as int) or
+    None if IP doesn't belong to any network.
+    """
+    return get_layout().get_network_id(int(number))
+
+
+def invalidate():
+    """
+    Invalidate index in current process (immediately) and in other processes
+    (after commit of current transaction, so they don't rebuild the index
+    without changes made in this transaction).
+    """
+    with _lock:
+        _state.layout = None
+    if transaction.get_connection().in_atomic_block:
+        _local.pending = True
+    transaction.on_commit(_on_commit)
+
+
+def reset():
+    """
+    Drop index of current process (ex. between tests).
+    """
+    with _lock:
+        _state.layout = None
+        _state.version = None
+    _local.pending = False
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Set-based reassignment of parent networks.
+
+When network is created or its address changes, parent of every network and
+IP address in scope of (old and new) address of this network has to be
+recalculated. Instead of saving every affected object (which runs
+`search_networks` and MPTT update for every one of them), networks in
+affected range are fetched with single query, parent of every network and IP
+is calculated in memory, and the result is applied using bulk updates and
+single MPTT rebuild of touched trees.
+"""
+import logging
+from bisect import bisect_right
+from collections import defaultdict
+
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from ralph.networks.signals import ips_network_changed, networks_parent_changed
+
+logger = logging.getLogger(__name__)
+
+UPDATE_CHUNK_SIZE = 1000
+
+
+class NetworksLayout(object):
+    """
+    In-memory layout of (nested) networks.
+
+    Networks are passed as `(id, min_ip, max_ip)` tuples. Since IP networks
+    are either nested or disjoint, single sweep over networks sorted by
+    `min_ip` (and `max_ip` descending) gives parent (the smallest containing
+    network) of every network and division of whole range into segments
+    owned by the smallest network containing them.
+    """
+    def __init__(self, networks):
+        self.parents = {}
+        self._starts = []
+        self._owners = []
+        stack = []
+        for net_id, min_ip, max_ip in sorted(
+            networks, key=lambda n: (n[1], -n[2])
+        ):
+            # close networks which end before current one
+            while stack and stack[-1][1] < min_ip:
+                self._close(stack)
+            self.parents[net_id] = stack[-1][0] if stack else None
+            self._add_segment(min_ip, net_id)
+            stack.append((net_id, max_ip))
+        while stack:
+            self._close(stack)
+
+    def _close(self, stack):
+        _, max_ip = stack.pop()
+        self._add_segment(max_ip + 1, stack[-1][0] if stack else None)
+
+    def _add_segment(self, start, owner):
+        if self._starts and self._starts[-1] == start:
+            self._owners[-1] = owner
+        else:
+            self._starts.append(start)
+            self._owners.append(owner)
+
+    def get_network_id(self, number):
+        """
+        Return id of the smallest network containing IP `number` (or None).
+        """
+        index = bisect_right(self._starts, number) - 1
+        if index < 0:
+            return None
+        return self._owners[index]
+
+
+def _chunks(items, size=UPDATE_CHUNK_SIZE):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _group_by_value(changes):
+    grouped = defaultdict(list)
+    for pk, value in changes.items():
+        grouped[value].append(pk)
+    return grouped
+
+
+def _rebuild_trees(network_model, layout, old_tree_ids, changed_networks):
+    """
+    Rebuild MPTT trees touched by parent changes.
+
+    Networks which became roots get new tree ids; then every tree containing
+    (currently or previously) changed network is rebuilt.
+    """
+    manager = network_model._tree_manager
+    new_roots = [
+        pk for pk, parent_id in changed_networks.items() if parent_id is None
+    ]
+    if new_roots:
+        next_tree_id = (
+            network_model._default_manager.aggregate(
+                max_tree_id=Max('tree_id')
+            )['max_tree_id'] or 0
+        ) + 1
+        for tree_id, pk in enumerate(new_roots, start=next_tree_id):
+            network_model._default_manager.filter(pk=pk).update(
+                tree_id=tree_id
+            )
+    roots = set()
+    for pk in changed_networks:
+        while layout.parents.get(pk) is not None:
+            pk = layout.parents[pk]
+        roots.add(pk)
+    tree_ids = set(old_tree_ids) | set(
+        network_model._default_manager.filter(
+            pk__in=roots
+        ).values_list('tree_id', flat=True)
+    )
+    for tree_id in sorted(tree_ids):
+        manager.partial_rebuild(tree_id)
+
+
+def reassign_parents(ranges, update_networks=True):
+    """
+    Recalculate parent network of every network (if `update_networks` is
+    True) and every IP address in `ranges` (list of `(min_ip, max_ip)`
+    tuples).
+
+    Changed objects are updated in bulk (post_save is not sent for them -
+    `networks_parent_changed` and `ips_network_changed` signals are sent
+    instead).
+    """
+    from ralph.networks.models import IPAddress, Network
+    ranges = [(int(min_ip), int(max_ip)) for min_ip, max_ip in ranges]
+    networks_query = Q()
+    ips_query = Q()
+    for min_ip, max_ip in ranges:
+        # every network containing any object in range overlaps this range
+        networks_query |= Q(min_ip__lte=max_ip, max_ip__gte=min_ip)
+        ips_query |= Q(number__range=(min_ip, max_ip))
+    networks = list(Network.objects.filter(networks_query).values_list(
+        'pk', 'min_ip', 'max_ip', 'parent_id', 'tree_id'
+    ))
+    layout = NetworksLayout(
+        (pk, int(net_min), int(net_max))
+        for pk, net_min, net_max, _, _ in networks
+    )
+    now = timezone.now()
+
+    changed_networks = {}
+    old_tree_ids = set()
+    if update_networks:
+        for pk, _, _, parent_id, tree_id in networks:
+            new_parent_id = layout.parents[pk]
+            if new_parent_id != parent_id:
+                changed_networks[pk] = new_parent_id
+                old_tree_ids.add(tree_id)
+        for parent_id, pks in _group_by_value(changed_networks).items():
+            for chunk in _chunks(pks):
+                Network.objects.filter(pk__in=chunk).update(
+                    parent_id=parent_id, modified=now
+                )
+        if changed_networks:
+            _rebuild_trees(Network, layout, old_tree_ids, changed_networks)
+
+    changed_ips = {}
+    for pk, number, network_id in IPAddress.objects.filter(
+        ips_query
+    ).values_list('pk', 'number', 'network_id').iterator():
+        new_network_id = layout.get_network_id(int(number))
+        if new_network_id != network_id:
+            changed_ips[pk] = new_network_id
+    for network_id, pks in _group_by_value(changed_ips).items():
+        for chunk in _chunks(pks):
+            IPAddress.objects.filter(pk__in=chunk).update(
+                network_id=network_id, modified=now
+            )
+    logger.debug(
+        'Reassigned parent of %d networks and %d IPs in ranges %s',
+        len(changed_networks), len(changed_ips), ranges
+    )
+    if changed_networks:
+        networks_parent_changed.send(
+            sender=Network, network_ids=list(changed_networks)
+        )
+    if changed_ips:
+        ips_network_changed.send(sender=IPAddress, ip_ids=list(changed_ips))
+    return changed_networks, changed_ips
@@ -0,0 +1,12 @@
+from django.dispatch import Signal
+
+
+# This signal is sent when parent of networks has been changed in bulk (see
+# `ralph.networks.reparenting.reassign_parents`). `post_save` is not sent for
+# these networks.
+networks_parent_changed = Signal(providing_args=['network_ids'])
+
+# This signal is sent when network of IP addresses has been changed in bulk
+# (see `ralph.networks.reparenting.reassign_parents`). `post_save` is not sent
+# for these IP addresses.
+ips_network_changed = Signal(providing_args=['ip_ids'])
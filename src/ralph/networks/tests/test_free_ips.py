@@ -0,0 +1,166 @@
+import os
+import time
+import unittest
+from ipaddress import ip_address
+from unittest.mock import patch
+
+from django.db import transaction
+from django.test import (
+    override_settings,
+    SimpleTestCase,
+    TransactionTestCase
+)
+
+from ralph.networks import free_ips
+from ralph.networks.free_ips import FreeIPIndex
+from ralph.networks.models.networks import IPAddress, Network
+
+
+class FreeIPIndexTest(SimpleTestCase):
+    def test_get_free_skips_used(self):
+        index = FreeIPIndex(10, 20, used=[10, 11, 13])
+        self.assertEqual(index.get_free(3), [12, 14, 15])
+
+    def test_get_free_after(self):
+        index = FreeIPIndex(10, 20, used=[10, 11, 13])
+        self.assertEqual(index.get_free(2, after=14), [15, 16])
+
+    def test_get_free_when_full(self):
+        index = FreeIPIndex(10, 12, used=[10, 11, 12])
+        self.assertEqual(index.get_free(1), [])
+
+    def test_get_free_when_empty_range(self):
+        index = FreeIPIndex(10, 9)
+        self.assertEqual(index.get_free(1), [])
+
+    def test_mark_used_and_free(self):
+        index = FreeIPIndex(0, 100)
+        for number in range(0, 50):
+            index.mark_used(number)
+        self.assertEqual(index.get_free(1), [50])
+        index.mark_free(17)
+        self.assertEqual(index.get_free(2), [17, 50])
+
+    def test_mark_out_of_range_is_ignored(self):
+        index = FreeIPIndex(10, 20)
+        index.mark_used(9)
+        index.mark_used(21)
+        self.assertEqual(index.get_free(1), [10])
+
+    @override_settings(NETWORK_FREE_IP_INDEX_TTL=10)
+    def test_is_stale(self):
+        index = FreeIPIndex(10, 20)
+        self.assertFalse(index.is_stale())
+        index.built_at -= 11
+        self.assertTrue(index.is_stale())
+
+
+# free IPs index is updated after commit
+class NetworkFreeIPIndexTest(TransactionTestCase):
+    def setUp(self):
+        free_ips.clear_indexes()
+        self.net = Network.objects.create(
+            address='10.20.30.0/29',
+            reserved_from_beginning=0,
+            reserved_from_end=0,
+        )
+
+    def assertFirstFree(self, address):
+        self.assertEqual(self.net.get_first_free_ip(), ip_address(address))
+
+    def test_index_is_updated_on_ip_save(self):
+        self.assertFirstFree('10.20.30.1')
+        IPAddress.objects.create(address='10.20.30.1')
+        self.assertFirstFree('10.20.30.2')
+
+    def test_index_is_updated_on_ip_delete(self):
+        ip = IPAddress.objects.create(address='10.20.30.1')
+        self.assertFirstFree('10.20.30.2')
+        ip.delete()
+        self.assertFirstFree('10.20.30.1')
+
+    def test_index_is_updated_on_ip_address_change(self):
+        ip = IPAddress.objects.create(address='10.20.30.1')
+        self.assertFirstFree('10.20.30.2')
+        ip = IPAddress.objects.get(pk=ip.pk)
+        ip.address = '10.20.30.2'
+        ip.save()
+        self.assertFirstFree('10.20.30.1')
+
+    def test_index_is_not_updated_on_rollback(self):
+        self.assertFirstFree('10.20.30.1')
+        try:
+            with transaction.atomic():
+                IPAddress.objects.create(address='10.20.30.1')
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertFirstFree('10.20.30.1')
+
+    def test_index_is_invalidated_on_network_change(self):
+        self.net.get_first_free_ip()
+        self.net.reserved_from_beginning = 2
+        self.net.save()
+        self.assertFirstFree('10.20.30.3')
+
+    def test_issue_next_free_ip(self):
+        ip = self.net.issue_next_free_ip()
+        self.assertEqual(ip.address, '10.20.30.1')
+        ip = self.net.issue_next_free_ip()
+        self.assertEqual(ip.address, '10.20.30.2')
+
+    def test_issue_next_free_ip_with_stale_index(self):
+        self.net.get_first_free_ip()
+        # bypass signals to simulate address taken by another process
+        IPAddress.objects.bulk_create([
+            IPAddress(address='10.20.30.1', number=169090561)
+        ])
+        ip = self.net.issue_next_free_ip()
+        self.assertEqual(ip.address, '10.20.30.2')
+
+    def test_issue_next_free_ip_when_network_is_full(self):
+        for i in range(1, 7):
+            IPAddress.objects.create(address='10.20.30.{}'.format(i))
+        with self.assertRaises(ValueError):
+            self.net.issue_next_free_ip()
+
+    def test_dnsaas_is_queried_in_batches(self):
+        with patch(
+            'ralph.networks.models.networks.get_ips_in_dnsaas',
+            side_effect=lambda ips: {str(ip) for ip in ips}
+        ) as get_ips_in_dnsaas_mock:
+            with override_settings(NETWORK_FREE_IP_DNSAAS_BATCH_SIZE=4):
+                self.assertIsNone(self.net.get_first_free_ip())
+        self.assertEqual(get_ips_in_dnsaas_mock.call_count, 2)
+
+    @override_settings(NETWORK_FREE_IP_INDEX_MAX_SIZE=2)
+    def test_get_first_free_ip_without_index(self):
+        IPAddress.objects.create(address='10.20.30.1')
+        self.assertFirstFree('10.20.30.2')
+
+
+@unittest.skipUnless(
+    os.environ.get('RALPH_BENCHMARK'), 'set RALPH_BENCHMARK to run benchmarks'
+)
+class FreeIPAllocationBenchmark(TransactionTestCase):
+    """
+    Allocate 10k addresses in /16 network.
+
+    Run with:
+    RALPH_BENCHMARK=1 test_ralph test ralph.networks.tests.test_free_ips
+    """
+    allocations = 10000
+
+    def test_allocate_addresses_in_slash_16(self):
+        free_ips.clear_indexes()
+        net = Network.objects.create(address='10.0.0.0/16')
+        start = time.time()
+        for _ in range(self.allocations):
+            net.issue_next_free_ip()
+        elapsed = time.time() - start
+        print('\nAllocated {} addresses in {:.2f}s ({:.0f}/s)'.format(  # noqa
+            self.allocations, elapsed, self.allocations / elapsed
+        ))
+        self.assertEqual(
+            IPAddress.objects.filter(network=net).count(), self.allocations
+        )
@@ -226,12 +226,13 @@ class NetworkTest(RalphTestCase):
         self, network_addr, dnsaas_enabled, records, first_free
     ):
 
-        def is_in_dnsaas_mocked(ip):
+        def get_ips_in_dnsaas_mocked(ips):
             if not dnsaas_enabled:
-                return False
-            return str(ip) in records
+                return set()
+            return {str(ip) for ip in ips} & set(records)
         patcher = patch(
-            'ralph.networks.models.networks.is_in_dnsaas', is_in_dnsaas_mocked
+            'ralph.networks.models.networks.get_ips_in_dnsaas',
+            get_ips_in_dnsaas_mocked
         )
         net = Network.objects.create(
             address=network_addr,
@@ -387,6 +388,66 @@ class NetworkEnvironmentTest(RalphTestCase):
         self.assertEqual(ne.issue_next_free_hostname(), 's12399999.dc.local')
         self.assertEqual(ne.issue_next_free_hostname(), 's123100000.dc.local')
 
+    def test_issue_next_hostnames(self):
+        DataCenterAssetFactory(hostname='s12300002.dc.local')
+        VirtualServerFactory(hostname='s12300004.dc.local')
+        ne = NetworkEnvironmentFactory(
+            hostname_template_prefix='s123',
+            hostname_template_postfix='.dc.local',
+            hostname_template_counter_length=5,
+        )
+        self.assertEqual(ne.issue_next_free_hostnames(3), [
+            's12300001.dc.local', 's12300003.dc.local', 's12300005.dc.local',
+        ])
+        self.assertEqual(ne.issue_next_free_hostname(), 's12300006.dc.local')
+        self.assertEqual(
+            AssetLastHostname.objects.get(
+                prefix='s123', postfix='.dc.local'
+            ).counter,
+            6
+        )
+
+    def test_issue_next_hostnames_checks_taken_hostnames_in_batches(self):
+        for i in range(1, 11):
+            ClusterFactory(hostname='s123{:05}.dc.local'.format(i))
+        ne = NetworkEnvironmentFactory(
+            hostname_template_prefix='s123',
+            hostname_template_postfix='.dc.local',
+            hostname_template_counter_length=5,
+        )
+        with patch.object(
+            ne, 'get_taken_hostnames', wraps=ne.get_taken_hostnames
+        ) as get_taken_hostnames_mock:
+            hostnames = ne.issue_next_free_hostnames(2)
+        self.assertEqual(
+            hostnames, ['s12300011.dc.local', 's12300012.dc.local']
+        )
+        self.assertEqual(get_taken_hostnames_mock.call_count, 1)
+
+    def test_issue_next_hostnames_without_counter(self):
+        DataCenterAssetFactory(hostname='s12300007.dc.local')
+        ne = NetworkEnvironmentFactory(
+            hostname_template_prefix='s123',
+            hostname_template_postfix='.dc.local',
+            hostname_template_counter_length=5,
+            use_hostname_counter=False,
+        )
+        self.assertEqual(ne.issue_next_free_hostnames(2), [
+            's12300008.dc.local', 's12300009.dc.local',
+        ])
+
+    def test_get_taken_hostnames(self):
+        hostnames = ['s1230000{}.dc.local'.format(i) for i in range(5)]
+        ClusterFactory(hostname=hostnames[0])
+        DataCenterAssetFactory(hostname=hostnames[1])
+        IPAddressFactory(hostname=hostnames[2])
+        VirtualServerFactory(hostname=hostnames[2])
+        ne = NetworkEnvironmentFactory()
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                ne.get_taken_hostnames(hostnames), set(hostnames[:3])
+            )
+
     def test_get_next_hostname(self):
         ne = NetworkEnvironmentFactory(
             hostname_template_prefix='s123',
@@ -474,6 +535,23 @@ class NetworkEnvironmentTest(RalphTestCase):
 
         self.assertEqual(network_env.next_free_hostname, ok_next_hostname)
 
+    def test_current_counter_without_model(self):
+        ClusterFactory(hostname='s12300003.dc.local')
+        DataCenterAssetFactory(hostname='s12300007.dc.local')
+        IPAddressFactory(hostname='s12300005.dc.local')
+        VirtualServerFactory(hostname='s12300001.dc.local')
+        # hostnames only containing template are not considered
+        DataCenterAssetFactory(hostname='xs12300099.dc.local')
+        VirtualServerFactory(hostname='s12300098.dc.local.old')
+        ne = NetworkEnvironmentFactory(
+            hostname_template_prefix='s123',
+            hostname_template_postfix='.dc.local',
+            hostname_template_counter_length=5,
+            use_hostname_counter=False,
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(ne.current_counter_without_model(), 7)
+
     def test_should_pass_non_integer_counter(self):
         prefix = 't4'
         postfix = '.dc.local'
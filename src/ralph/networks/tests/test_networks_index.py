@@ -0,0 +1,120 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import override_settings, TransactionTestCase
+
+from ralph.networks import networks_index
+from ralph.networks.models.networks import IPAddress, Network
+
+
+class NetworksIndexTest(TransactionTestCase):
+    def setUp(self):
+        networks_index.reset()
+        cache.delete(networks_index.VERSION_CACHE_KEY)
+        # index is used only with cache shared between processes
+        patcher = patch.object(
+            networks_index, 'is_shared_cache', return_value=True
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(networks_index.reset)
+        self.net = Network.objects.create(
+            name='net', address='10.20.30.0/24'
+        )
+        self.subnet = Network.objects.create(
+            name='subnet', address='10.20.30.128/25'
+        )
+
+    def test_get_network_id(self):
+        self.assertEqual(
+            networks_index.get_network_id(int(IPAddress(
+                address='10.20.30.1'
+            ).ip)),
+            self.net.pk
+        )
+        self.assertEqual(
+            networks_index.get_network_id(int(IPAddress(
+                address='10.20.30.130'
+            ).ip)),
+            self.subnet.pk
+        )
+        self.assertIsNone(networks_index.get_network_id(
+            int(IPAddress(address='10.20.31.1').ip)
+        ))
+
+    def test_ip_save_uses_index(self):
+        networks_index.get_layout()
+        with patch.object(
+            networks_index, '_build_layout', wraps=networks_index._build_layout
+        ) as build_mock:
+            ip1 = IPAddress.objects.create(address='10.20.30.1')
+            ip2 = IPAddress.objects.create(address='10.20.30.130')
+        self.assertEqual(build_mock.call_count, 0)
+        self.assertEqual(ip1.network, self.net)
+        self.assertEqual(ip2.network, self.subnet)
+
+    def test_ip_address_change_changes_network(self):
+        ip = IPAddress.objects.create(address='10.20.30.1')
+        self.assertEqual(ip.network, self.net)
+        ip.address = '10.20.30.130'
+        ip.save()
+        self.assertEqual(ip.network, self.subnet)
+
+    def test_index_is_invalidated_on_network_create(self):
+        networks_index.get_layout()
+        net = Network.objects.create(name='net2', address='10.20.31.0/24')
+        ip = IPAddress.objects.create(address='10.20.31.1')
+        self.assertEqual(ip.network, net)
+
+    def test_index_is_invalidated_on_network_address_change(self):
+        networks_index.get_layout()
+        self.subnet.address = '10.20.31.0/24'
+        self.subnet.save()
+        ip = IPAddress.objects.create(address='10.20.31.1')
+        self.assertEqual(ip.network, self.subnet)
+
+    def test_index_is_invalidated_on_network_delete(self):
+        networks_index.get_layout()
+        self.subnet.delete()
+        ip = IPAddress.objects.create(address='10.20.30.130')
+        self.assertEqual(ip.network, self.net)
+
+    def test_index_is_rebuilt_when_shared_version_changes(self):
+        networks_index.get_layout()
+        with patch.object(
+            networks_index, '_build_layout', wraps=networks_index._build_layout
+        ) as build_mock:
+            networks_index.get_layout()
+            self.assertEqual(build_mock.call_count, 0)
+            # simulate change in another process
+            networks_index._bump_shared_version()
+            networks_index.get_layout()
+            self.assertEqual(build_mock.call_count, 1)
+
+    def test_index_with_uncommitted_changes_is_not_cached(self):
+        networks_index.get_layout()
+        try:
+            with transaction.atomic():
+                net = Network.objects.create(
+                    name='net2', address='10.20.31.0/24'
+                )
+                ip = IPAddress.objects.create(address='10.20.31.1')
+                self.assertEqual(ip.network, net)
+                raise ValueError()
+        except ValueError:
+            pass
+        ip = IPAddress.objects.create(address='10.20.31.1')
+        self.assertIsNone(ip.network)
+
+    def test_index_is_not_used_without_shared_cache(self):
+        with patch.object(
+            networks_index, 'is_shared_cache', return_value=False
+        ):
+            self.assertFalse(networks_index.is_enabled())
+
+    @override_settings(NETWORKS_INDEX_ENABLED=False)
+    def test_get_network_without_index(self):
+        ip = IPAddress.objects.create(address='10.20.30.130')
+        self.assertEqual(ip.network, self.subnet)
+        self.assertEqual(ip.get_network(), self.subnet)
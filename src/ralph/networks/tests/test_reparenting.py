@@ -0,0 +1,124 @@
+from unittest.mock import MagicMock
+
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+
+from ralph.networks.models.networks import IPAddress, Network
+from ralph.networks.reparenting import NetworksLayout
+from ralph.networks.signals import ips_network_changed, networks_parent_changed
+from ralph.tests import RalphTestCase
+
+
+class NetworksLayoutTest(SimpleTestCase):
+    def setUp(self):
+        # 10.0.0.0/24 with 10.0.0.0/25 (with 10.0.0.64/26) and 10.0.0.128/25
+        # and disjoint 10.0.1.0/24
+        self.layout = NetworksLayout([
+            (1, 0, 255),
+            (2, 0, 127),
+            (3, 64, 127),
+            (4, 128, 255),
+            (5, 256, 511),
+        ])
+
+    def test_parents(self):
+        self.assertEqual(self.layout.parents, {
+            1: None,
+            2: 1,
+            3: 2,
+            4: 1,
+            5: None,
+        })
+
+    def test_get_network_id(self):
+        for number, network_id in [
+            (0, 2),
+            (63, 2),
+            (64, 3),
+            (127, 3),
+            (128, 4),
+            (255, 4),
+            (256, 5),
+            (511, 5),
+            (512, None),
+            (-1, None),
+        ]:
+            self.assertEqual(
+                self.layout.get_network_id(number), network_id, number
+            )
+
+    def test_empty_layout(self):
+        layout = NetworksLayout([])
+        self.assertEqual(layout.parents, {})
+        self.assertIsNone(layout.get_network_id(10))
+
+
+class ReassignParentsTest(RalphTestCase):
+    def setUp(self):
+        self.net1 = Network.objects.create(
+            name='net1', address='10.20.30.0/26'
+        )
+        self.net2 = Network.objects.create(
+            name='net2', address='10.20.30.64/26'
+        )
+        self.ips = [
+            IPAddress.objects.create(address='10.20.30.{}'.format(i))
+            for i in (1, 2, 65, 130)
+        ]
+
+    def test_supernet_reassigns_networks_and_ips_in_bulk(self):
+        for i in range(131, 231):
+            IPAddress.objects.create(address='10.20.30.{}'.format(i))
+        with CaptureQueriesContext(connection) as queries:
+            supernet = Network.objects.create(
+                name='supernet', address='10.20.30.0/24'
+            )
+        # number of queries doesn't depend on number of IPs
+        self.assertLess(len(queries), 50)
+        self.refresh_objects_from_db(self.net1, self.net2, *self.ips)
+        self.assertEqual(self.net1.parent, supernet)
+        self.assertEqual(self.net2.parent, supernet)
+        self.assertEqual(self.ips[0].network, self.net1)
+        self.assertEqual(self.ips[2].network, self.net2)
+        self.assertEqual(self.ips[3].network, supernet)
+        self.assertCountEqual(
+            supernet.get_subnetworks(), [self.net1, self.net2]
+        )
+        self.assertEqual(supernet.get_descendant_count(), 2)
+
+    def test_address_change_unassigns_ips(self):
+        self.net2.address = '10.20.31.0/26'
+        self.net2.save()
+        self.refresh_objects_from_db(*self.ips)
+        self.assertIsNone(self.ips[2].network)
+
+    def test_delete_supernet_makes_subnetworks_roots(self):
+        supernet = Network.objects.create(
+            name='supernet', address='10.20.30.0/24'
+        )
+        supernet.delete()
+        self.refresh_objects_from_db(self.net1, self.net2, *self.ips)
+        self.assertIsNone(self.net1.parent)
+        self.assertIsNone(self.net2.parent)
+        self.assertNotEqual(self.net1.tree_id, self.net2.tree_id)
+        self.assertEqual(self.ips[0].network, self.net1)
+        self.assertIsNone(self.ips[3].network)
+
+    def test_signals_are_sent(self):
+        networks_receiver = MagicMock()
+        ips_receiver = MagicMock()
+        networks_parent_changed.connect(networks_receiver)
+        ips_network_changed.connect(ips_receiver)
+        try:
+            Network.objects.create(name='supernet', address='10.20.30.0/24')
+        finally:
+            networks_parent_changed.disconnect(networks_receiver)
+            ips_network_changed.disconnect(ips_receiver)
+        self.assertCountEqual(
+            networks_receiver.call_args[1]['network_ids'],
+            [self.net1.pk, self.net2.pk]
+        )
+        self.assertCountEqual(
+            ips_receiver.call_args[1]['ip_ids'], [self.ips[3].pk]
+        )
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Cache of (tree) reports.
+
+Result of the report (tree of nodes and its CSV) is cached (when `USE_CACHE`
+is enabled) by report slug, asset type (mode) and data center. Cached result
+is fresh for `REPORTS_CACHE_TTL` - after that (or when rebuild is forced by
+the user), stale result is still returned, but it's regenerated in the
+background (by RQ worker), so displaying the report doesn't wait for its
+generation (except the very first time).
+"""
+import csv
+import io
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from ralph.lib.external_services.base import InternalService
+
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_KEY_TMPL = 'ralph_reports_{}_{}_{}'
+REPORT_REFRESH_LOCK_KEY_TMPL = 'ralph_reports_refresh_{}_{}_{}'
+REFRESH_SERVICE_NAME = 'REPORTS'
+
+
+def _get_dc_id(dc):
+    return dc.id if dc else 'all'
+
+
+def get_cache_key(slug, asset_type, dc):
+    return REPORT_CACHE_KEY_TMPL.format(slug, asset_type, _get_dc_id(dc))
+
+
+def _get_refresh_lock_key(slug, asset_type, dc):
+    return REPORT_REFRESH_LOCK_KEY_TMPL.format(
+        slug, asset_type, _get_dc_id(dc)
+    )
+
+
+def _iter_rows(nodes, path=()):
+    for node in nodes:
+        node_path = path + (str(node.name),)
+        yield [' / '.join(node_path), node.count]
+        yield from _iter_rows(node.children, node_path)
+
+
+def tree_to_csv(nodes):
+    """
+    Return CSV (path of the node and its count in every row) of the tree of
+    report nodes.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['path', 'count'])
+    writer.writerows(_iter_rows(nodes))
+    return output.getvalue()
+
+
+def build_entry(report, asset_type, dc):
+    result = report.execute(report.get_model(asset_type), dc)
+    return {
+        'result': result,
+        'csv': tree_to_csv(result),
+        'computed_at': time.time(),
+        'refreshing': False,
+    }
+
+
+def refresh(report, slug, asset_type, dc):
+    """
+    Generate the report and store its result in cache.
+    """
+    entry = build_entry(report, asset_type, dc)
+    cache.set(
+        get_cache_key(slug, asset_type, dc), entry,
+        settings.REPORTS_CACHE_MAX_AGE
+    )
+    return entry
+
+
+def schedule_refresh(report, slug, asset_type, dc):
+    """
+    Generate the report in the background (at most one generation of the
+    report is scheduled at once).
+
+    Returns True if generation is (or already was) scheduled.
+    """
+    lock_key = _get_refresh_lock_key(slug, asset_type, dc)
+    if not cache.add(lock_key, 1, settings.REPORTS_REFRESH_TIMEOUT):
+        return True
+    report_class = report.__class__
+    try:
+        InternalService(REFRESH_SERVICE_NAME).run_async(
+            report_class='{}.{}'.format(
+                report_class.__module__, report_class.__qualname__
+            ),
+            slug=slug,
+            asset_type=asset_type,
+            dc_id=dc.id if dc else None,
+        )
+    except Exception:
+        logger.exception('Could not schedule generation of report %s', slug)
+        cache.delete(lock_key)
+        return False
+    return True
+
+
+def refresh_report_data(report_class, slug, asset_type, dc_id=None):
+    """
+    Generate the report (run by RQ worker).
+    """
+    from ralph.data_center.models.physical import DataCenter
+    dc = DataCenter.objects.filter(pk=dc_id).first() if dc_id else None
+    try:
+        refresh(import_string(report_class)(), slug, asset_type, dc)
+    finally:
+        cache.delete(_get_refresh_lock_key(slug, asset_type, dc))
+
+
+def get_report_entry(report, slug, asset_type, dc, force_refresh=False):
+    """
+    Return cached result of the report (dict with tree of nodes, its CSV,
+    time of generation and flag if it's being regenerated right now).
+    """
+    if not settings.USE_CACHE:
+        return build_entry(report, asset_type, dc)
+    entry = cache.get(get_cache_key(slug, asset_type, dc))
+    if entry is None:
+        return refresh(report, slug, asset_type, dc)
+    if (
+        force_refresh or
+        time.time() - entry['computed_at'] >= settings.REPORTS_CACHE_TTL
+    ):
+        entry = dict(
+            entry, refreshing=schedule_refresh(report, slug, asset_type, dc)
+        )
+    return entry
@@ -25,6 +25,7 @@ def generate_report(name, requester, instances, language, context):
     items_per_attachment = 10
     service_pdf = ExternalService('PDF')
 
+    kwargs_list = []
     for n in range(0, len(context), items_per_attachment):
         # Make sure data is JSON-serializable
         # Will throw otherwise
@@ -39,11 +40,10 @@ def generate_report(name, requester, instances, language, context):
                 'assets': context[n:n + items_per_attachment],
             }
         ))
-        result = service_pdf.run(
-            template=template_content,
-            data=data
-        )
+        kwargs_list.append({'template': template_content, 'data': data})
 
+    # generate all documents in parallel
+    for result in service_pdf.run_many(kwargs_list):
         filename = "_".join([
             timezone.now().isoformat()[:10],
             instances[0].user.get_full_name().lower().replace(' ', '-'),
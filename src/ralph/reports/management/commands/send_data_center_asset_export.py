@@ -1,16 +1,85 @@
 import logging
 import mimetypes
+import os
+import tempfile
+import time
+import zipfile
+from resource import getrusage, RUSAGE_SELF
 
+import tablib
 from django.core.exceptions import ValidationError
 from django.core.mail import EmailMessage
 from django.core.management import BaseCommand, CommandError
 from django.core.validators import EmailValidator
 
+from ralph.admin.exports import EXPORT_WRITERS
+from ralph.lib.queryset import iter_chunks
 from ralph.reports.resources import DataCenterAssetTextResource
 
 
 logger = logging.getLogger(__name__)
 
+# attachments larger than this (in bytes) are compressed (zipped) by default
+DEFAULT_COMPRESS_THRESHOLD = 10 * 1024 * 1024
+
+
+class DatasetExportWriter(object):
+    """
+    Write rows to file in format without streaming writer (using tablib
+    dataset kept in memory).
+    """
+    def __init__(self, path, output_format):
+        self._path = path
+        self._format = output_format
+        self._dataset = tablib.Dataset()
+
+    def writerow(self, row):
+        if self._dataset.headers is None:
+            self._dataset.headers = row
+        else:
+            self._dataset.append(row)
+
+    def close(self):
+        with open(self._path, 'wb') as f:
+            f.write(getattr(self._dataset, self._format))
+
+
+def get_writer(path, output_format):
+    writer_class = EXPORT_WRITERS.get(output_format)
+    if writer_class:
+        return writer_class(path)
+    return DatasetExportWriter(path, output_format)
+
+
+def export_to_file(resource, path, output_format, chunk_size):
+    """
+    Write rows of exported (in chunks) data center assets to file.
+
+    Returns the number of exported assets.
+    """
+    writer = get_writer(path, output_format)
+    exported = 0
+    try:
+        writer.writerow(resource.get_export_headers())
+        for chunk in iter_chunks(resource.get_queryset(), chunk_size):
+            resource.prefetch_ips(chunk)
+            for dc_asset in chunk:
+                writer.writerow(resource.export_resource(dc_asset))
+            exported += len(chunk)
+    finally:
+        writer.close()
+    return exported
+
+
+def compress(path, filename):
+    """
+    Compress (zip) file from `path` as `filename`. Returns path of zip file.
+    """
+    zip_path = path + '.zip'
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.write(path, filename)
+    return zip_path
+
 
 class Command(BaseCommand):
     SUPPORTED_FORMATS = ['.csv', '.xlsx', '.ods']
@@ -38,16 +107,48 @@ class Command(BaseCommand):
             help="Sender's email address"
         )
 
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of assets fetched from database at once"
+        )
+
+        parser.add_argument(
+            "--compress-threshold",
+            type=int,
+            default=DEFAULT_COMPRESS_THRESHOLD,
+            help="Compress (zip) report file larger than this size (in bytes)"
+        )
+
     def handle(self, *args, **options):
         try:
             self._validate_options(options)
             output_format = options.get('output_format')
             recipient_email = options.get('recipient_email')
             sender_email = options.get('sender_email')
-            dataset = DataCenterAssetTextResource().export()
-            attachment_content = getattr(dataset, output_format[1:])
             attachment_mimetype = mimetypes.types_map[output_format]
             attachment_filename = "report" + output_format
+            fd, path = tempfile.mkstemp(suffix=output_format)
+            os.close(fd)
+            paths = [path]
+            try:
+                start = time.monotonic()
+                exported = export_to_file(
+                    DataCenterAssetTextResource(), path, output_format[1:],
+                    options['chunk_size']
+                )
+                self._report_stats(exported, time.monotonic() - start)
+                if os.path.getsize(path) > options['compress_threshold']:
+                    path = compress(path, attachment_filename)
+                    paths.append(path)
+                    attachment_filename += '.zip'
+                    attachment_mimetype = 'application/zip'
+                with open(path, 'rb') as f:
+                    attachment_content = f.read()
+            finally:
+                for file_path in paths:
+                    os.remove(file_path)
             subject = "Ralph Data Center Asset Export"
             body = "Attached to this message is a dump " \
                    "of Ralph Data Center Assets"
@@ -62,6 +163,18 @@ class Command(BaseCommand):
             )
             raise
 
+    def _report_stats(self, exported, duration):
+        # ru_maxrss is in kilobytes (on Linux)
+        peak_memory = getrusage(RUSAGE_SELF).ru_maxrss / 1024
+        message = (
+            'Exported {} assets in {:.1f}s ({:.1f} rows/s), '
+            'peak memory: {:.1f} MB'.format(
+                exported, duration, exported / (duration or 1), peak_memory
+            )
+        )
+        logger.info(message)
+        self.stdout.write(message)
+
     def _validate_options(self, options):
         if options.get("output_format", None) not in self.SUPPORTED_FORMATS:
             raise CommandError(
@@ -0,0 +1,110 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from ralph.data_center.tests.factories import DataCenterAssetFactory
+from ralph.lib.external_services.base import InternalService
+from ralph.reports import cache as report_cache
+from ralph.reports.base import ReportContainer
+from ralph.reports.views import CategoryModelReport
+from ralph.tests import RalphTestCase
+from ralph.tests.mixins import ClientMixin
+
+SLUG = 'category_model_report'
+
+
+@override_settings(USE_CACHE=True)
+class ReportCacheTestCase(ClientMixin, RalphTestCase):
+    def setUp(self):
+        cache.clear()
+        self.login_as_user()
+        self.assets = DataCenterAssetFactory.create_batch(2)
+
+    def _get_entry(self, **kwargs):
+        return report_cache.get_report_entry(
+            CategoryModelReport(), SLUG, 'dc', None, **kwargs
+        )
+
+    def test_result_is_cached(self):
+        with patch.object(
+            CategoryModelReport, 'prepare', autospec=True,
+            side_effect=CategoryModelReport.prepare
+        ) as prepare_mock:
+            entry = self._get_entry()
+            self.assertEqual(self._get_entry()['csv'], entry['csv'])
+        self.assertEqual(prepare_mock.call_count, 1)
+        self.assertFalse(entry['refreshing'])
+
+    def test_stale_result_is_returned_and_refreshed_in_background(self):
+        entry = report_cache.refresh(CategoryModelReport(), SLUG, 'dc', None)
+        entry['computed_at'] -= 2 * 3600
+        entry['csv'] = 'stale'
+        cache.set(report_cache.get_cache_key(SLUG, 'dc', None), entry)
+        with patch.object(InternalService, 'run_async') as run_async_mock:
+            entry = self._get_entry()
+            # refresh is scheduled only once
+            self._get_entry()
+        self.assertEqual(entry['csv'], 'stale')
+        self.assertTrue(entry['refreshing'])
+        run_async_mock.assert_called_once_with(
+            report_class='ralph.reports.views.CategoryModelReport',
+            slug=SLUG,
+            asset_type='dc',
+            dc_id=None,
+        )
+
+    def test_force_refresh(self):
+        self._get_entry()
+        with patch.object(InternalService, 'run_async') as run_async_mock:
+            self.assertTrue(self._get_entry(force_refresh=True)['refreshing'])
+        self.assertEqual(run_async_mock.call_count, 1)
+
+    def test_refresh_report_data(self):
+        cache.set(report_cache._get_refresh_lock_key(SLUG, 'dc', None), 1)
+        report_cache.refresh_report_data(
+            'ralph.reports.views.CategoryModelReport', SLUG, 'dc'
+        )
+        entry = cache.get(report_cache.get_cache_key(SLUG, 'dc', None))
+        self.assertEqual(
+            sum(node.count for node in entry['result']), len(self.assets)
+        )
+        self.assertIsNone(
+            cache.get(report_cache._get_refresh_lock_key(SLUG, 'dc', None))
+        )
+
+    def test_view_shows_cached_result(self):
+        with patch.object(
+            CategoryModelReport, 'prepare', autospec=True,
+            side_effect=CategoryModelReport.prepare
+        ) as prepare_mock:
+            for _ in range(2):
+                response = self.client.get(
+                    reverse(SLUG), {'asset_type': 'dc'}
+                )
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(prepare_mock.call_count, 1)
+        self.assertContains(response, 'Rebuild report')
+
+    def test_csv_is_returned_from_cache(self):
+        response = self.client.get(
+            reverse(SLUG), {'asset_type': 'dc', 'csv': 1}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.content.decode(),
+            cache.get(report_cache.get_cache_key(SLUG, 'dc', None))['csv']
+        )
+
+
+class TreeToCSVTestCase(RalphTestCase):
+    def test_tree_to_csv(self):
+        container = ReportContainer()
+        container.add('child', count=2, parent='root')
+        for node in container.leaves:
+            node.update_count()
+        self.assertEqual(
+            report_cache.tree_to_csv(container.roots).splitlines(),
+            ['path,count', 'root,2', 'root / child,2']
+        )
@@ -1,4 +1,7 @@
+import csv
+import io
 import mimetypes
+import zipfile
 from unittest import mock
 
 from ddt import data, ddt, unpack
@@ -6,6 +9,8 @@ from django.core import management
 from django.core.management import CommandError
 
 from ralph.data_center.tests.factories import DataCenterAssetFactory
+from ralph.networks.tests.factories import IPAddressFactory
+from ralph.reports.resources import DataCenterAssetTextResource
 from ralph.tests import RalphTestCase
 
 EXAMPLE_EMAIL = 'example@example.com'
@@ -21,13 +26,16 @@ class TestEmailReports(RalphTestCase):
         self,
         output_format='.csv',
         recipient_email=EXAMPLE_EMAIL,
-        sender_email=EXAMPLE_EMAIL
+        sender_email=EXAMPLE_EMAIL,
+        **kwargs
     ):
         management.call_command(
             'send_data_center_asset_export',
             output_format=output_format,
             recipient_email=recipient_email,
-            sender_email=sender_email
+            sender_email=sender_email,
+            stdout=io.StringIO(),
+            **kwargs
         )
 
     @unpack
@@ -71,3 +79,49 @@ class TestEmailReports(RalphTestCase):
         self.assertEqual(EXAMPLE_EMAIL, call_args[1])
         self.assertEqual(filename, call_args[5])
         self.assertEqual(mimetype, call_args[6])
+
+    @mock.patch(
+        'ralph.reports.management.commands.'
+        'send_data_center_asset_export.send_email_with_attachment'
+    )
+    def test_data_center_asset_report_is_exported_in_chunks(
+        self, send_email_with_attachment
+    ):
+        self.call_command(chunk_size=3)
+
+        content = send_email_with_attachment.call_args[0][4]
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        self.assertEqual(len(rows), 11)
+
+    @mock.patch(
+        'ralph.reports.management.commands.'
+        'send_data_center_asset_export.send_email_with_attachment'
+    )
+    def test_data_center_asset_report_is_compressed_when_large(
+        self, send_email_with_attachment
+    ):
+        self.call_command(output_format='.xlsx', compress_threshold=0)
+
+        call_args = send_email_with_attachment.call_args[0]
+        self.assertEqual('report.xlsx.zip', call_args[5])
+        self.assertEqual('application/zip', call_args[6])
+        with zipfile.ZipFile(io.BytesIO(call_args[4])) as zip_file:
+            self.assertEqual(['report.xlsx'], zip_file.namelist())
+
+
+class TestDataCenterAssetTextResource(RalphTestCase):
+    def test_prefetched_ips_are_the_same_as_fetched(self):
+        dc_asset = DataCenterAssetFactory()
+        IPAddressFactory(ethernet__base_object=dc_asset, is_management=True)
+        IPAddressFactory(ethernet__base_object=dc_asset, is_management=False)
+        resource = DataCenterAssetTextResource()
+        ips = (
+            resource.dehydrate_management_ip(dc_asset),
+            resource.dehydrate_ip(dc_asset),
+        )
+        resource.prefetch_ips([dc_asset])
+        with self.assertNumQueries(0):
+            self.assertEqual(ips, (
+                resource.dehydrate_management_ip(dc_asset),
+                resource.dehydrate_ip(dc_asset),
+            ))
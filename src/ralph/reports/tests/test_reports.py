@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import factory
 from django.core.exceptions import ValidationError
+from django.test import override_settings
 from django.urls import reverse
 
 from ralph.admin.helpers import get_content_type_for_model
@@ -253,6 +254,30 @@ class TestReportAssetAndLicence(RalphTestCase):
         self.assertEqual(report_result, result)
 
 
+class TestRelationsReportCSV(ClientMixin, RalphTestCase):
+    def setUp(self):
+        self.login_as_user()
+        self.assets = DataCenterAssetFactory.create_batch(3)
+
+    def test_csv_is_streamed(self):
+        response = self.client.get(
+            reverse('asset-relations'), {'csv': 1, 'asset_type': 'dc'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith('id,niw,barcode'))
+
+    @override_settings(REPORTS_CSV_CHUNK_SIZE=2)
+    def test_all_rows_are_returned_in_chunks(self):
+        rows = list(AssetRelationsReport().prepare(DataCenterAsset))
+        self.assertEqual(
+            [row[0] for row in rows[1:]],
+            [str(asset.pk) for asset in self.assets]
+        )
+
+
 class TestAssetsSupportsReport(RalphTestCase):
     def setUp(self):
         self.dc_1 = DataCenterAssetFactory()
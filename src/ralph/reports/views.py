@@ -1,12 +1,14 @@
 # -*- coding: utf-8 -*-
+import csv
 import logging
+from datetime import datetime
 
-import tablib
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.db.models import Count, Prefetch
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.encoding import smart_str
 from django.utils.translation import ugettext_lazy as _
 
@@ -16,8 +18,10 @@ from ralph.assets.models.assets import Asset, AssetModel
 from ralph.assets.models.choices import ObjectModelType
 from ralph.back_office.models import BackOfficeAsset
 from ralph.data_center.models.physical import DataCenter, DataCenterAsset
+from ralph.lib.queryset import iter_chunks
 from ralph.licences.models import BaseObjectLicence, Licence, LicenceUser
 from ralph.operations.models import Failure, OperationType
+from ralph.reports import cache as report_cache
 from ralph.reports.base import ReportContainer
 from ralph.supports.models import BaseObjectsSupport
 
@@ -35,6 +39,15 @@ def get_choice_name(choices_class, key, default='------'):
         return 'Does not exist for key {}'.format(key)
 
 
+class _Echo(object):
+    """
+    File-like object returning written value (used to get CSV lines from
+    `csv.writer`).
+    """
+    def write(self, value):
+        return value
+
+
 class CSVReportMixin(object):
     """CSV report mixin.
 
@@ -46,14 +59,15 @@ class CSVReportMixin(object):
 
         Args:
             request: Django request object
-            result: data list
+            result: iterable of rows (headers first) - it's streamed row
+                by row
 
         Returns:
             Django response object
         """
-        data = tablib.Dataset(*result[1:], headers=result[0])
-        response = HttpResponse(
-            data.csv,
+        writer = csv.writer(_Echo())
+        response = StreamingHttpResponse(
+            (writer.writerow(row) for row in result),
             content_type='text/csv;charset=utf-8'
         )
         response['Content-Disposition'] = 'attachment;filename={}'.format(
@@ -70,6 +84,8 @@ class ReportDetail(RalphTemplateView):
     with_datacenters = False
     with_counter = True
     links = False
+    # result of the report is cached and regenerated in the background
+    cached = True
     modes = [
         {
             'name': 'all',
@@ -102,7 +118,7 @@ class ReportDetail(RalphTemplateView):
         raise NotImplemented()
 
     def is_async(self, request):
-        return False
+        return self.cached and settings.USE_CACHE
 
     @property
     def datacenters(self):
@@ -148,15 +164,33 @@ class ReportDetail(RalphTemplateView):
         self.asset_type = request.GET.get('asset_type') or self.default_mode
         return super().dispatch(request, *args, **kwargs)
 
+    def get_report_entry(self, force_refresh=False):
+        return report_cache.get_report_entry(
+            self, self.slug, self.asset_type, self.dc,
+            force_refresh=force_refresh
+        )
+
     def get_context_data(self, **kwargs):
         context_data = super().get_context_data(**kwargs)
+        if self.cached:
+            entry = self.get_report_entry(
+                force_refresh=bool(self.request.GET.get('refresh'))
+            )
+            result = entry['result']
+            generated_at = datetime.fromtimestamp(
+                entry['computed_at'], tz=timezone.utc
+            )
+            refreshing = entry['refreshing']
+        else:
+            result = self.execute(self.get_model(self.asset_type), self.dc)
+            generated_at = timezone.now()
+            refreshing = False
         context_data.update({
             'report': self,
             'subsection': self.name,
-            'result': self.execute(
-                self.get_model(self.asset_type),
-                self.dc,
-            ),
+            'result': result,
+            'generated_at': generated_at,
+            'refreshing': refreshing,
             'cache_key': (
                 self.asset_type +
                 (str(self.dc.id) if self.dc else 'all') +
@@ -170,10 +204,19 @@ class ReportDetail(RalphTemplateView):
         })
         return context_data
 
+    def get_csv_response(self, request):
+        response = HttpResponse(
+            self.get_report_entry()['csv'],
+            content_type='text/csv;charset=utf-8'
+        )
+        response['Content-Disposition'] = 'attachment;filename={}.csv'.format(
+            self.slug
+        )
+        return response
+
     def get(self, request, *args, **kwargs):
         if request.GET.get('csv'):
-            model = self.get_model(self.asset_type)
-            return self.get_response(request, self.get_result(request, model))
+            return self.get_csv_response(request)
         return super().get(request, *args, **kwargs)
 
 
@@ -313,6 +356,25 @@ class BaseRelationsReport(
     template_name = 'reports/report_relations.html'
     with_modes = True
     links = False
+    cached = False
+
+    def get_csv_response(self, request):
+        model = self.get_model(self.asset_type)
+        return self.get_response(request, self.get_result(request, model))
+
+    def get_result(self, request, model, *args, **kwargs):
+        # rows are generated lazily, while the response is streamed
+        return self.prepare(model, *args, **kwargs)
+
+    def iter_queryset(self, queryset):
+        """
+        Yield objects from queryset ordered by primary key - objects are
+        fetched (together with prefetched related objects) in chunks of
+        `REPORTS_CSV_CHUNK_SIZE` using keyset (`pk > <last pk>`), so memory
+        usage doesn't depend on the size of the report.
+        """
+        for chunk in iter_chunks(queryset, settings.REPORTS_CSV_CHUNK_SIZE):
+            yield from chunk
 
 
 class AssetRelationsReport(BaseRelationsReport):
@@ -356,7 +418,9 @@ class AssetRelationsReport(BaseRelationsReport):
             select_related = self.dc_select_related
 
         yield headers + self.extra_headers
-        for asset in queryset.select_related(*select_related):
+        for asset in self.iter_queryset(
+            queryset.select_related(*select_related)
+        ):
             row = [str(getattr_dunder(asset, column)) for column in headers]
             row += self.get_extra_columns(asset)
             yield row
@@ -438,7 +502,8 @@ class AssetSupportsReport(BaseRelationsReport):
             )
 
         yield headers + self.extra_headers
-        for bos in queryset.select_related(*select_related):
+        queryset = queryset.select_related(*select_related)
+        for bos in self.iter_queryset(queryset):
             row = [str(getattr_dunder(bos, column)) for column in headers]
             row += self.get_extra_columns(bos)
             yield row
@@ -548,7 +613,7 @@ class LicenceRelationsReport(BaseRelationsReport):
             )
         )
 
-        for licence in queryset:
+        for licence in self.iter_queryset(queryset):
             row = [
                 smart_str(getattr_dunder(licence, column))
                 for column in self.licences_headers
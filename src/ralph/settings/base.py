@@ -102,6 +102,8 @@ INSTALLED_APPS = (
     'ralph.lib.permissions',
     'ralph.lib.custom_fields',
     'ralph.lib.hooks',
+    'ralph.lib.metrics',
+    'ralph.lib.search',
     'ralph.notifications',
     'ralph.ssl_certificates',
     'rest_framework',
@@ -302,6 +304,7 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.JSONRenderer',
         'ralph.lib.api.utils.NoFiltersBrowsableAPIRenderer',
         'rest_framework_xml.renderers.XMLRenderer',
+        'ralph.lib.api.utils.NDJSONRenderer',
     ),
     'DEFAULT_PARSER_CLASSES': (
         'rest_framework.parsers.JSONParser',
@@ -318,6 +321,9 @@ REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'ralph.lib.api.exception_handler.validation_error_exception_handler',  # noqa
 }
 
+# number of objects serialized at once when streaming API list (ndjson format)
+API_STREAMING_CHUNK_SIZE = int(os.environ.get('API_STREAMING_CHUNK_SIZE', 500))  # noqa
+
 API_THROTTLING = bool_from_env('API_THROTTLING', default=False)
 if API_THROTTLING:
     REST_FRAMEWORK.update({
@@ -387,6 +393,12 @@ else:
 
 # set to False to turn off cache decorator
 USE_CACHE = bool_from_env('USE_CACHE', True)
+# time (in seconds) for which permissions of the user are cached (cache is
+# invalidated anyway when groups or permissions are changed)
+PERMISSIONS_CACHE_TIMEOUT = int(os.environ.get('PERMISSIONS_CACHE_TIMEOUT', 3600))  # noqa
+# cache custom fields values (with inheritance) of single object
+CUSTOM_FIELDS_CACHE_ENABLED = bool_from_env('CUSTOM_FIELDS_CACHE_ENABLED', False)  # noqa
+CUSTOM_FIELDS_CACHE_TIMEOUT = int(os.environ.get('CUSTOM_FIELDS_CACHE_TIMEOUT', 3600))  # noqa
 
 SENTRY_ENABLED = bool_from_env('SENTRY_ENABLED')
 
@@ -405,6 +417,14 @@ RALPH_QUEUES = {
     'ralph_async_transitions': {
         'DEFAULT_TIMEOUT': 3600,
     },
+    'ralph_dashboards': {},
+    'ralph_cloud_sync': {},
+    'ralph_reports': {
+        'DEFAULT_TIMEOUT': 3600,
+    },
+    'ralph_admin_exports': {
+        'DEFAULT_TIMEOUT': 3600,
+    },
 }
 for queue_name, options in RALPH_QUEUES.items():
     RQ_QUEUES[queue_name] = ChainMap(RQ_QUEUES['default'], options)
@@ -420,9 +440,72 @@ RALPH_EXTERNAL_SERVICES = {
 RALPH_INTERNAL_SERVICES = {
     'ASYNC_TRANSITIONS': {
         'queue_name': 'ralph_async_transitions',
-        'method': 'ralph.lib.transitions.async.run_async_transition'
-    }
+        'method': 'ralph.lib.transitions.async.run_async_transition',
+        'bulk_method': 'ralph.lib.transitions.async.run_async_transitions',
+    },
+    'DASHBOARD_GRAPHS': {
+        'queue_name': 'ralph_dashboards',
+        'method': 'ralph.dashboards.cache.refresh_graph_data',
+    },
+    'REPORTS': {
+        'queue_name': 'ralph_reports',
+        'method': 'ralph.reports.cache.refresh_report_data',
+    },
+    'ADMIN_EXPORT': {
+        'queue_name': 'ralph_admin_exports',
+        'method': 'ralph.admin.exports.run_export',
+    },
 }
+# max time (in seconds) of waiting for result of (external or internal)
+# service
+RALPH_SERVICES_WAIT_TIMEOUT = int(os.environ.get('RALPH_SERVICES_WAIT_TIMEOUT', 600))  # noqa
+# number of asynchronous transition jobs (objects) processed by single worker
+# task (when service supports bulk jobs)
+TRANSITION_ASYNC_CHUNK_SIZE = int(os.environ.get('TRANSITION_ASYNC_CHUNK_SIZE', 50))  # noqa
+# max number of jobs from single chunk run in parallel (in threads) by worker
+TRANSITION_ASYNC_CONCURRENCY = int(os.environ.get('TRANSITION_ASYNC_CONCURRENCY', 4))  # noqa
+# export (to CSV or XLSX) requested in the admin is run in the background by
+# ralph_admin_exports queue workers and user is notified when it's ready
+ADMIN_EXPORT_ASYNC = bool_from_env('ADMIN_EXPORT_ASYNC', False)
+# number of objects fetched at once by asynchronous admin export
+ADMIN_EXPORT_CHUNK_SIZE = int(os.environ.get('ADMIN_EXPORT_CHUNK_SIZE', 1000))  # noqa
+
+# =============================================================================
+# Dashboards
+# =============================================================================
+
+# time (in seconds) for which data of the graph is fresh, when graph is not
+# assigned to any dashboard (otherwise interval of the dashboard is used)
+DASHBOARD_GRAPH_DEFAULT_TTL = int(os.environ.get('DASHBOARD_GRAPH_DEFAULT_TTL', 60))  # noqa
+# stale data of the graph (returned while it's refreshed in the background)
+# is kept in cache for this time (in seconds)
+DASHBOARD_GRAPH_CACHE_MAX_AGE = int(os.environ.get('DASHBOARD_GRAPH_CACHE_MAX_AGE', 86400))  # noqa
+# max time (in seconds) of single graph refresh in the background
+DASHBOARD_GRAPH_REFRESH_TIMEOUT = int(os.environ.get('DASHBOARD_GRAPH_REFRESH_TIMEOUT', 600))  # noqa
+
+# =============================================================================
+# Search index
+# =============================================================================
+
+# use search index (denormalized table of searched values) in admin search,
+# autocomplete and search API - build it first using `ralph search_index`
+SEARCH_INDEX_ENABLED = bool_from_env('SEARCH_INDEX_ENABLED', False)
+# models which values of `search_fields` (of their admin) are indexed
+SEARCH_INDEX_MODELS = os.environ.get(
+    'SEARCH_INDEX_MODELS',
+    'back_office.BackOfficeAsset,data_center.Cluster,'
+    'data_center.DataCenterAsset,networks.IPAddress,virtual.CloudHost,'
+    'virtual.VirtualServer'
+).split(',')
+# use FULLTEXT (ngram) index on MySQL instead of LIKE (create it using
+# `ralph search_index --create-db-index`)
+SEARCH_INDEX_FULLTEXT = bool_from_env('SEARCH_INDEX_FULLTEXT', False)
+# shorter terms are searched using LIKE (should be equal to MySQL's
+# `ngram_token_size`)
+SEARCH_INDEX_FULLTEXT_MIN_LENGTH = int(os.environ.get('SEARCH_INDEX_FULLTEXT_MIN_LENGTH', 2))  # noqa
+# number of results returned by search API (by default and at most)
+SEARCH_API_DEFAULT_LIMIT = int(os.environ.get('SEARCH_API_DEFAULT_LIMIT', 20))  # noqa
+SEARCH_API_MAX_LIMIT = int(os.environ.get('SEARCH_API_MAX_LIMIT', 100))
 
 # =============================================================================
 # DC view
@@ -526,6 +609,25 @@ RELEASE_REPORT_CONFIG = {
 MAP_IMPORTED_ID_TO_NEW_ID = False
 
 OPENSTACK_INSTANCES = json.loads(os.environ.get('OPENSTACK_INSTANCES', '[]'))
+# acknowledge cloud sync events immediately and process them (coalesced
+# per instance) by ralph_cloud_sync queue workers
+CLOUD_SYNC_ASYNC = bool_from_env('CLOUD_SYNC_ASYNC', False)
+# number of cloud sync events processed in single transaction
+CLOUD_SYNC_BATCH_SIZE = int(os.environ.get('CLOUD_SYNC_BATCH_SIZE', 100))
+# time after which processing of queued events is scheduled again (when
+# previous job was lost)
+CLOUD_SYNC_SCHEDULED_TIMEOUT = int(
+    os.environ.get('CLOUD_SYNC_SCHEDULED_TIMEOUT', 600)
+)
+# number of servers saved in single transaction (and revision) by
+# openstack_sync
+OPENSTACK_SYNC_CHUNK_SIZE = int(
+    os.environ.get('OPENSTACK_SYNC_CHUNK_SIZE', 500)
+)
+# number of OpenStack instances fetched concurrently by openstack_sync
+OPENSTACK_SYNC_CONCURRENCY = int(
+    os.environ.get('OPENSTACK_SYNC_CONCURRENCY', 4)
+)
 DEFAULT_OPENSTACK_PROVIDER_NAME = os.environ.get(
     'DEFAULT_OPENSTACK_PROVIDER_NAME', 'openstack'
 )
@@ -537,9 +639,26 @@ DEFAULT_NETWORK_BOTTOM_MARGIN = int(os.environ.get('DEFAULT_NETWORK_BOTTOM_MARGI
 DEFAULT_NETWORK_TOP_MARGIN = int(os.environ.get('DEFAULT_NETWORK_TOP_MARGIN', 0))  # noqa
 # deprecated, to remove in the future
 DEFAULT_NETWORK_MARGIN = int(os.environ.get('DEFAULT_NETWORK_MARGIN', 10))
+# number of free IPs checked in DNSaaS with single request when looking for
+# next free IP in network
+NETWORK_FREE_IP_DNSAAS_BATCH_SIZE = int(os.environ.get('NETWORK_FREE_IP_DNSAAS_BATCH_SIZE', 50))  # noqa
+# (in-process) index of free IPs in network is rebuilt from database after
+# this number of seconds
+NETWORK_FREE_IP_INDEX_TTL = int(os.environ.get('NETWORK_FREE_IP_INDEX_TTL', 300))  # noqa
+# networks with more allocable addresses are not indexed (free IPs are
+# searched directly in database)
+NETWORK_FREE_IP_INDEX_MAX_SIZE = int(os.environ.get('NETWORK_FREE_IP_INDEX_MAX_SIZE', 2 ** 24))  # noqa
+# resolve network of IP address using in-process index of networks instead of
+# querying database (used only with cache shared between processes, ex. Redis)
+NETWORKS_INDEX_ENABLED = bool_from_env('NETWORKS_INDEX_ENABLED', True)
+# networks index is rebuilt from database after this number of seconds
+NETWORKS_INDEX_TTL = int(os.environ.get('NETWORKS_INDEX_TTL', 600))
 # when set to True, network records (IP/Ethernet) can't be modified until
 # 'expose in DHCP' is selected
 DHCP_ENTRY_FORBID_CHANGE = bool_from_env('DHCP_ENTRY_FORBID_CHANGE', True)
+# time (in seconds) for which rendered DHCP config is cached (config is
+# invalidated anyway when any DHCP-related data changes)
+DHCP_CONFIG_CACHE_TIMEOUT = int(os.environ.get('DHCP_CONFIG_CACHE_TIMEOUT', 3600))  # noqa
 
 # disable integration with DNSaaS as it's no longer supported
 # https://github.com/allegro/django-powerdns-dnssec
@@ -548,12 +667,29 @@ ENABLE_DNSAAS_INTEGRATION = False
 DNSAAS_URL = os.environ.get('DNSAAS_URL', '')
 DNSAAS_TOKEN = os.environ.get('DNSAAS_TOKEN', '')
 DNSAAS_TIMEOUT = os.environ.get('DNSAAS_TIMEOUT', 10)
+# max number of keep-alive connections to DNSaaS kept by single process
+DNSAAS_POOL_SIZE = int(os.environ.get('DNSAAS_POOL_SIZE', 10))
+# max number of requests (ex. pages of results) sent to DNSaaS in parallel
+DNSAAS_CONCURRENCY = int(os.environ.get('DNSAAS_CONCURRENCY', 4))
+# number of IPs for which DNS records are fetched with single request
+DNSAAS_IPS_BATCH_SIZE = int(os.environ.get('DNSAAS_IPS_BATCH_SIZE', 50))
+# number of IPs reconciled at once by dns_find_inconsistencies
+DNS_INCONSISTENCIES_CHUNK_SIZE = int(os.environ.get('DNS_INCONSISTENCIES_CHUNK_SIZE', 1000))  # noqa
+# max number of chunks reconciled in parallel by dns_find_inconsistencies
+DNS_INCONSISTENCIES_CONCURRENCY = int(os.environ.get('DNS_INCONSISTENCIES_CONCURRENCY', 4))  # noqa
+# file with time of the last run of dns_find_inconsistencies (used by
+# incremental mode)
+DNS_INCONSISTENCIES_STATE_PATH = os.environ.get(
+    'DNS_INCONSISTENCIES_STATE_PATH', '/tmp/ralph_dns_inconsistencies.json'
+)
 DNSAAS_AUTO_PTR_ALWAYS = os.environ.get('DNSAAS_AUTO_PTR_ALWAYS', 2)
 DNSAAS_AUTO_PTR_NEVER = os.environ.get('DNSAAS_AUTO_PTR_NEVER', 1)
 # user in dnsaas which can do changes, like update TXT records etc.
 DNSAAS_OWNER = os.environ.get('DNSAAS_OWNER', 'ralph')
 # pyhermes topic where messages about auto txt records are announced
 DNSAAS_AUTO_TXT_RECORD_TOPIC_NAME = None
+# max number of hosts which DNS TXT records are published in single message
+DNSAAS_AUTO_TXT_RECORD_BATCH_SIZE = int(os.environ.get('DNSAAS_AUTO_TXT_RECORD_BATCH_SIZE', 100))  # noqa
 # define names of values send to DNSAAS for:
 # DataCenterAsset, Cluster, VirtualServer
 DNSAAS_AUTO_TXT_RECORD_PURPOSE_MAP = {
@@ -686,10 +822,37 @@ RALPH_HOST_URL = os.environ.get('RALPH_HOST_URL', None)
 COLLECT_METRICS = False
 ALLOW_PUSH_GRAPHS_DATA_TO_STATSD = False
 STATSD_GRAPHS_PREFIX = 'ralph.graphs'
+# max number of graphs calculated in parallel by push_graphs_to_statsd
+STATSD_GRAPHS_PUSH_WORKERS = int(os.environ.get('STATSD_GRAPHS_PUSH_WORKERS', 4))  # noqa
+# time (in seconds) for which cached result of the report is fresh (after that
+# it's regenerated in the background)
+REPORTS_CACHE_TTL = int(os.environ.get('REPORTS_CACHE_TTL', 3600))
+# stale result of the report is kept in cache for this time (in seconds)
+REPORTS_CACHE_MAX_AGE = int(os.environ.get('REPORTS_CACHE_MAX_AGE', 7 * 86400))  # noqa
+# max time (in seconds) of single report generation in the background
+REPORTS_REFRESH_TIMEOUT = int(os.environ.get('REPORTS_REFRESH_TIMEOUT', 3600))  # noqa
+# number of objects fetched at once when streaming CSV (relations) reports
+REPORTS_CSV_CHUNK_SIZE = int(os.environ.get('REPORTS_CSV_CHUNK_SIZE', 1000))  # noqa
 
 ENABLE_REQUESTS_AND_QUERIES_METRICS = True
 LARGE_NUMBER_OF_QUERIES_THRESHOLD = 25
 LONG_QUERIES_THRESHOLD_MS = 250
+# profile queries of every request (when disabled, profile is collected only
+# for requests of superusers with X-Ralph-Query-Profile header)
+QUERY_PROFILING_ENABLED = bool_from_env('QUERY_PROFILING_ENABLED', False)
+QUERY_PROFILING_HEADER = 'HTTP_X_RALPH_QUERY_PROFILE'
+QUERY_PROFILES_PATH = os.environ.get(
+    'QUERY_PROFILES_PATH', '/tmp/ralph_query_profiles.jsonl'
+)
+# the same query executed at least this many times during single request is
+# reported as repeated (N+1 problem)
+REPEATED_QUERIES_THRESHOLD = int(
+    os.environ.get('REPEATED_QUERIES_THRESHOLD', 5)
+)
+# max number of queries per url name, ex. {"datacenterasset-list": 25}
+QUERY_BUDGETS = json.loads(os.environ.get('QUERY_BUDGETS', '{}'))
+DEFAULT_QUERY_BUDGET = None
+QUERY_BUDGETS_ENFORCED = bool_from_env('QUERY_BUDGETS_ENFORCED', False)
 
 TRANSITION_TEMPLATES = None
 
@@ -30,6 +30,8 @@ INSTALLED_APPS += (
 )
 
 USE_CACHE = False
+# fail tests when query budget of the view (see QUERY_BUDGETS) is exceeded
+QUERY_BUDGETS_ENFORCED = True
 PASSWORD_HASHERS = ('django_plainpasswordhasher.PlainPasswordHasher',)
 STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
 
@@ -46,6 +48,13 @@ URLCONF_MODULES = ['ralph.urls.base', ROOT_URLCONF]
 
 RQ_QUEUES['ralph_job_test'] = dict(ASYNC=False, **REDIS_CONNECTION)
 RQ_QUEUES['ralph_async_transitions']['ASYNC'] = False
+RQ_QUEUES['ralph_dashboards']['ASYNC'] = False
+RQ_QUEUES['ralph_cloud_sync']['ASYNC'] = False
+RQ_QUEUES['ralph_reports']['ASYNC'] = False
+RQ_QUEUES['ralph_admin_exports']['ASYNC'] = False
+# jobs are run synchronously (and in-memory DB is not shared between threads)
+TRANSITION_ASYNC_CONCURRENCY = 1
+STATSD_GRAPHS_PUSH_WORKERS = 1
 RALPH_INTERNAL_SERVICES.update({
     'JOB_TEST': {
         'queue_name': 'ralph_job_test',
@@ -1,3 +1,6 @@
+import threading
+from collections import OrderedDict
+
 from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -53,3 +56,51 @@ def post_commit(func, model, signal=post_save, single_call=True):
                 setattr(instance, called_already_attr, True)
 
         transaction.on_commit(wrapper)
+
+
+class _PendingBatch(object):
+    def __init__(self, batch):
+        self.batch = batch
+        self.items = OrderedDict()
+
+    def __call__(self):
+        if getattr(self.batch._local, 'pending', None) is self:
+            self.batch._local.pending = None
+        self.batch.func(list(self.items.values()))
+
+
+class OnCommitBatch(object):
+    """
+    Collect items (ex. saved objects) in current transaction and call `func`
+    once, with all of them, after commit (instead of registering separate
+    `on_commit` hook for every item).
+
+    Items added with the same key are de-duplicated (the last one is kept).
+    When transaction is rolled back, collected items are dropped (together
+    with the hook) and the next transaction starts with an empty batch.
+    Outside of transaction `func` is called immediately.
+    """
+    def __init__(self, func):
+        self.func = func
+        self._local = threading.local()
+
+    def _get_pending(self):
+        pending = getattr(self._local, 'pending', None)
+        if pending is None:
+            return None
+        # hook is not registered anymore when the transaction (or savepoint)
+        # in which it was registered was rolled back
+        connection = transaction.get_connection()
+        if not any(func is pending for _, func in connection.run_on_commit):
+            return None
+        return pending
+
+    def add(self, item, key=None):
+        key = item if key is None else key
+        pending = self._get_pending()
+        if pending is not None:
+            pending.items[key] = item
+            return
+        pending = self._local.pending = _PendingBatch(self)
+        pending.items[key] = item
+        transaction.on_commit(pending)
@@ -35,6 +35,7 @@ api_urls = list(map(lambda u: url(r'^', include(u)), [
     'ralph.virtual.api',
     'ralph.lib.custom_fields.api.custom_fields_api',
     'ralph.lib.transitions.api.routers',
+    'ralph.lib.search.api',
 ]))
 # include router urls
 # because we're using single router instance and urls are cached inside this
@@ -52,6 +53,7 @@ urlpatterns = [
     url(r'^', include('ralph.accounts.urls')),
     url(r'^', include('ralph.reports.urls')),
     url(r'^', include('ralph.admin.autocomplete_urls')),
+    url(r'^', include('ralph.admin.exports_urls')),
     url(r'^dhcp/', include('ralph.dhcp.urls')),
     url(r'^deployment/', include('ralph.deployment.urls')),
     url(r'^virtual/', include('ralph.virtual.urls')),
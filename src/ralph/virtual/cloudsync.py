@@ -1,8 +1,14 @@
 import json
 import logging
 import threading
+import time
+import uuid
 
+import django_rq
 import pkg_resources
+import redis
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Q
 from django.http import (
     HttpResponse,
@@ -12,6 +18,7 @@ from django.http import (
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 
+from ralph.lib.metrics import statsd
 from ralph.virtual.models import CloudProvider
 
 logger = logging.getLogger(__name__)
@@ -21,6 +28,17 @@ ENTRY_POINTS_GROUP = 'ralph.cloud_sync_processors'
 CLOUD_SYNC_DRIVERS = None
 LOCK = threading.Lock()
 
+CLOUD_SYNC_QUEUE = 'ralph_cloud_sync'
+# pending events of cloud provider (hash: instance id -> event)
+EVENTS_KEY_TMPL = 'ralph_cloud_sync_events_{}'
+# events of cloud provider taken by processing job (removed only after they
+# are processed, so events of crashed job are processed by the next one)
+PROCESSING_KEY_TMPL = 'ralph_cloud_sync_processing_{}'
+# set when processing job of cloud provider is enqueued, held until the job
+# finishes (so only one job processes events of cloud provider at a time)
+SCHEDULED_KEY_TMPL = 'ralph_cloud_sync_scheduled_{}'
+METRIC_PREFIX = 'cloud_sync'
+
 
 def load_processors():
     global CLOUD_SYNC_DRIVERS
@@ -48,6 +66,192 @@ def load_processors():
                 )
 
 
+def _get_enabled_provider_query(cloud_provider_id):
+    return Q(
+        pk=cloud_provider_id,
+        cloud_sync_enabled=True,
+        cloud_sync_driver__isnull=False
+    ) & ~Q(cloud_sync_driver='')
+
+
+def get_instance_id(processor, event_data):
+    """
+    Return id of the instance which `event_data` is about (used to coalesce
+    queued events) or None if it's unknown.
+
+    Processor could define it by `get_instance_id(event_data)` attribute,
+    otherwise `instance_id` of the event (or of its payload, as in
+    OpenStack notifications) is used.
+    """
+    if hasattr(processor, 'get_instance_id'):
+        return processor.get_instance_id(event_data)
+    if not isinstance(event_data, dict):
+        return None
+    payload = event_data.get('payload')
+    if isinstance(payload, dict) and payload.get('instance_id'):
+        return payload['instance_id']
+    return event_data.get('instance_id')
+
+
+def _get_redis():
+    return django_rq.get_connection(CLOUD_SYNC_QUEUE)
+
+
+def queue_event(cloud_provider, processor, event_data):
+    """
+    Store event of cloud provider (replacing previous, not processed yet,
+    event of the same instance) and schedule its processing.
+    """
+    instance_id = get_instance_id(processor, event_data)
+    if instance_id is None:
+        # event could not be coalesced with others
+        instance_id = 'event-{}'.format(uuid.uuid4())
+    redis = _get_redis()
+    events_key = EVENTS_KEY_TMPL.format(cloud_provider.pk)
+    pipeline = redis.pipeline()
+    pipeline.hset(events_key, instance_id, json.dumps({
+        'data': event_data,
+        'received': time.time(),
+    }))
+    pipeline.hlen(events_key)
+    pipeline.set(
+        SCHEDULED_KEY_TMPL.format(cloud_provider.pk), 1, nx=True,
+        ex=settings.CLOUD_SYNC_SCHEDULED_TIMEOUT,
+    )
+    _, queue_depth, schedule = pipeline.execute()
+    statsd.gauge(
+        '{}.{}.queue_depth'.format(METRIC_PREFIX, cloud_provider.pk),
+        queue_depth
+    )
+    if schedule:
+        _enqueue(cloud_provider.pk)
+
+
+def _enqueue(cloud_provider_id):
+    django_rq.get_queue(CLOUD_SYNC_QUEUE).enqueue(
+        process_events, cloud_provider_id
+    )
+
+
+def _take_events(cloud_provider_id):
+    """
+    Return events of cloud provider to process (as list of pairs: instance
+    id, event), ordered by the time they were received.
+
+    Pending events are moved to processing hash first, unless there are
+    events left there by previous (crashed) job - these are older, so they
+    are returned first.
+    """
+    redis_conn = _get_redis()
+    processing_key = PROCESSING_KEY_TMPL.format(cloud_provider_id)
+    if not redis_conn.exists(processing_key):
+        try:
+            redis_conn.rename(
+                EVENTS_KEY_TMPL.format(cloud_provider_id), processing_key
+            )
+        except redis.ResponseError:
+            # no pending events
+            return []
+    events = [
+        (instance_id, json.loads(event.decode('utf-8')))
+        for instance_id, event in redis_conn.hgetall(processing_key).items()
+    ]
+    return sorted(events, key=lambda item: item[1]['received'])
+
+
+def _ack_events(cloud_provider_id, instance_ids):
+    """
+    Remove processed events and extend lock of processing job.
+    """
+    pipeline = _get_redis().pipeline()
+    pipeline.hdel(PROCESSING_KEY_TMPL.format(cloud_provider_id), *instance_ids)
+    pipeline.expire(
+        SCHEDULED_KEY_TMPL.format(cloud_provider_id),
+        settings.CLOUD_SYNC_SCHEDULED_TIMEOUT
+    )
+    pipeline.execute()
+
+
+def _release(cloud_provider_id):
+    """
+    Release lock of processing job (and schedule next one if events were
+    received after the job has taken the last of them).
+    """
+    redis_conn = _get_redis()
+    scheduled_key = SCHEDULED_KEY_TMPL.format(cloud_provider_id)
+    redis_conn.delete(scheduled_key)
+    if redis_conn.exists(EVENTS_KEY_TMPL.format(cloud_provider_id)) and (
+        redis_conn.set(
+            scheduled_key, 1, nx=True, ex=settings.CLOUD_SYNC_SCHEDULED_TIMEOUT
+        )
+    ):
+        _enqueue(cloud_provider_id)
+
+
+def _process_batch(cloud_provider, processor, events):
+    metric_prefix = '{}.{}'.format(METRIC_PREFIX, cloud_provider.pk)
+    with transaction.atomic():
+        for _, event in events:
+            statsd.timing(
+                '{}.event_lag'.format(metric_prefix),
+                (time.time() - event['received']) * 1000
+            )
+            try:
+                # single broken event does not rollback the whole batch
+                with transaction.atomic():
+                    processor(cloud_provider, event['data'])
+            except Exception:
+                statsd.incr('{}.errors'.format(metric_prefix))
+                logger.exception(
+                    'Error during processing cloud sync event of '
+                    'provider %s', cloud_provider.pk
+                )
+    statsd.incr('{}.processed'.format(metric_prefix), len(events))
+
+
+def process_events(cloud_provider_id):
+    """
+    Process (coalesced) queued events of cloud provider in micro-batches of
+    `CLOUD_SYNC_BATCH_SIZE` events, each in single transaction.
+
+    Events are removed from the queue after the batch is committed, and the
+    lock (scheduled key) is held until all events are processed, so events
+    are not lost when the job crashes and events of the same instance are
+    not processed concurrently (out of order) by another job.
+    """
+    load_processors()
+    try:
+        cloud_provider = CloudProvider.objects.get(
+            _get_enabled_provider_query(cloud_provider_id)
+        )
+        processor = CLOUD_SYNC_DRIVERS[cloud_provider.cloud_sync_driver]
+    except (CloudProvider.DoesNotExist, KeyError):
+        events = _take_events(cloud_provider_id)
+        logger.warning(
+            'Cloud sync of provider %s not available. Dropping %s events.',
+            cloud_provider_id, len(events)
+        )
+        _get_redis().delete(PROCESSING_KEY_TMPL.format(cloud_provider_id))
+        _release(cloud_provider_id)
+        return
+    batch_size = settings.CLOUD_SYNC_BATCH_SIZE
+    try:
+        # process events received during processing as well
+        while True:
+            events = _take_events(cloud_provider_id)
+            if not events:
+                break
+            for i in range(0, len(events), batch_size):
+                batch = events[i:i + batch_size]
+                _process_batch(cloud_provider, processor, batch)
+                _ack_events(
+                    cloud_provider_id,
+                    [instance_id for instance_id, _ in batch]
+                )
+    finally:
+        _release(cloud_provider_id)
+
+
 @csrf_exempt
 @require_POST
 def cloud_sync_router(request, cloud_provider_id):
@@ -62,11 +266,7 @@ def cloud_sync_router(request, cloud_provider_id):
 
     try:
         cloud_provider = CloudProvider.objects.get(
-            Q(
-                pk=cloud_provider_id,
-                cloud_sync_enabled=True,
-                cloud_sync_driver__isnull=False
-            ) & ~Q(cloud_sync_driver='')
+            _get_enabled_provider_query(cloud_provider_id)
         )
 
         processor = CLOUD_SYNC_DRIVERS[
@@ -77,6 +277,10 @@ def cloud_sync_router(request, cloud_provider_id):
     except KeyError:
         return HttpResponse('Specified processor is not available', status=501)
 
+    if settings.CLOUD_SYNC_ASYNC:
+        queue_event(cloud_provider, processor, event_data)
+        return HttpResponse(status=202)
+
     processor(cloud_provider, event_data)
 
     return HttpResponse(status=204)
@@ -6,11 +6,14 @@ from enum import auto, Enum
 from functools import lru_cache
 
 from django.conf import settings
-from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
+from django.core.exceptions import ObjectDoesNotExist
 from django.core.management.base import BaseCommand
 from django.db import IntegrityError, transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
 from reversion import revisions
 
+from ralph.assets.models.components import Ethernet
 from ralph.data_center.models.physical import DataCenterAsset
 from ralph.lib.openstack.client import (
     RalphIronicClient,
@@ -28,6 +31,12 @@ logger = logging.getLogger(__name__)
 DEFAULT_OPENSTACK_PROVIDER_NAME = settings.DEFAULT_OPENSTACK_PROVIDER_NAME
 
 
+def _chunks(items, size):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
 class SynchronizationType(Enum):
     INCREMENTAL = auto()
     FULL = auto()
@@ -46,6 +55,10 @@ class RalphClient:
         self.ralph_serial_number_param = ralph_serial_number_param
         self.DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
         self.summary = defaultdict(int)
+        # Ralph objects fetched once and reused during the sync
+        self._ralph_servers = {}
+        self._hypervisors = {}
+        self._projects = {}
         if changes_since:
             self.summary['sync_type'] = SynchronizationType.INCREMENTAL.name
         else:
@@ -71,7 +84,8 @@ class RalphClient:
         return {
             'name': project.name,
             'servers': {},
-            'tags': list(project.tags.names()),
+            # use prefetched tags
+            'tags': [tag.name for tag in project.tags.all()],
         }
 
     def get_ralph_projects(self):
@@ -94,44 +108,69 @@ class RalphClient:
         return ralph_flavors
 
     def get_ralph_servers_data(self, ralph_projects):
-        """Get configuration from ralph DB"""
-        for server in CloudHost.objects.filter(
+        """
+        Get configuration from ralph DB (using fixed number of queries).
+        """
+        servers_queryset = CloudHost.objects.filter(
             cloudprovider=self.cloud_provider,
-        ).select_related(
+        )
+        ips = defaultdict(dict)
+        for base_object_id, address, hostname in Ethernet.objects.filter(
+            base_object__in=servers_queryset.values('pk')
+        ).values_list(
+            'base_object', 'ipaddress__address', 'ipaddress__hostname'
+        ):
+            ips[base_object_id][address] = hostname
+        servers = list(servers_queryset.select_related(
             'hypervisor', 'parent', 'parent__cloudproject',
+        ).prefetch_related('tags'))
+        # workaround for projects with the same id in multiple providers
+        missing_projects = {
+            server.parent.cloudproject.project_id for server in servers
+        } - set(ralph_projects)
+        for project in CloudProject.objects.filter(
+            project_id__in=missing_projects
         ).prefetch_related('tags'):
-            ips = dict(
-                server.ethernet_set.select_related('ipaddress').values_list(
-                    'ipaddress__address', 'ipaddress__hostname'
-                )
+            ralph_projects[project.project_id] = self._get_project_info(
+                project
             )
+        for server in servers:
             new_server = {
                 'hostname': server.hostname,
                 'hypervisor': server.hypervisor,
-                'tags': server.tags.names(),
-                'ips': ips,
+                'tags': [tag.name for tag in server.tags.all()],
+                'ips': ips[server.pk],
                 'host_id': server.host_id,
             }
             host_id = server.host_id
             project_id = server.parent.cloudproject.project_id
-            # workaround for projects with the same id in multiple providers
-            if project_id not in ralph_projects:
-                ralph_projects[project_id] = self._get_project_info(
-                    CloudProject.objects.get(project_id=project_id)
-                )
             ralph_projects[project_id]['servers'][host_id] = new_server
+            self._ralph_servers[host_id] = server
         return ralph_projects
 
-    @staticmethod
-    def _get_hypervisor(host_name, server_id):
+    def _prefetch_hypervisors(self, host_names):
+        """
+        Fetch hypervisors (DC assets) with `host_names` using single query.
+        """
+        host_names = set(host_names) - set(self._hypervisors)
+        if not host_names:
+            return
+        hypervisors = dict.fromkeys(host_names)
+        found = set()
+        for asset in DataCenterAsset.objects.filter(hostname__in=host_names):
+            # hostname is not unique - hypervisor is not assigned when it's
+            # ambiguous
+            hypervisors[asset.hostname] = (
+                None if asset.hostname in found else asset
+            )
+            found.add(asset.hostname)
+        self._hypervisors.update(hypervisors)
+
+    def _get_hypervisor(self, host_name, server_id):
         """get or None for CloudHost hypervisor"""
-        try:
-            obj = DataCenterAsset.objects.get(hostname=host_name)
-            return obj
-        except (MultipleObjectsReturned, ObjectDoesNotExist):
-            logger.warning('Hypervisor %s not found for %s',
-                           host_name, server_id)
-            return None
+        if host_name not in self._hypervisors:
+            self._prefetch_hypervisors([host_name])
+        return self._hypervisors[host_name]
 
     def match_physical_and_cloud_hosts(self):
         """Connect CloudHosts and DC assets according to data from Ironic."""
@@ -203,10 +242,17 @@ class RalphClient:
     def _get_flavor_objects(self):
         return {fl.flavor_id: fl for fl in CloudFlavor.objects.all()}
 
+    def _get_project(self, project_id):
+        if project_id not in self._projects:
+            self._projects[project_id] = CloudProject.objects.get(
+                project_id=project_id
+            )
+        return self._projects[project_id]
+
     def _add_server(self, openstack_server, server_id, project_id):
         """add new server to ralph"""
         try:
-            project = CloudProject.objects.get(project_id=project_id)
+            project = self._get_project(project_id)
         except (
             CloudProject.DoesNotExist,
             CloudProject.MultipleObjectsReturned
@@ -239,23 +285,33 @@ class RalphClient:
             cloudprovider=self.cloud_provider,
             image_name=openstack_server['image'],
         )
-
-        # workaround - created field has auto_now_add attribute
         new_server.save()
+        # workaround - created field has auto_now_add attribute
         new_server.created = datetime.strptime(openstack_server['created'],
                                                self.DATETIME_FORMAT)
-        self._save_object(new_server, 'add server %s'
-                          % new_server.hostname)
-
+        CloudHost.objects.filter(pk=new_server.pk).update(
+            created=new_server.created
+        )
         new_server.tags.add(openstack_server['tag'])
-        with transaction.atomic(), revisions.create_revision():
-            new_server.ip_addresses = openstack_server['ips']
-            revisions.set_comment('Assign ip addresses to a host')
+        new_server.ip_addresses = openstack_server['ips']
+        self._ralph_servers[server_id] = new_server
 
     def _update_server(self, openstack_server, server_id, ralph_server):
-        """Compare and apply changes to a CloudHost"""
+        """
+        Compare and apply changes to a CloudHost.
+
+        Changes of CloudHost fields are only set on the object and returned -
+        they are saved (in bulk) by `_save_servers`.
+
+        Returns:
+            list of changed fields (empty if only tags or IPs were changed),
+            None if server was not modified
+        """
         modified = False
-        obj = CloudHost.objects.get(host_id=server_id)
+        changed_fields = []
+        obj = self._ralph_servers.get(server_id)
+        if obj is None:
+            obj = CloudHost.objects.get(host_id=server_id)
         try:
             flavor = self._get_flavor_objects()[openstack_server['flavor_id']]
         except KeyError:
@@ -265,40 +321,22 @@ class RalphClient:
             )
             return
 
-        if obj.hostname != openstack_server['hostname']:
-            logger.info('Updating hostname ({}) for {}'.format(
-                openstack_server['hostname'], server_id
-            ))
-            obj.hostname = openstack_server['hostname']
-            self._save_object(obj, 'Modify hostname')
-            modified = True
-
-        if obj.cloudflavor != flavor:
-            logger.info('Updating flavor ({}) for {}'.format(
-                flavor, server_id
-            ))
-            obj.cloudflavor = flavor
-            self._save_object(obj, 'Modify cloudflavor')
-            modified = True
-
         hypervisor = self._get_hypervisor(
             openstack_server['hypervisor'], server_id
         )
-        if obj.hypervisor != hypervisor:
-            logger.info('Updating hypervisor ({}) for {}'.format(
-                hypervisor, server_id
-            ))
-            obj.hypervisor = hypervisor
-            self._save_object(obj, 'Modify hypervisor')
-            modified = True
-
-        if obj.image_name != openstack_server['image']:
-            logger.info('Updating image ({}) for {}'.format(
-                openstack_server['image'], server_id
-            ))
-            obj.image_name = openstack_server['image']
-            self._save_object(obj, 'Updated image info')
-            modified = True
+        for field, value in (
+            ('hostname', openstack_server['hostname']),
+            ('cloudflavor', flavor),
+            ('hypervisor', hypervisor),
+            ('image_name', openstack_server['image']),
+        ):
+            if getattr(obj, field) != value:
+                logger.info('Updating {} ({}) for {}'.format(
+                    field, value, server_id
+                ))
+                setattr(obj, field, value)
+                changed_fields.append(field)
+                modified = True
 
         if openstack_server['tag'] not in ralph_server['tags']:
             obj.tags.add(openstack_server['tag'])
@@ -306,17 +344,66 @@ class RalphClient:
         # add/remove IPs
         if openstack_server['ips'] != ralph_server['ips']:
             modified = True
-            with transaction.atomic(), revisions.create_revision():
-                obj.ip_addresses = openstack_server['ips']
-                revisions.set_comment('Assign ip addresses to a host')
+            obj.ip_addresses = openstack_server['ips']
 
-        return modified
+        return changed_fields if modified else None
+
+    def _save_servers(self, changes):
+        """
+        Save changed fields of servers using (grouped) bulk updates.
+
+        post_save is sent for every changed server afterwards, so its
+        version is added to the current revision (and other handlers, like
+        publishing host updates, are triggered).
+
+        Args:
+            changes: list of (CloudHost, list of changed fields) pairs
+        """
+        pks_by_value = defaultdict(list)
+        for obj, fields in changes:
+            for field in fields:
+                attname = CloudHost._meta.get_field(field).attname
+                pks_by_value[(attname, getattr(obj, attname))].append(obj.pk)
+        for (attname, value), pks in pks_by_value.items():
+            CloudHost.objects.filter(pk__in=pks).update(**{attname: value})
+        now = timezone.now()
+        CloudHost.objects.filter(
+            pk__in=[obj.pk for obj, _ in changes]
+        ).update(modified=now)
+        for obj, fields in changes:
+            obj.modified = now
+            post_save.send(
+                sender=CloudHost, instance=obj, created=False, raw=False,
+                using=obj._state.db, update_fields=frozenset(fields),
+            )
 
     def _add_or_update_servers(
         self, openstack_project_servers, openstack_project_id, ralph_projects
     ):
-        """Add/modify servers within project"""
-        for server_id, server in openstack_project_servers.items():
+        """
+        Add/modify servers within project.
+
+        Servers are processed in chunks (of `OPENSTACK_SYNC_CHUNK_SIZE`),
+        each in a single transaction and revision.
+        """
+        for chunk in _chunks(
+            openstack_project_servers.items(),
+            settings.OPENSTACK_SYNC_CHUNK_SIZE
+        ):
+            self._prefetch_hypervisors(
+                server['hypervisor'] for _, server in chunk
+            )
+            with transaction.atomic(), revisions.create_revision():
+                revisions.set_comment('openstack_sync::add_or_update_servers')
+                self._add_or_update_servers_chunk(
+                    chunk, openstack_project_id, ralph_projects
+                )
+
+    def _add_or_update_servers_chunk(
+        self, servers, openstack_project_id, ralph_projects
+    ):
+        changes = []
+        for server_id, server in servers:
             # In case of incremental sync, servers with DELETED status are
             # included in data received from Openstack. This method only
             # updates servers or creates new ones. There is a separate method
@@ -331,14 +418,20 @@ class RalphClient:
                 self._add_server(server, server_id, openstack_project_id)
                 self.summary['new_instances'] += 1
             else:
-                modified = self._update_server(
+                changed_fields = self._update_server(
                     server,
                     server_id,
                     ralph_server,
                 )
-                if modified:
+                if changed_fields is not None:
                     self.summary['mod_instances'] += 1
+                if changed_fields:
+                    changes.append(
+                        (self._ralph_servers[server_id], changed_fields)
+                    )
             self.summary['total_instances'] += 1
+        if changes:
+            self._save_servers(changes)
 
     def _calculate_servers_to_delete(
         self, openstack_project_servers, openstack_project_id, ralph_projects
@@ -360,18 +453,24 @@ class RalphClient:
         ]
 
     def _delete_servers(self, servers):
-        """Remove servers which no longer exists in openstack project"""
-        try:
-            for server_id in servers:
-                host = CloudHost.objects.get(host_id=server_id)
-                logger.warning(
-                    'Removing CloudHost %s (%s)',
-                    server_id, host.hostname
-                )
-                self._delete_object(host)
-                self.summary['del_instances'] += 1
-        except (KeyError, ObjectDoesNotExist):
-            pass
+        """
+        Remove servers which no longer exists in openstack project (in
+        chunks of `OPENSTACK_SYNC_CHUNK_SIZE`).
+        """
+        for chunk in _chunks(servers, settings.OPENSTACK_SYNC_CHUNK_SIZE):
+            hosts = CloudHost.objects.filter(host_id__in=chunk)
+            pks = []
+            for pk, host_id, hostname in hosts.values_list(
+                'pk', 'host_id', 'hostname'
+            ):
+                logger.warning('Removing CloudHost %s (%s)', host_id, hostname)
+                pks.append(pk)
+            if not pks:
+                continue
+            with transaction.atomic(), revisions.create_revision():
+                CloudHost.objects.filter(pk__in=pks).delete()
+                revisions.set_comment('openstack_sync::_delete_servers')
+            self.summary['del_instances'] += len(pks)
 
     def _add_or_update_projects(
         self, openstack_project_data, openstack_project_id, ralph_projects
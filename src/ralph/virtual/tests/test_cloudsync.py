@@ -1,5 +1,6 @@
-from unittest.mock import Mock
+from unittest.mock import call, Mock, patch
 
+from django.test import override_settings
 from django.urls import reverse
 
 from ralph.api.tests._base import RalphAPITestCase
@@ -88,3 +89,117 @@ class TestCloudSyncRouter(RalphAPITestCase):
 
         self.assertEqual(501, resp.status_code)
         self.assertEqual(b'Specified processor is not available', resp.content)
+
+
+class TestQueuedCloudSync(RalphAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        cloudsync.load_processors()
+        self.processor_name = 'queued_processor'
+        self.cloud_provider = CloudProviderFactory(
+            cloud_sync_enabled=True,
+            cloud_sync_driver=self.processor_name
+        )
+        self.processor = Mock(spec=['__call__'])
+        cloudsync.CLOUD_SYNC_DRIVERS[self.processor_name] = self.processor
+
+    def _get_event(self, instance_id, status):
+        return {'payload': {'instance_id': instance_id, 'status': status}}
+
+    @override_settings(CLOUD_SYNC_ASYNC=True)
+    def test_event_is_acknowledged_and_processed_by_queue(self):
+        test_data = self._get_event('abc', 'ACTIVE')
+
+        url = reverse('cloud-sync-router', args=(self.cloud_provider.id,))
+        resp = self.client.post(url, test_data, format='json')
+
+        self.assertEqual(202, resp.status_code)
+        self.processor.assert_called_once_with(self.cloud_provider, test_data)
+
+    def test_events_are_coalesced_per_instance(self):
+        events = [
+            self._get_event('abc', 'BUILD'),
+            self._get_event('def', 'ACTIVE'),
+            self._get_event('abc', 'ACTIVE'),
+        ]
+        with patch.object(cloudsync.django_rq, 'get_queue') as get_queue:
+            for event in events:
+                cloudsync.queue_event(
+                    self.cloud_provider, self.processor, event
+                )
+        # processing is scheduled only once
+        self.assertEqual(get_queue.return_value.enqueue.call_count, 1)
+
+        cloudsync.process_events(self.cloud_provider.id)
+
+        self.assertEqual(self.processor.call_args_list, [
+            call(self.cloud_provider, events[1]),
+            call(self.cloud_provider, events[2]),
+        ])
+
+    @override_settings(CLOUD_SYNC_BATCH_SIZE=1)
+    def test_broken_event_does_not_stop_others(self):
+        self.processor.side_effect = [ValueError(), None]
+        with patch.object(cloudsync.django_rq, 'get_queue'):
+            for instance_id in ['abc', 'def']:
+                cloudsync.queue_event(
+                    self.cloud_provider, self.processor,
+                    self._get_event(instance_id, 'ACTIVE')
+                )
+
+        cloudsync.process_events(self.cloud_provider.id)
+
+        self.assertEqual(self.processor.call_count, 2)
+
+    @override_settings(CLOUD_SYNC_BATCH_SIZE=1)
+    def test_events_of_crashed_job_are_processed_by_next_one(self):
+        events = [
+            self._get_event('abc', 'ACTIVE'),
+            self._get_event('def', 'ACTIVE'),
+        ]
+        with patch.object(cloudsync.django_rq, 'get_queue'):
+            for event in events:
+                cloudsync.queue_event(
+                    self.cloud_provider, self.processor, event
+                )
+            with patch.object(
+                cloudsync, '_ack_events', side_effect=SystemExit()
+            ):
+                with self.assertRaises(SystemExit):
+                    cloudsync.process_events(self.cloud_provider.id)
+
+        cloudsync.process_events(self.cloud_provider.id)
+
+        self.assertEqual(self.processor.call_args_list, [
+            call(self.cloud_provider, events[0]),
+            call(self.cloud_provider, events[0]),
+            call(self.cloud_provider, events[1]),
+        ])
+
+    def test_events_received_during_processing_are_processed_by_same_job(
+        self
+    ):
+        events = [
+            self._get_event('abc', 'BUILD'),
+            self._get_event('abc', 'ACTIVE'),
+        ]
+
+        def queue_next_event(*args):
+            self.processor.side_effect = None
+            cloudsync.queue_event(
+                self.cloud_provider, self.processor, events[1]
+            )
+
+        self.processor.side_effect = queue_next_event
+        with patch.object(cloudsync.django_rq, 'get_queue') as get_queue:
+            cloudsync.queue_event(
+                self.cloud_provider, self.processor, events[0]
+            )
+            cloudsync.process_events(self.cloud_provider.id)
+        # processing is not scheduled again while the job is running
+        self.assertEqual(get_queue.return_value.enqueue.call_count, 1)
+        self.assertEqual(self.processor.call_args_list, [
+            call(self.cloud_provider, events[0]),
+            call(self.cloud_provider, events[1]),
+        ])
@@ -4,7 +4,8 @@ from datetime import datetime
 
 import mock
 from django.core.exceptions import ObjectDoesNotExist
-from django.test.utils import override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
 
 from ralph.assets.models.components import ComponentModel
 from ralph.assets.tests.factories import DataCenterAssetModelFactory
@@ -534,3 +535,46 @@ class TestOpenstackSync(RalphTestCase):
             self.host.host_id,
             ralph_projects_with_servers[self.cloud_project_1.project_id]['servers'].keys()
         )
+
+    def test_get_ralph_servers_data_number_of_queries(self):
+        ralph_projects = self.ralph_client.get_ralph_projects()
+        with CaptureQueriesContext(connection) as queries:
+            self.ralph_client.get_ralph_servers_data(ralph_projects)
+        for i, host in enumerate(CloudHostFactory.create_batch(
+            5, parent=self.cloud_project_1
+        )):
+            IPAddress.objects.create(
+                base_object=host, address='10.0.0.{}'.format(i)
+            )
+            host.tags.add('tag')
+        ralph_projects = self.ralph_client.get_ralph_projects()
+        with self.assertNumQueries(len(queries)):
+            ralph_projects = self.ralph_client.get_ralph_servers_data(
+                ralph_projects
+            )
+        self.assertEqual(
+            ralph_projects['project_id1']['servers']['host_id1']['ips'],
+            {'1.2.3.4': None, '2.2.3.4': None}
+        )
+
+    @override_settings(OPENSTACK_SYNC_CHUNK_SIZE=1)
+    def test_check_ralph_update_in_chunks(self):
+        ralph_projects = self.ralph_client.get_ralph_servers_data(
+            self.ralph_client.get_ralph_projects()
+        )
+        self.ralph_client.perform_update(
+            OPENSTACK_DATA,
+            OPENSTACK_FLAVORS,
+            ralph_projects,
+            self.ralph_client.get_ralph_flavors()
+        )
+        for project_id, project in OPENSTACK_DATA.items():
+            for host_id, host in project['servers'].items():
+                if host['status'] == 'DELETED':
+                    continue
+                ralph_host = CloudHost.objects.get(host_id=host_id)
+                self.assertEqual(ralph_host.hostname, host['hostname'])
+                self.assertEqual(ralph_host.image_name, host['image'])
+                self.assertEqual(
+                    ralph_host.cloudflavor.flavor_id, host['flavor_id']
+                )